@@ -0,0 +1,314 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+# ==========================================
+# 1. SETTINGS
+# ==========================================
+# Every benchmark runs in a fresh interpreter (cold imports, own peak RSS).
+# Metric names carry their direction: *_per_s is higher-is-better, every
+# other metric (seconds, microseconds, MB) is lower-is-better.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_JSON = os.path.join(HERE, 'benchmark_baseline.json')
+DEFAULT_THRESHOLD = 0.25   # Fractional slowdown tolerated before a metric counts as a regression
+
+BATCH_SIZES = (1000, 100000, 1000000)
+COMPUTE_CALLS = 200
+INPUTS = ('trend', 'wick_up', 'wick_lo', 'h1_bear', 'h1_bull')
+
+
+def _random_rows(n, seed=0):
+    return np.random.default_rng(seed).uniform(0, 100, (n, len(INPUTS)))
+
+
+def _percentiles_us(samples):
+    p50, p99 = np.percentile(np.asarray(samples) * 1e6, [50, 99])
+    return float(p50), float(p99)
+
+
+# ==========================================
+# 2. BENCHMARKS (Each returns {metric: value})
+# ==========================================
+
+def bench_startup():
+    """Import + system construction: headless engine vs. skfuzzy reference
+    (numpy is already loaded by this runner; test_fuzzy_engine times it too)."""
+    t0 = time.perf_counter()
+    import fuzzy_engine
+    t1 = time.perf_counter()
+    fuzzy_engine.create_fuzzy_system()
+    t2 = time.perf_counter()
+    from fuzzy_simulator import create_skfuzzy_system
+    import skfuzzy.control  # noqa: F401
+    t3 = time.perf_counter()
+    create_skfuzzy_system()
+    t4 = time.perf_counter()
+    return {'engine_import_s': t1 - t0, 'engine_build_s': t2 - t1,
+            'skfuzzy_import_s': t3 - t2, 'skfuzzy_build_s': t4 - t3}
+
+
+def bench_compute(calls=COMPUTE_CALLS):
+    """Single-call latency: ControlSystemSimulation.compute() vs. the headless
+    FuzzySimulation.compute() on the batch engine."""
+    from fuzzy_engine import create_fuzzy_system
+    from fuzzy_simulator import create_skfuzzy_system
+
+    rows = _random_rows(calls).tolist()
+    out = {}
+    for prefix, factory, n_calls in (('skfuzzy', create_skfuzzy_system, calls),
+                                     ('engine', create_fuzzy_system, calls * 5)):
+        sim, _ = factory()
+        samples = []
+        for row in (rows * 5)[:n_calls]:
+            t0 = time.perf_counter()
+            for name, value in zip(INPUTS, row):
+                sim.input[name] = value
+            try:
+                sim.compute()
+            except Exception:
+                pass  # No rule fired: the GUI shows 0, the cost still counts
+            samples.append(time.perf_counter() - t0)
+        out[f'{prefix}_compute_p50_us'], out[f'{prefix}_compute_p99_us'] = _percentiles_us(samples)
+    return out
+
+
+def bench_batch(sizes=BATCH_SIZES, repeats=3):
+    """score_batch throughput (best of ``repeats``) per batch size and defuzz mode."""
+    from batch_engine import BatchFuzzyEngine, DEFUZZ_MODES
+    from rule_loader import load_system
+
+    system = load_system()
+    out = {}
+    for defuzz in DEFUZZ_MODES:
+        engine = BatchFuzzyEngine(system, defuzz=defuzz)
+        for n in sizes:
+            rows = _random_rows(n).T
+            best = min(_timed(engine.score_batch, *rows) for _ in range(repeats if n < 1000000 else 1))
+            out[f'{defuzz}_{n}_rows_per_s'] = n / best
+    # Instrumented path (rule_stats): strengths returned alongside the scores
+    rows = _random_rows(100000).T
+    engine = BatchFuzzyEngine(system)
+    best = min(_timed(lambda: engine.score_batch(*rows, return_strengths=True)) for _ in range(repeats))
+    out['discrete_100000_with_strengths_rows_per_s'] = 100000 / best
+    # Reference without support-based pruning (every rule, every term, every row)
+    engine = BatchFuzzyEngine(system, prune=False)
+    best = min(_timed(engine.score_batch, *rows) for _ in range(repeats))
+    out['discrete_100000_unpruned_rows_per_s'] = 100000 / best
+    # Zero-order Sugeno approximation (Target_Score constants)
+    from sugeno_engine import SugenoEngine
+    sugeno = SugenoEngine(system)
+    best = min(_timed(sugeno.score_batch, *rows) for _ in range(repeats))
+    out['sugeno_100000_rows_per_s'] = 100000 / best
+    return out
+
+
+def bench_scan108():
+    """The 108 nominal cases: scan_all_cases.scan_108 vs. one score_batch call."""
+    import itertools
+    from scan_all_cases import scan_108
+    from batch_engine import BatchFuzzyEngine
+    from rule_loader import load_system
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        t_scan = _timed(scan_108)
+    cases = np.array(list(itertools.product((20, 50, 80), (10, 90), (10, 90), (10, 50, 90), (10, 50, 90))),
+                     dtype=float)
+    engine = BatchFuzzyEngine(load_system())
+    engine.score_batch(*cases.T)  # Warm-up
+    return {'skfuzzy_scan108_s': t_scan, 'engine_scan108_s': min(_timed(engine.score_batch, *cases.T)
+                                                                 for _ in range(20))}
+
+
+def bench_gui(frames=100):
+    """GUI chart frame on the Agg canvas (no display needed): blitted update
+    of the dynamic artists vs. the old clear + replot + full draw."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from fuzzy_engine import create_fuzzy_system
+    from fuzzy_simulator import ResponseChart, ScoreWorker
+
+    sim, consequent = create_fuzzy_system()
+    worker = ScoreWorker(sim.engine)
+    rows = [(80.0, 10.0, 90.0, 10.0, h) for h in np.linspace(0, 100, frames)]
+    results = [worker.evaluate(row) for row in rows]
+    worker.close()
+
+    fig = Figure(figsize=(8, 6), dpi=100)
+    chart = ResponseChart(fig, FigureCanvasAgg(fig), consequent)
+    chart.update(*results[0], 'warm-up')
+    blit = [_timed(chart.update, score, agg, 'label') for score, agg in results]
+
+    fig = Figure(figsize=(8, 6), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+
+    def full_redraw(score):
+        ax.clear()
+        for label, term in consequent.terms.items():
+            ax.plot(consequent.universe, term.mf, label=label, alpha=0.3)
+        ax.axvline(x=score, color='r', linestyle='--', linewidth=2)
+        ax.legend(loc='upper right', fontsize='small')
+        canvas.draw()
+
+    full = [_timed(full_redraw, score) for score, _ in results[:frames // 5]]
+    return {'chart_blit_frame_us': float(np.median(blit)) * 1e6,
+            'chart_full_redraw_us': float(np.median(full)) * 1e6}
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+BENCHMARKS = {
+    'startup': bench_startup,
+    'compute': bench_compute,
+    'batch': bench_batch,
+    'scan108': bench_scan108,
+    'gui': bench_gui,
+}
+
+
+# ==========================================
+# 3. RUNNER (One subprocess per benchmark)
+# ==========================================
+
+def peak_rss_mb():
+    """Peak resident set of this process in MB, or None where neither
+    ``resource`` nor psutil can tell."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)  # Bytes on macOS, KB on Linux
+    try:
+        import psutil
+    except ImportError:
+        return None
+    peak = getattr(psutil.Process().memory_info(), 'peak_wset', None)  # Windows
+    return None if peak is None else peak / (1024 * 1024)
+
+
+def _run_child(name):
+    metrics = BENCHMARKS[name]()
+    rss = peak_rss_mb()
+    if rss is not None:
+        metrics['peak_rss_mb'] = rss
+    json.dump(metrics, sys.stdout)
+
+
+def run_benchmarks(names=None):
+    """{benchmark: {metric: value}} plus an environment block."""
+    results = {'environment': {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }}
+    for name in names or BENCHMARKS:
+        print(f"  {name} ...", end='', flush=True, file=sys.stderr)
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', name],
+                              cwd=HERE, capture_output=True, text=True, check=True)
+        results[name] = json.loads(proc.stdout)
+        print(f" {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+    return results
+
+
+def higher_is_better(metric):
+    return metric.endswith('_per_s')
+
+
+def compare(results, baseline):
+    """[(benchmark, metric, baseline, current, change)] for every metric
+    present in both; ``change`` is the fractional slowdown (negative = faster)."""
+    rows = []
+    for bench, metrics in results.items():
+        if bench == 'environment' or bench not in baseline:
+            continue
+        for metric, value in metrics.items():
+            base = baseline[bench].get(metric)
+            if not base:
+                continue
+            if not higher_is_better(metric):
+                change = value / base - 1.0
+            else:
+                change = base / value - 1.0 if value else float('inf')  # Throughput fell to zero
+            rows.append((bench, metric, base, value, change))
+    return rows
+
+
+def report(rows, threshold=DEFAULT_THRESHOLD):
+    """Print the comparison table; returns the regressed rows."""
+    print(f"{'BENCHMARK':<9} | {'METRIC':<30} | {'BASELINE':>12} | {'CURRENT':>12} | CHANGE")
+    print("-" * 82)
+    regressions = []
+    for bench, metric, base, value, change in rows:
+        flag = ''
+        if change > threshold:
+            flag = '  << REGRESSION'
+            regressions.append((bench, metric, base, value, change))
+        direction = 'worse' if change > 0 else 'better'
+        print(f"{bench:<9} | {metric:<30} | {base:12.4g} | {value:12.4g} | {abs(change) * 100:5.1f}% {direction}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Performance benchmarks for the Python fuzzy simulator.")
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Run a subset")
+    parser.add_argument('--out', default='benchmark_results.json', help="Where to write this run's JSON")
+    parser.add_argument('--baseline', default=BASELINE_JSON)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed fractional slowdown per metric (0.25 = 25%%)")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _run_child(args.child)
+        return 0
+
+    results = run_benchmarks(args.only)
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2)
+        f.write('\n')
+    print(f"Results -> {args.out}", file=sys.stderr)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)  # --only refreshes just the benchmarks that ran
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+            f.write('\n')
+        print(f"Baseline -> {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first", file=sys.stderr)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('environment') != results['environment']:
+        print(f"Note: baseline recorded on {baseline.get('environment')}", file=sys.stderr)
+    regressions = report(compare(results, baseline), args.threshold)
+    print(f"\n{len(regressions)} regression(s) beyond {args.threshold * 100:.0f}%")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
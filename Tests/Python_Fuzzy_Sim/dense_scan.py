@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+from multiprocessing import Pool
+from numpy.lib.format import open_memmap
+from batch_engine import BatchFuzzyEngine, INPUT_NAMES
+from response_surface import grid_axes
+from rule_loader import load_system
+
+# ==========================================
+# DENSE SCAN (Replaces the 108 nominal cases of scan_108)
+# ==========================================
+# Output directory layout (all columns share one row order):
+#   meta.json        grid, rules fingerprint, shard size
+#   <input>.npy      float32 input columns
+#   score.npy        float32 reversal score
+#   done.npy         uint8 per shard, 1 once its rows are flushed to disk
+
+COLUMNS = INPUT_NAMES + ('score',)
+DEFAULT_SHARD = 1 << 16
+
+_worker = {}
+
+
+def _init_worker(out_dir, shape, defuzz):
+    _worker['engine'] = BatchFuzzyEngine(load_system(), defuzz=defuzz)
+    _worker['axes'] = [np.linspace(0, 100, n) for n in shape]
+    _worker['shape'] = shape
+    _worker['cols'] = {c: np.load(os.path.join(out_dir, c + '.npy'), mmap_mode='r+') for c in COLUMNS}
+
+
+def _scan_shard(args):
+    shard, start, stop = args
+    idx = np.unravel_index(np.arange(start, stop), _worker['shape'])
+    inputs = [axis[i] for axis, i in zip(_worker['axes'], idx)]
+    score = _worker['engine'].score_batch(*inputs)
+    cols = _worker['cols']
+    for name, x in zip(INPUT_NAMES, inputs):
+        cols[name][start:stop] = x
+    cols['score'][start:stop] = score
+    for col in cols.values():
+        col.flush()
+    return shard, stop - start
+
+
+def _prepare(out_dir, shape, total, shard_size, defuzz, fingerprint):
+    meta = {'shape': list(shape), 'rows': total, 'shard_size': shard_size,
+            'defuzz': defuzz, 'fingerprint': fingerprint, 'columns': list(COLUMNS)}
+    meta_path = os.path.join(out_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            existing = json.load(f)
+        if existing != meta:
+            raise ValueError(f"{out_dir} holds a different scan ({existing}); use a new directory")
+        return np.load(os.path.join(out_dir, 'done.npy'), mmap_mode='r+')
+
+    os.makedirs(out_dir, exist_ok=True)
+    for c in COLUMNS:
+        open_memmap(os.path.join(out_dir, c + '.npy'), mode='w+', dtype=np.float32, shape=(total,)).flush()
+    n_shards = -(-total // shard_size)
+    done = open_memmap(os.path.join(out_dir, 'done.npy'), mode='w+', dtype=np.uint8, shape=(n_shards,))
+    done.flush()
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)  # Written last: its presence marks a usable scan
+    return done
+
+
+def dense_scan(out_dir, step=5.0, workers=None, shard_size=DEFAULT_SHARD, defuzz='discrete'):
+    """Score every grid point and stream the columns to ``out_dir``.
+
+    Re-running on the same directory resumes: shards already marked done
+    are skipped.
+    """
+    shape = tuple(len(a) for a in grid_axes(step))
+    total = int(np.prod(shape))
+    done = _prepare(out_dir, shape, total, shard_size, defuzz, load_system().fingerprint())
+
+    todo = [(s, s * shard_size, min(total, (s + 1) * shard_size)) for s in np.flatnonzero(done == 0)]
+    rows_left = sum(stop - start for _, start, stop in todo)
+    print(f"Dense scan {shape} = {total} rows | {len(done) - len(todo)}/{len(done)} shards already done",
+          file=sys.stderr)
+
+    workers = workers or os.cpu_count() or 1
+    init_args = (out_dir, shape, defuzz)
+    t0, finished = time.perf_counter(), 0
+    if workers == 1:
+        _init_worker(*init_args)
+        results = map(_scan_shard, todo)
+        pool = None
+    else:
+        pool = Pool(workers, initializer=_init_worker, initargs=init_args)
+        results = pool.imap_unordered(_scan_shard, todo)
+    try:
+        for shard, n in results:
+            done[shard] = 1
+            done.flush()
+            finished += n
+            rate = finished / (time.perf_counter() - t0)
+            print(f"\r  {finished}/{rows_left} rows ({finished / rows_left * 100:5.1f}%) "
+                  f"{rate / 1e3:8.1f} k rows/s  ETA {(rows_left - finished) / rate:6.1f} s",
+                  end='', file=sys.stderr)
+    finally:
+        if pool is not None:
+            pool.terminate()
+    print(file=sys.stderr)
+    return open_scan(out_dir)
+
+
+def open_scan(out_dir):
+    """Memory-mapped columns of a (possibly partial) scan, as a dict."""
+    cols = {c: np.load(os.path.join(out_dir, c + '.npy'), mmap_mode='r') for c in COLUMNS}
+    cols['done'] = np.load(os.path.join(out_dir, 'done.npy'), mmap_mode='r')
+    return cols
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dense, resumable scan of the reversal system.")
+    parser.add_argument('out_dir')
+    parser.add_argument('--step', type=float, nargs='+', default=[5.0],
+                        help="Grid step, one value for all inputs or one per input "
+                             f"({', '.join(INPUT_NAMES)})")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD)
+    parser.add_argument('--defuzz', choices=('discrete', 'analytic'), default='discrete')
+    args = parser.parse_args()
+    step = args.step[0] if len(args.step) == 1 else args.step
+    dense_scan(args.out_dir, step, args.workers, args.shard_size, args.defuzz)
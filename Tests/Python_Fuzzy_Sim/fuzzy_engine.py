@@ -0,0 +1,90 @@
+import numpy as np
+from batch_engine import BatchFuzzyEngine, INPUT_NAMES, OUTPUT_NAME, trapmf, v99_system
+from incremental_engine import IncrementalEvaluator
+from stage_profiler import register_stages
+
+# ==========================================
+# 1. HEADLESS INFERENCE CORE (NumPy only - no tkinter / matplotlib / skfuzzy)
+# ==========================================
+# Import this instead of fuzzy_simulator from tests, scripts and worker
+# processes. The GUI module loads tkinter/matplotlib only when a window opens.
+
+# Fresh interpreter: `import fuzzy_engine` (numpy included) + create_fuzzy_system().
+# Measured ~0.15 s on the 1-CPU reference box; test_fuzzy_engine enforces it.
+STARTUP_BUDGET_MS = 400
+
+# The GUI's verdict bands. Edges are exclusive on the strong side: 60 is a
+# WEAK BUY, -20 is NEUTRAL.
+BAND_LABELS = ('STRONG SELL', 'WEAK SELL', 'NEUTRAL', 'WEAK BUY', 'STRONG BUY')
+BAND_EDGES = (-60.0, -20.0, 20.0, 60.0)
+
+
+def score_band(scores):
+    """Index into BAND_LABELS per score (uint8 array; scalars give a 0-d array)."""
+    s = np.asarray(scores, dtype=np.float64)
+    lo2, lo1, hi1, hi2 = BAND_EDGES
+    band = 2 + (s > hi1).astype(np.int8) + (s > hi2) - (s < lo1) - (s < lo2)
+    return band.astype(np.uint8)
+
+
+class Term:
+    """Output term sampled on the universe (what the GUI plots)."""
+
+    def __init__(self, label, mf):
+        self.label = label
+        self.mf = mf
+
+
+class Consequent:
+    """Subset of skfuzzy's Consequent the GUI uses: universe + terms[label].mf."""
+
+    def __init__(self, system):
+        self.label = OUTPUT_NAME
+        self.universe = system.universe
+        self.terms = {label: Term(label, trapmf(system.universe, b))
+                      for label, b in zip(system.output_labels, system.output_breaks)}
+
+
+class _Inputs(dict):
+    def __setitem__(self, name, value):
+        if name not in INPUT_NAMES:
+            raise ValueError(f"Unexpected input: {name}")  # Same complaint as skfuzzy
+        super().__setitem__(name, float(value))
+
+
+class FuzzySimulation:
+    """Drop-in for skfuzzy's ControlSystemSimulation on the batch engine.
+
+    ``sim.input[name] = x; sim.compute(); sim.output['reversal']``. Scores
+    match skfuzzy to SKFUZZY_TOLERANCE; a case where no rule fires scores
+    0.0, which is what every caller's ``except: score = 0.0`` produced.
+    compute() goes through an IncrementalEvaluator, so only the parts that
+    depend on inputs changed since the last call are recomputed
+    (``sim.evaluator.stats``).
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.evaluator = IncrementalEvaluator(engine)
+        self.input = _Inputs()
+        self.output = {}
+
+    def compute(self):
+        missing = [name for name in INPUT_NAMES if name not in self.input]
+        if missing:
+            raise ValueError(f"Missing inputs: {', '.join(missing)}")
+        self.output[OUTPUT_NAME] = self.evaluator.evaluate(*(self.input[name] for name in INPUT_NAMES))
+
+    def reset(self):
+        self.input.clear()
+        self.output.clear()
+
+
+register_stages(FuzzySimulation, 'compute')
+
+
+def create_fuzzy_system(system=None, defuzz='discrete'):
+    """(simulation, consequent) like the GUI's original factory; v0.99 rules
+    by default, or any CompiledSystem (e.g. rule_loader.load_system())."""
+    system = system if system is not None else v99_system()
+    return FuzzySimulation(BatchFuzzyEngine(system, defuzz=defuzz)), Consequent(system)
@@ -1,16 +1,39 @@
-import tkinter as tk
-from tkinter import ttk
+import os
+import threading
+import time
+from collections import OrderedDict, deque
 import numpy as np
-from matplotlib.figure import Figure 
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
+from batch_engine import INPUT_NAMES
+from fuzzy_engine import BAND_LABELS, create_fuzzy_system, score_band  # create_fuzzy_system re-exported for old callers
+from heatmap_explorer import SliceExplorer, plot_slice
+from incremental_engine import IncrementalEvaluator
+from signal_store import SignalStore
+from stage_profiler import instrument_skfuzzy
+
+# GUI / plotting / skfuzzy are imported on first use so importing this module
+# stays as cheap as fuzzy_engine (see _load_gui / create_skfuzzy_system)
+tk = ttk = Figure = FigureCanvasTkAgg = None
+
+
+def _load_gui():
+    global tk, ttk, Figure, FigureCanvasTkAgg
+    if tk is None:
+        import tkinter as tk
+        from tkinter import ttk
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
 
 # ==========================================
 # 1. FUZZY SYSTEM SETUP (Matches MQL5 v0.99 Beta - No C3)
 # ==========================================
+# skfuzzy reference for the same rules; the GUI itself runs on fuzzy_engine.
+
+def create_skfuzzy_system():
+    import skfuzzy as fuzz
+    from skfuzzy import control as ctrl
+    instrument_skfuzzy()
 
-def create_fuzzy_system():
     # 1. Inputs
     trend = ctrl.Antecedent(np.arange(0, 101, 1), 'trend')
     wick_up = ctrl.Antecedent(np.arange(0, 101, 1), 'wick_up')
@@ -94,27 +117,252 @@ def create_fuzzy_system():
     return simulation, reversal
 
 # ==========================================
-# 2. GUI APP
+# 2. BACKGROUND SCORING (Coalesced, memoized, off the Tk thread)
+# ==========================================
+
+SLIDER_STEP = 0.5   # Slider positions snap to this, so repeated positions hit the memo
+DEBOUNCE_MS = 8     # Slider events within this window collapse into one compute
+POLL_MS = 15        # GUI picks up the newest result about once per frame
+MEMO_SIZE = 4096    # Rows kept as (score, aggregate)
+
+
+class ScoreWorker:
+    """Scores slider positions on a daemon thread so the Tk loop never waits.
+
+    submit() only records the newest row. The thread wakes on it, waits
+    ``debounce`` seconds for the slider to move on, then scores whatever is
+    newest; the rows in between are never computed. Results are memoized
+    per row (LRU), and poll() hands the GUI the newest one.
+    """
+
+    def __init__(self, engine, debounce=DEBOUNCE_MS / 1000, memo_size=MEMO_SIZE):
+        self.evaluator = IncrementalEvaluator(engine)
+        self.debounce = debounce
+        self.memo_size = memo_size
+        self.memo = OrderedDict()
+        self.submitted = 0
+        self.computed = 0
+        self.memo_hits = 0
+        self.compute_s = 0.0
+        self._pending = None
+        self._result = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        with self._cond:
+            self._pending = tuple(float(v) for v in row)
+            self.submitted += 1
+            self._cond.notify()
+
+    def poll(self):
+        """(row, score, aggregate) finished since the last poll, else None."""
+        with self._cond:
+            result, self._result = self._result, None
+        return result
+
+    def evaluate(self, row):
+        """(score, aggregated output MF on the universe grid) for one row."""
+        hit = self.memo.get(row)
+        if hit is not None:
+            self.memo.move_to_end(row)
+            self.memo_hits += 1
+            return hit
+        t0 = time.perf_counter()
+        hit = (self.evaluator.evaluate(*row), self.evaluator.aggregate())
+        self.compute_s += time.perf_counter() - t0
+        self.computed += 1
+        self.memo[row] = hit
+        if len(self.memo) > self.memo_size:
+            self.memo.popitem(last=False)
+        return hit
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if not self._closed and self.debounce > 0:
+                    self._cond.wait_for(lambda: self._closed, self.debounce)
+                if self._closed:
+                    return
+                row, self._pending = self._pending, None
+            score, aggregate = self.evaluate(row)
+            with self._cond:
+                self._result = (row, score, aggregate)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def summary(self):
+        lookups = self.computed + self.memo_hits
+        return {'submitted': self.submitted, 'computed': self.computed,
+                'memo_hit_rate': self.memo_hits / lookups if lookups else 0.0,
+                'compute_ms': self.compute_s / self.computed * 1e3 if self.computed else 0.0}
+
+
+# ==========================================
+# 3. BLITTED CHART (Static terms drawn once, dynamic artists per frame)
+# ==========================================
+
+class ResponseChart:
+    """Output-term curves on a cached background; an update redraws only
+    the shaded aggregate, the score line and the caption (blitting). A
+    full draw happens on the first frame and whenever the canvas itself
+    redraws (resize), which refreshes the background."""
+
+    def __init__(self, fig, canvas, consequent):
+        self.fig = fig
+        self.canvas = canvas
+        self.ax = fig.add_subplot(111)
+        universe = consequent.universe
+        for label, term in consequent.terms.items():
+            self.ax.plot(universe, term.mf, label=label, alpha=0.3)
+        self.ax.set_xlim(universe[0], universe[-1])
+        self.ax.set_ylim(0, 1.05)
+        self.ax.legend(loc='upper right', fontsize='small')
+        self._x = np.concatenate([[universe[0]], universe, [universe[-1]]])
+        self.area, = self.ax.fill(self._x, np.zeros_like(self._x), color='tab:red', alpha=0.25,
+                                  animated=True)
+        self.line = self.ax.axvline(x=0, color='r', linestyle='--', linewidth=2, animated=True)
+        self.caption = self.ax.text(0.02, 0.96, '', transform=self.ax.transAxes, va='top',
+                                    fontsize=12, fontweight='bold', animated=True)
+        self.full_draws = 0
+        self.frame_ms = deque(maxlen=200)
+        self._background = None
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        self.full_draws += 1
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_dynamic()
+
+    def _draw_dynamic(self):
+        for artist in (self.area, self.line, self.caption):
+            self.ax.draw_artist(artist)
+
+    def update(self, score, aggregate, label):
+        t0 = time.perf_counter()
+        self.area.set_xy(np.column_stack([self._x, np.concatenate([[0.0], aggregate, [0.0]])]))
+        self.line.set_xdata([score, score])
+        self.caption.set_text(f"Score: {score:.1f} ({label})")
+        if self._background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_dynamic()
+            self.canvas.blit(self.fig.bbox)
+        self.frame_ms.append((time.perf_counter() - t0) * 1e3)
+
+
+# ==========================================
+# 4. HEATMAP WINDOW (Score over two inputs, the other three from the sliders)
+# ==========================================
+
+HEATMAP_DELAY_MS = 150  # A new slice waits for the sliders to rest this long
+
+
+class HeatmapWindow:
+    """Toplevel showing a 101x101 SliceExplorer slice. Moving one of the two
+    plotted inputs only moves the position marker; moving a fixed one (or
+    picking other axes) loads that slice, from the cache when seen before."""
+
+    def __init__(self, app):
+        self.app = app
+        self.explorer = SliceExplorer(app.simulation.engine)
+        self.top = tk.Toplevel(app.root)
+        self.top.title("Response Surface Slice")
+        self.top.protocol("WM_DELETE_WINDOW", self.close)
+
+        bar = ttk.Frame(self.top, padding=5)
+        bar.pack(fill='x')
+        self.var_x = tk.StringVar(value="h1_bear")
+        self.var_y = tk.StringVar(value="h1_bull")
+        for label, var in (("X", self.var_x), ("Y", self.var_y)):
+            ttk.Label(bar, text=label).pack(side=tk.LEFT)
+            cb = ttk.Combobox(bar, textvariable=var, values=INPUT_NAMES, state="readonly", width=10)
+            cb.pack(side=tk.LEFT, padx=5)
+            cb.bind("<<ComboboxSelected>>", lambda e: self.refresh())
+        self.lbl_info = ttk.Label(bar, text="", font=("Consolas", 8), foreground="gray")
+        self.lbl_info.pack(side=tk.RIGHT)
+
+        self.fig = Figure(figsize=(7, 6), dpi=100)
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.top)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.slice = None
+        self.marker = None
+        self._after = None
+        self.refresh()
+
+    def schedule(self):
+        if self._after is not None:
+            self.top.after_cancel(self._after)
+        self._after = self.top.after(HEATMAP_DELAY_MS, self.refresh)
+
+    def refresh(self):
+        self._after = None
+        x_name, y_name = self.var_x.get(), self.var_y.get()
+        if x_name == y_name:
+            self.lbl_info.config(text="Pick two different inputs")
+            return
+        row = dict(zip(INPUT_NAMES, self.app.inputs()))
+        t0 = time.perf_counter()
+        sl = self.explorer.slice(x_name, y_name, **{n: v for n, v in row.items() if n not in (x_name, y_name)})
+        if sl is not self.slice:
+            self.slice = sl
+            self.fig.clear()
+            ax = self.fig.add_subplot(111)
+            plot_slice(ax, sl)
+            self.marker, = ax.plot([], [], marker='o', markersize=10, color='k', markerfacecolor='none')
+        self.marker.set_data([row[x_name]], [row[y_name]])
+        self.canvas.draw_idle()
+        self.lbl_info.config(text=f"{(time.perf_counter() - t0) * 1e3:.0f} ms | "
+                                  f"{len(self.explorer.cache)} slices cached, {self.explorer.hits} hits")
+
+    def close(self):
+        self.app.heatmap = None
+        self.top.destroy()
+
+
+# ==========================================
+# 5. GUI APP
 # ==========================================
 
+# LOG CASE prints the row and appends it (stream "GUI") to this signal store
+CASE_STORE = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Logs', 'cases'))
+
+
 class FuzzyApp:
     def __init__(self, root):
+        _load_gui()
         self.root = root
         self.root.title("Fuzzy Logic Digital Twin (v0.99 Beta - No C3)")
         self.root.geometry("1200x800")
         
         self.simulation, self.reversal_consequent = create_fuzzy_system()
+        self.worker = ScoreWorker(self.simulation.engine)
         
+        # Starting slider positions (NONE = 10, SIDEWAYS = 50)
         self.val_map = {"NONE": 10, "WEAK": 50, "STRONG": 90, "SIDEWAYS": 50, "BEARISH": 20, "BULLISH": 80}
         
-        self.var_trend = tk.StringVar(value="SIDEWAYS")
-        self.var_w_up  = tk.StringVar(value="NONE")
-        self.var_w_lo  = tk.StringVar(value="NONE")
-        self.var_be    = tk.StringVar(value="NONE")
-        self.var_bu    = tk.StringVar(value="NONE")
+        self.var_trend = tk.DoubleVar(value=self.val_map["SIDEWAYS"])
+        self.var_w_up  = tk.DoubleVar(value=self.val_map["NONE"])
+        self.var_w_lo  = tk.DoubleVar(value=self.val_map["NONE"])
+        self.var_be    = tk.DoubleVar(value=self.val_map["NONE"])
+        self.var_bu    = tk.DoubleVar(value=self.val_map["NONE"])
+        self.row = None
+        self.heatmap = None
+        self.cases = None
         
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
         self.update_chart()
+        self.root.after(POLL_MS, self.poll_result)
 
     def setup_ui(self):
         # Left Panel (Controls)
@@ -123,17 +371,17 @@ class FuzzyApp:
         
         ttk.Label(left, text="Inputs", font=("Arial", 16, "bold")).pack(pady=10)
         
-        self.create_combo(left, "Trend", self.var_trend, ["BEARISH", "SIDEWAYS", "BULLISH"])
+        self.create_slider(left, "Trend (Bear - Bull)", self.var_trend)
         ttk.Separator(left).pack(fill='x', pady=10)
         
         ttk.Label(left, text="Daily Wicks", font=("Arial", 10, "bold")).pack(anchor="w")
-        self.create_combo(left, "Upper (Sell)", self.var_w_up, ["NONE", "STRONG"], "red")
-        self.create_combo(left, "Lower (Buy)",  self.var_w_lo, ["NONE", "STRONG"], "green")
+        self.create_slider(left, "Upper (Sell)", self.var_w_up, "red")
+        self.create_slider(left, "Lower (Buy)",  self.var_w_lo, "green")
         ttk.Separator(left).pack(fill='x', pady=10)
         
         ttk.Label(left, text="H1 Breakout", font=("Arial", 10, "bold")).pack(anchor="w")
-        self.create_combo(left, "Bear (Sell)", self.var_be, ["NONE", "WEAK", "STRONG"], "red")
-        self.create_combo(left, "Bull (Buy)",  self.var_bu, ["NONE", "WEAK", "STRONG"], "green")
+        self.create_slider(left, "Bear (Sell)", self.var_be, "red")
+        self.create_slider(left, "Bull (Buy)",  self.var_bu, "green")
         
         # Result Panel
         res = ttk.LabelFrame(left, text="Result", padding=20)
@@ -146,58 +394,82 @@ class FuzzyApp:
         # LOG BUTTON
         btn_log = tk.Button(left, text="LOG CASE", font=("Arial", 12, "bold"), bg="#ddd", command=self.log_case)
         btn_log.pack(fill='x', pady=20)
+        tk.Button(left, text="HEATMAP", font=("Arial", 12, "bold"), bg="#ddd", command=self.open_heatmap).pack(fill='x')
+        self.lbl_perf = ttk.Label(left, text="", font=("Consolas", 8), foreground="gray")
+        self.lbl_perf.pack(anchor="w")
         
         # Right Panel (Chart)
         right = ttk.Frame(self.root)
         right.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
         
         self.fig = Figure(figsize=(8,6), dpi=100)
-        self.ax = self.fig.add_subplot(111)
         self.canvas = FigureCanvasTkAgg(self.fig, master=right)
+        self.chart = ResponseChart(self.fig, self.canvas, self.reversal_consequent)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
-    def create_combo(self, parent, label, var, values, color="black"):
+    def create_slider(self, parent, label, var, color="black"):
         f = ttk.Frame(parent)
         f.pack(fill='x', pady=5)
         ttk.Label(f, text=label, foreground=color).pack(anchor="w")
-        cb = ttk.Combobox(f, textvariable=var, values=values, state="readonly")
-        cb.pack(fill='x')
-        cb.bind("<<ComboboxSelected>>", lambda e: self.update_chart())
+        value = ttk.Label(f, width=6, anchor="e")
+        value.pack(side=tk.RIGHT)
+        def moved(_=None):
+            var.set(round(var.get() / SLIDER_STEP) * SLIDER_STEP)
+            value.config(text=f"{var.get():.1f}")
+            self.update_chart()
+        ttk.Scale(f, from_=0, to=100, variable=var, command=moved).pack(side=tk.LEFT, fill='x', expand=True)
+        value.config(text=f"{var.get():.1f}")
+
+    def inputs(self):
+        return tuple(v.get() for v in (self.var_trend, self.var_w_up, self.var_w_lo, self.var_be, self.var_bu))
 
     def update_chart(self):
-        try:
-            self.simulation.input['trend'] = self.val_map[self.var_trend.get()]
-            self.simulation.input['wick_up'] = self.val_map[self.var_w_up.get()]
-            self.simulation.input['wick_lo'] = self.val_map[self.var_w_lo.get()]
-            self.simulation.input['h1_bear'] = self.val_map[self.var_be.get()]
-            self.simulation.input['h1_bull'] = self.val_map[self.var_bu.get()]
-            
-            self.simulation.compute()
-            score = self.simulation.output['reversal']
-        except:
-            score = 0.0
-            
-        self.lbl_score.config(text=f"{score:.1f}")
-        msg = "NEUTRAL"
-        if score > 60: msg = "STRONG BUY"
-        elif score > 20: msg = "WEAK BUY"
-        elif score < -60: msg = "STRONG SELL"
-        elif score < -20: msg = "WEAK SELL"
-        self.lbl_msg.config(text=msg)
-        
-        self.ax.clear()
-        universe = self.reversal_consequent.universe
-        for label, term in self.reversal_consequent.terms.items():
-            self.ax.plot(universe, term.mf, label=label, alpha=0.3)
-        self.ax.axvline(x=score, color='r', linestyle='--', linewidth=2)
-        self.ax.set_title(f"Score: {score:.1f} ({msg})")
-        self.ax.legend(loc='upper right', fontsize='small')
-        self.canvas.draw()
+        # Only queues the row; the worker scores it and poll_result draws it
+        row = self.inputs()
+        if row != self.row:
+            self.row = row
+            self.worker.submit(row)
+
+    def poll_result(self):
+        result = self.worker.poll()
+        if result is not None:
+            row, score, aggregate = result
+            for name, value in zip(INPUT_NAMES, row):
+                self.simulation.input[name] = value
+            self.simulation.output['reversal'] = score
+            msg = BAND_LABELS[score_band(score)]
+            self.lbl_score.config(text=f"{score:.1f}")
+            self.lbl_msg.config(text=msg)
+            self.chart.update(score, aggregate, msg)
+            s = self.worker.summary()
+            self.lbl_perf.config(text=f"frame {np.median(self.chart.frame_ms):.1f} ms | "
+                                      f"compute {s['compute_ms']:.2f} ms | memo {s['memo_hit_rate'] * 100:.0f}%")
+            if self.heatmap is not None:
+                self.heatmap.schedule()
+        self.root.after(POLL_MS, self.poll_result)
+
+    def open_heatmap(self):
+        if self.heatmap is None:
+            self.heatmap = HeatmapWindow(self)
+        else:
+            self.heatmap.top.lift()
 
     def log_case(self):
-        print(f"[LOG] Inputs: T={self.var_trend.get()} | W_UP={self.var_w_up.get()} | W_LO={self.var_w_lo.get()} | H1_BE={self.var_be.get()} | H1_BU={self.var_bu.get()} || Output: {self.lbl_score.cget('text')}")
+        values = ' | '.join(f"{name}={value:.1f}" for name, value in zip(INPUT_NAMES, self.inputs()))
+        print(f"[LOG] Inputs: {values} || Output: {self.lbl_score.cget('text')}")
+        try:
+            if self.cases is None:
+                self.cases = SignalStore(CASE_STORE, self.simulation.engine.system)
+            self.cases.append_scored(self.simulation.engine, self.inputs(), np.datetime64('now', 'm'), 'GUI')
+        except ValueError as e:  # e.g. the store holds cases of other rules
+            print(f"[LOG] Not stored: {e}")
+
+    def close(self):
+        self.worker.close()
+        self.root.destroy()
 
 if __name__ == "__main__":
+    _load_gui()
     root = tk.Tk()
     app = FuzzyApp(root)
     root.mainloop()
\ No newline at end of file
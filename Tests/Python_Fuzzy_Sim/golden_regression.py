@@ -0,0 +1,234 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from batch_engine import BatchFuzzyEngine, INPUT_NAMES, INPUT_UNIVERSE
+from rule_loader import load_system
+from rule_stats import NO_RULE, dominant_rule
+
+# ==========================================
+# 1. GRID (Every input on a uniform axis, 21^5 = 4.1M cells at step 5)
+# ==========================================
+# Rows whose five membership vectors are equal score identically, and a
+# uniform axis lands many points on the flat parts of the MFs (0..20 is
+# all NONE, 80..100 all STRONG). The grid is evaluated on the distinct
+# membership values of each axis only (~260k rows for rules.csv) and
+# expanded back by indexing: the same scores (to float rounding) for ~16x
+# less engine work.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_PATH = os.path.join(HERE, 'golden_surface.npz')
+GRID_STEP = 5.0
+TOLERANCE = 1e-3  # Score points; the snapshot is float32
+TOP_DEVIATIONS = 10
+
+
+def grid_axis(step=GRID_STEP):
+    lo, hi = INPUT_UNIVERSE
+    return np.linspace(lo, hi, int(round((hi - lo) / step)) + 1)
+
+
+def evaluate_grid(engine, axis):
+    """(scores, dominant rule) on ``axis`` ^ 5, shape (len(axis),) * 5 in
+    INPUT_NAMES order."""
+    memberships = engine.fuzzify([axis] * len(INPUT_NAMES))
+    first, inverse = zip(*[np.unique(mu, axis=0, return_index=True, return_inverse=True)[1:]
+                           for mu in memberships])
+    grid = np.meshgrid(*[axis[i] for i in first], indexing='ij')
+    scores, strength = engine.score_batch(*[g.ravel() for g in grid], return_strengths=True)
+    expand = np.ix_(*[inv.ravel() for inv in inverse])
+    return scores.reshape(grid[0].shape)[expand], dominant_rule(strength).reshape(grid[0].shape)[expand]
+
+
+# ==========================================
+# 2. GOLDEN SNAPSHOT (Compressed .npz: float32 scores, int8 dominant rule)
+# ==========================================
+
+class GoldenSurface:
+    """Scores and dominant rules on the grid, plus the rule table they came
+    from, so a diff can name the rules that changed."""
+
+    def __init__(self, axis, scores, dominant, rule_ids, rule_terms, rule_output, fingerprint):
+        self.axis = axis
+        self.scores = scores
+        self.dominant = dominant
+        self.rule_ids = tuple(rule_ids)
+        self.rule_terms = rule_terms
+        self.rule_output = rule_output
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, engine, step=GRID_STEP):
+        axis = grid_axis(step)
+        scores, dominant = evaluate_grid(engine, axis)
+        system = engine.system
+        return cls(axis, scores.astype(np.float32), dominant.astype(np.int8), system.rule_ids,
+                   system.rule_terms, system.rule_output, system.fingerprint())
+
+    def save(self, path=GOLDEN_PATH):
+        np.savez_compressed(path, axis=self.axis, scores=self.scores, dominant=self.dominant,
+                            rule_ids=np.array(self.rule_ids), rule_terms=self.rule_terms,
+                            rule_output=self.rule_output, fingerprint=self.fingerprint)
+        return path
+
+    @classmethod
+    def open(cls, path=GOLDEN_PATH):
+        with np.load(path) as z:
+            return cls(z['axis'], z['scores'], z['dominant'], z['rule_ids'].tolist(), z['rule_terms'],
+                       z['rule_output'], str(z['fingerprint']))
+
+    def cell(self, index):
+        return tuple(float(self.axis[i]) for i in index)
+
+
+def changed_rules(golden, system):
+    """Rule ids added, removed or redefined since the snapshot."""
+    old = {r: (tuple(t), o) for r, t, o in zip(golden.rule_ids, golden.rule_terms.tolist(), golden.rule_output.tolist())}
+    new = {r: (tuple(t), o) for r, t, o in zip(system.rule_ids, system.rule_terms.tolist(), system.rule_output.tolist())}
+    return sorted(r for r in old.keys() | new.keys() if old.get(r) != new.get(r))
+
+
+# ==========================================
+# 3. PROPERTIES (Buy/sell mirror symmetry, monotone inputs)
+# ==========================================
+# Mirror: score(t, up, lo, bear, bull) == -score(100 - t, lo, up, bull, bear).
+# Monotone: a longer lower wick or a stronger bull break never lowers the
+# score, their bearish twins never raise it. Neither holds everywhere for
+# rules.csv (no term covers 30 or 70 exactly, so the score drops back to 0
+# there), so the gate only fails on violations the golden surface did not
+# already have.
+
+MIRROR = (0, 2, 1, 4, 3)  # Input swapped in by the mirror, per input
+MONOTONE = {'wick_up': -1, 'wick_lo': 1, 'h1_bear': -1, 'h1_bull': 1}
+
+
+def mirror_gap(scores):
+    """|score + mirrored score| per cell."""
+    return np.abs(scores + scores[::-1].transpose(MIRROR))
+
+
+def monotone_violations(scores, name, tol=TOLERANCE):
+    """Boolean mask over the steps along ``name`` (that axis one shorter)
+    where the score moves against MONOTONE[name] by more than ``tol``."""
+    return MONOTONE[name] * np.diff(scores, axis=INPUT_NAMES.index(name)) < -tol
+
+
+# ==========================================
+# 4. CHECK (Vectorized diff + properties against the snapshot)
+# ==========================================
+
+def _rules_at(engine, cells):
+    """'ID 0.75, ...' of the rules firing at each cell, strongest first."""
+    if not cells:
+        return []
+    _, strength = engine.score_batch(*np.array(cells, dtype=np.float64).T, return_strengths=True)
+    ids = engine.system.rule_ids
+    return [', '.join(f"{ids[r]} {s[r]:.2f}" for r in np.argsort(-s, kind='stable') if s[r] > 0) or '-'
+            for s in strength]
+
+
+def _worst(values, mask, top):
+    """Indices (unravelled) of the ``top`` largest values where ``mask``."""
+    flat = np.flatnonzero(mask)
+    if len(flat) > top:
+        flat = flat[np.argpartition(-values.ravel()[flat], top - 1)[:top]]
+    flat = flat[np.argsort(-values.ravel()[flat], kind='stable')]
+    return [tuple(int(i) for i in idx) for idx in zip(*np.unravel_index(flat, values.shape))]
+
+
+def check(engine=None, path=GOLDEN_PATH, tol=TOLERANCE, top=TOP_DEVIATIONS):
+    """Re-evaluate the golden grid with ``engine`` (rules.csv by default);
+    returns a report dict whose 'ok' gates rules / engine changes."""
+    t0 = time.perf_counter()
+    engine = engine if engine is not None else BatchFuzzyEngine(load_system())
+    golden = GoldenSurface.open(path)
+    scores, dominant = evaluate_grid(engine, golden.axis)
+    t_eval = time.perf_counter() - t0
+    ids = engine.system.rule_ids
+    name = lambda rules, i: rules[i] if i != NO_RULE else '-'
+
+    delta = np.abs(scores - golden.scores)
+    changed = delta > tol
+    worst = _worst(delta, changed, top)
+    now = _rules_at(engine, [golden.cell(c) for c in worst])
+    deviations = [{'inputs': golden.cell(c), 'golden': float(golden.scores[c]), 'score': float(scores[c]),
+                   'golden_rule': name(golden.rule_ids, golden.dominant[c]), 'rule': name(ids, dominant[c]),
+                   'firing': firing} for c, firing in zip(worst, now)]
+
+    gap = mirror_gap(scores)
+    asym = gap > tol
+    worst = _worst(gap, asym, top)
+    mirror = [{'inputs': golden.cell(c), 'gap': float(gap[c]), 'firing': firing}
+              for c, firing in zip(worst, _rules_at(engine, [golden.cell(c) for c in worst]))]
+
+    monotone = {}
+    golden_scores = golden.scores.astype(np.float64)
+    for input_name, sign in MONOTONE.items():
+        axis = INPUT_NAMES.index(input_name)
+        bad = monotone_violations(scores, input_name, tol)
+        new = bad & ~monotone_violations(golden_scores, input_name, tol)
+        step = -sign * np.diff(scores, axis=axis)
+        examples = []
+        for c in _worst(step, new, top):
+            after = c[:axis] + (c[axis] + 1,) + c[axis + 1:]
+            before_rules, after_rules = _rules_at(engine, [golden.cell(c), golden.cell(after)])
+            examples.append({'from': golden.cell(c), 'to': golden.cell(after), 'drop': float(step[c]),
+                             'firing_from': before_rules, 'firing_to': after_rules})
+        monotone[input_name] = {'violations': int(bad.sum()), 'new': int(new.sum()), 'worst_new': examples}
+
+    return {
+        'ok': not changed.any() and not asym.any() and not any(m['new'] for m in monotone.values()),
+        'cells': scores.size, 'changed': int(changed.sum()), 'max_delta': float(delta.max()),
+        'fingerprint_changed': golden.fingerprint != engine.system.fingerprint(),
+        'changed_rules': changed_rules(golden, engine.system), 'deviations': deviations,
+        'asymmetric': int(asym.sum()), 'max_mirror_gap': float(gap.max()), 'mirror': mirror,
+        'monotone': monotone, 'eval_s': t_eval, 'elapsed_s': time.perf_counter() - t0,
+    }
+
+
+def _fmt(cell):
+    return '(' + ', '.join(f"{v:g}" for v in cell) + ')'
+
+
+def report(result, file=None):
+    file = file or sys.stdout
+    print(f"{result['cells']} cells ({', '.join(INPUT_NAMES)}) in {result['elapsed_s']:.2f} s "
+          f"(evaluation {result['eval_s']:.2f} s)", file=file)
+    if result['fingerprint_changed']:
+        print(f"Rules / MFs differ from the snapshot; redefined rules: {', '.join(result['changed_rules']) or '-'}",
+              file=file)
+    print(f"Changed cells: {result['changed']} (max |delta| {result['max_delta']:.4f})", file=file)
+    for d in result['deviations']:
+        print(f"  {_fmt(d['inputs'])}: {d['golden']:.2f} -> {d['score']:.2f} | dominant {d['golden_rule']} -> "
+              f"{d['rule']} | firing: {d['firing']}", file=file)
+    print(f"Mirror asymmetric cells: {result['asymmetric']} (max gap {result['max_mirror_gap']:.4f})", file=file)
+    for m in result['mirror']:
+        print(f"  {_fmt(m['inputs'])}: gap {m['gap']:.2f} | firing: {m['firing']}", file=file)
+    for input_name, m in result['monotone'].items():
+        direction = 'non-decreasing' if MONOTONE[input_name] > 0 else 'non-increasing'
+        print(f"Monotone ({direction}) in {input_name}: {m['violations']} violating steps, {m['new']} new", file=file)
+        for e in m['worst_new']:
+            print(f"  {_fmt(e['from'])} -> {_fmt(e['to'])}: {e['drop']:.2f} the wrong way | "
+                  f"{e['firing_from']} -> {e['firing_to']}", file=file)
+    print("PASS" if result['ok'] else "FAIL", file=file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diff the rules.csv response surface against its golden snapshot.")
+    parser.add_argument('--update', action='store_true', help="Rewrite the snapshot from the current rules")
+    parser.add_argument('--step', type=float, default=GRID_STEP, help="Grid step for --update")
+    parser.add_argument('--golden', default=GOLDEN_PATH)
+    parser.add_argument('--top', type=int, default=TOP_DEVIATIONS)
+    args = parser.parse_args()
+
+    if args.update:
+        t0 = time.perf_counter()
+        golden = GoldenSurface.build(BatchFuzzyEngine(load_system()), args.step)
+        golden.save(args.golden)
+        print(f"{golden.scores.size} cells in {time.perf_counter() - t0:.2f} s -> {args.golden} "
+              f"({os.path.getsize(args.golden) / 1024:.0f} KB)")
+        sys.exit(0)
+    result = check(path=args.golden, top=args.top)
+    report(result)
+    sys.exit(0 if result['ok'] else 1)
@@ -0,0 +1,169 @@
+import argparse
+import time
+from collections import OrderedDict
+import numpy as np
+from batch_engine import BatchFuzzyEngine, INPUT_NAMES, INPUT_UNIVERSE, v99_system
+from fuzzy_engine import BAND_EDGES
+from rule_loader import load_system
+from rule_stats import NO_RULE, dominant_rule
+
+# ==========================================
+# 1. SLICES (Two free inputs on a full-resolution grid, three fixed)
+# ==========================================
+# One slice = one score_batch call over points x points rows, with the
+# firing strengths kept so each cell also knows its dominant rule.
+
+SLICE_POINTS = 101  # 0, 1, ..., 100 per free axis
+SLICE_CACHE = 64    # Slices kept per explorer (~50 KB each)
+
+
+class Slice:
+    """Scores and dominant rule over (y, x) = (``y_name``, ``x_name``);
+    row j, column i is the cell at (axis[i], axis[j])."""
+
+    def __init__(self, x_name, y_name, fixed, axis, scores, dominant, rule_ids, elapsed_s):
+        self.x_name = x_name
+        self.y_name = y_name
+        self.fixed = fixed
+        self.axis = axis
+        self.scores = scores
+        self.dominant = dominant
+        self.rule_ids = rule_ids
+        self.elapsed_s = elapsed_s
+
+    def row(self, i, j):
+        """The 5 engine inputs of cell (column i, row j)."""
+        values = dict(self.fixed, **{self.x_name: self.axis[i], self.y_name: self.axis[j]})
+        return tuple(values[name] for name in INPUT_NAMES)
+
+    def regions(self):
+        """{rule_id: cell count} for every rule dominating at least one cell."""
+        ids, counts = np.unique(self.dominant[self.dominant != NO_RULE], return_counts=True)
+        return {self.rule_ids[i]: int(n) for i, n in zip(ids, counts)}
+
+    def title(self):
+        fixed = ', '.join(f"{name}={self.fixed[name]:g}" for name in INPUT_NAMES if name in self.fixed)
+        return f"{self.y_name} vs. {self.x_name} ({fixed})"
+
+
+class SliceExplorer:
+    """Computes and caches (LRU) 2-D slices of the response surface."""
+
+    def __init__(self, engine=None, points=SLICE_POINTS, cache_size=SLICE_CACHE):
+        self.engine = engine if engine is not None else BatchFuzzyEngine(load_system())
+        self.axis = np.linspace(*INPUT_UNIVERSE, points)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def slice(self, x_name, y_name, **fixed):
+        """Slice over ``x_name`` x ``y_name``; the other three inputs are
+        keyword arguments (e.g. trend=80, wick_up=10, wick_lo=90)."""
+        if x_name == y_name or {x_name, y_name} - set(INPUT_NAMES):
+            raise ValueError(f"x and y must be two different inputs of {INPUT_NAMES}")
+        missing = set(INPUT_NAMES) - {x_name, y_name} - set(fixed)
+        if missing or set(fixed) - set(INPUT_NAMES) or {x_name, y_name} & set(fixed):
+            raise ValueError(f"Fix exactly the other three inputs, got {sorted(fixed)}")
+        fixed = {name: float(value) for name, value in fixed.items()}
+        key = (x_name, y_name) + tuple(fixed[name] for name in INPUT_NAMES if name in fixed)
+        hit = self.cache.get(key)
+        if hit is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return hit
+
+        t0 = time.perf_counter()
+        n = len(self.axis)
+        y, x = np.meshgrid(self.axis, self.axis, indexing='ij')
+        values = dict(fixed, **{x_name: x.ravel(), y_name: y.ravel()})
+        scores, strength = self.engine.score_batch(*(values[name] for name in INPUT_NAMES),
+                                                   return_strengths=True)
+        result = Slice(x_name, y_name, fixed, self.axis,
+                       scores.reshape(n, n).astype(np.float32),
+                       dominant_rule(strength).reshape(n, n).astype(np.int16),
+                       self.engine.system.rule_ids, time.perf_counter() - t0)
+        self.misses += 1
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+
+# ==========================================
+# 2. RENDERING (Matplotlib, imported on first use)
+# ==========================================
+
+def plot_slice(ax, sl, colorbar=True):
+    """Score heatmap, rule-dominance region outlines (labelled with the rule
+    id) and the band edges as dashed score contours."""
+    from scipy.ndimage import distance_transform_edt
+    extent = (sl.axis[0], sl.axis[-1], sl.axis[0], sl.axis[-1])
+    image = ax.imshow(sl.scores, origin='lower', extent=extent, cmap='RdYlGn', vmin=-100, vmax=100,
+                      aspect='auto', interpolation='nearest')
+    for i in np.unique(sl.dominant):
+        region = (sl.dominant == i).astype(np.float32)
+        if i != NO_RULE:
+            ax.contour(sl.axis, sl.axis, region, levels=[0.5], colors='k', linewidths=0.8)
+        # Label at the cell deepest inside the region (its mean can fall outside)
+        depth = distance_transform_edt(np.pad(region, 1))[1:-1, 1:-1]
+        j, k = np.unravel_index(depth.argmax(), depth.shape)
+        ax.text(sl.axis[k], sl.axis[j], sl.rule_ids[i] if i != NO_RULE else '-',
+                ha='center', va='center', fontsize=8, fontweight='bold')
+    if sl.scores.min() < max(BAND_EDGES) and sl.scores.max() > min(BAND_EDGES):
+        ax.contour(sl.axis, sl.axis, sl.scores, levels=list(BAND_EDGES), colors='gray',
+                   linestyles='--', linewidths=0.8)
+    ax.set_xlabel(sl.x_name)
+    ax.set_ylabel(sl.y_name)
+    ax.set_title(sl.title(), fontsize=10)
+    if colorbar:
+        ax.figure.colorbar(image, ax=ax, label='score')
+    return image
+
+
+def export_slice(sl, path, dpi=100):
+    """Write ``sl`` as an image (.png / .svg / ...), or as arrays (.npz)."""
+    if path.endswith('.npz'):
+        np.savez_compressed(path, axis=sl.axis, scores=sl.scores, dominant=sl.dominant,
+                            rule_ids=np.array(sl.rule_ids), x_name=sl.x_name, y_name=sl.y_name,
+                            fixed=np.array([[name, value] for name, value in sl.fixed.items()]))
+        return path
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(8, 6.5), dpi=dpi)
+    FigureCanvasAgg(fig)
+    plot_slice(fig.add_subplot(111), sl)
+    fig.savefig(path)
+    return path
+
+
+# ==========================================
+# 3. HEADLESS EXPORT (CLI)
+# ==========================================
+
+def _fixed_values(pairs):
+    fixed = {}
+    for pair in pairs:
+        name, _, value = pair.partition('=')
+        fixed[name] = float(value)
+    return fixed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a 2-D score slice as a heatmap with rule-dominance contours.")
+    parser.add_argument('--x', default='h1_bear', choices=INPUT_NAMES)
+    parser.add_argument('--y', default='h1_bull', choices=INPUT_NAMES)
+    parser.add_argument('--fix', nargs='+', default=['trend=80', 'wick_up=10', 'wick_lo=90'], metavar='NAME=VALUE',
+                        help="Values of the other three inputs")
+    parser.add_argument('--out', nargs='+', default=['slice.png'], help=".png/.svg image and/or .npz arrays")
+    parser.add_argument('--v99', action='store_true', help="Hand-coded v0.99 rules instead of rules.csv")
+    args = parser.parse_args()
+
+    explorer = SliceExplorer(BatchFuzzyEngine(v99_system() if args.v99 else load_system()))
+    sl = explorer.slice(args.x, args.y, **_fixed_values(args.fix))
+    print(f"{sl.title()}: {sl.scores.size} cells in {sl.elapsed_s * 1e3:.0f} ms | "
+          f"score {sl.scores.min():.1f} .. {sl.scores.max():.1f}")
+    for rule, cells in sorted(sl.regions().items(), key=lambda kv: -kv[1]):
+        print(f"  {rule:<12} dominates {cells / sl.scores.size * 100:5.1f}%")
+    for path in args.out:
+        print(f"-> {export_slice(sl, path)}")
@@ -0,0 +1,162 @@
+import numpy as np
+from batch_engine import BatchFuzzyEngine, INPUT_NAMES, INPUT_UNIVERSE
+from stage_profiler import register_stages
+
+# ==========================================
+# 1. REUSE COUNTERS
+# ==========================================
+
+STAGES = ('memberships', 'rules', 'terms', 'clip_points')
+
+
+class ReuseStats:
+    """Per stage: units taken from the cache vs. recomputed.
+
+    memberships  one per input variable
+    rules        one per rule firing strength
+    terms        one per output term (activation + clipped curve on the grid)
+    clip_points  one per clip point (its position and every term's MF there)
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.cached_calls = 0  # No input changed: the last score is returned as is
+        self.reused = dict.fromkeys(STAGES, 0)
+        self.computed = dict.fromkeys(STAGES, 0)
+
+    def count(self, stage, computed, total):
+        self.computed[stage] += computed
+        self.reused[stage] += total - computed
+
+    def summary(self):
+        out = {'calls': self.calls, 'cached_calls': self.cached_calls}
+        for stage in STAGES:
+            total = self.reused[stage] + self.computed[stage]
+            out[f'{stage}_reused'] = self.reused[stage] / total if total else 0.0
+        return out
+
+    def report(self):
+        s = self.summary()
+        stages = ' | '.join(f"{stage} {s[f'{stage}_reused'] * 100:.1f}%" for stage in STAGES)
+        print(f"Incremental: {s['calls']} calls ({s['cached_calls']} unchanged) | reused: {stages}")
+
+
+def _trapmf_terms(x, breaks):
+    """trapmf(x, b) for every row b of ``breaks`` in one pass, shape (T, K);
+    same arithmetic per element, so the values are identical."""
+    a, b, c, d = (col[:, None] for col in breaks.T)
+    x = np.asarray(x, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        up = np.where(b > a, (x - a) / (b - a), np.where(x < a, 0.0, 1.0))
+        down = np.where(d > c, (d - x) / (d - c), np.where(x > d, 0.0, 1.0))
+    return np.clip(np.minimum(np.minimum(up, 1.0), down), 0.0, 1.0)
+
+
+# ==========================================
+# 2. STATEFUL EVALUATOR (Single input row, recomputes only what changed)
+# ==========================================
+
+class IncrementalEvaluator:
+    """Scores one input row at a time, keeping every intermediate result.
+
+    Dependencies follow the Mamdani pipeline: an input's memberships feed
+    only the rules that constrain it, a rule feeds only its consequent
+    term, and a term's activation moves only its clipped curve and its two
+    clip points. A call recomputes exactly the pieces whose inputs changed
+    and leaves the rest cached, so the score is bit-for-bit what
+    ``engine.score()`` returns for the same row.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine if engine is not None else BatchFuzzyEngine()
+        self.stats = ReuseStats()
+        system = self.engine.system
+        self._rule_terms = system.rule_terms
+        self._rules_by_output = self.engine._rules_by_output
+        self._breaks = system.output_breaks
+        n_terms = len(system.output_labels)
+        # Rules reading each input, and their term index on it
+        self._readers = [np.flatnonzero(terms >= 0) for terms in self._rule_terms.T]
+        self._x = np.full(len(INPUT_NAMES), np.nan)
+        # NaN, not 1: every membership of the first row must count as moved,
+        # or rules fully true on it would keep their initial strength of 0
+        self._mu = [np.full((1, len(b) + 1), np.nan) for b in system.input_breaks]
+        self._strength = np.zeros(system.n_rules)
+        self._act = np.zeros(n_terms)
+        self._clipped = np.zeros((n_terms, len(system.universe)))  # min(act_t, mf_t) on the grid
+        self._clip_x = np.concatenate([self._breaks[:, 0], self._breaks[:, 3]])
+        self._clip_mf = _trapmf_terms(self._clip_x, self._breaks)  # mf_u at clip point p
+        self._score = 0.0
+
+    def reset(self):
+        self.__init__(self.engine)
+
+    def evaluate(self, trend, wick_up, wick_lo, h1_bear, h1_bull):
+        self.stats.calls += 1
+        lo, hi = INPUT_UNIVERSE
+        x = np.clip(np.array([trend, wick_up, wick_lo, h1_bear, h1_bull], dtype=np.float64), lo, hi)
+        changed = np.flatnonzero(x != self._x)
+        self.stats.count('memberships', len(changed), len(x))
+        if not len(changed):
+            self.stats.cached_calls += 1
+            return self._score
+        self._x[changed] = x[changed]
+
+        # Memberships -> rules that read a term whose membership moved
+        dirty = []
+        for i in changed:
+            breaks = self.engine.system.input_breaks[i]
+            mu = np.ones((1, len(breaks) + 1))
+            mu[0, :-1] = _trapmf_terms(x[i], breaks)[:, 0]
+            moved = mu[0] != self._mu[i][0]
+            self._mu[i] = mu
+            readers = self._readers[i]
+            dirty.append(readers[moved[self._rule_terms[readers, i]]])
+        rules = np.unique(np.concatenate(dirty))
+        self.stats.count('rules', len(rules), len(self._strength))
+
+        # Rules -> consequent terms whose max moved
+        new = BatchFuzzyEngine._min_over_inputs(self._mu, self._rule_terms[rules])[0]
+        moved = new != self._strength[rules]
+        rules = rules[moved]
+        self._strength[rules] = new[moved]
+        terms = [t for t in np.unique(self.engine.system.rule_output[rules])
+                 if self._strength[self._rules_by_output[t]].max() != self._act[t]]
+        self.stats.count('terms', len(terms), len(self._act))
+        self.stats.count('clip_points', 2 * len(terms), len(self._clip_x))
+        if not terms:
+            return self._score
+
+        # Terms -> clipped curves and clip points of those terms only
+        for t in terms:
+            self._act[t] = self._strength[self._rules_by_output[t]].max()
+            np.minimum(self._act[t], self.engine.output_mfs[t], out=self._clipped[t])
+        terms = np.array(terms)
+        act, b = self._act[terms], self._breaks[terms]
+        points = np.concatenate([terms, terms + len(self._act)])
+        self._clip_x[points] = np.concatenate([b[:, 0] + act * (b[:, 1] - b[:, 0]),
+                                               b[:, 3] - act * (b[:, 3] - b[:, 2])])
+        self._clip_mf[:, points] = _trapmf_terms(self._clip_x[points], self._breaks)
+        self._score = self._defuzzify()
+        return self._score
+
+    def aggregate(self):
+        """Aggregated output MF of the last row on the universe grid."""
+        return self._clipped.max(axis=0)
+
+    def _defuzzify(self):
+        if not self._act.any():
+            return 0.0
+        if self.engine.defuzz == 'analytic':
+            return float(self.engine.defuzzify(self._act[None])[0])
+        agg = self._clipped.max(axis=0)
+        order = np.argsort(self._clip_x, kind='stable')
+        py = np.minimum(self._act[:, None], self._clip_mf).max(axis=0)
+        area, moment = self.engine.polyline_integral(agg[None], self._clip_x[None, order], py[None, order])
+        return float(moment[0] / area[0]) if area[0] > 0 else 0.0
+
+
+register_stages(IncrementalEvaluator, 'evaluate', '_defuzzify')
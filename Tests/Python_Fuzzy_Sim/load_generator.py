@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+from scoring_server import DEFAULT_HOST, DEFAULT_PORT
+
+# ==========================================
+# 1. CLOSED-LOOP CLIENTS (Each sends, waits for the reply, sends again)
+# ==========================================
+# Stand-in for N consumers (EA instances, scanner workers, GUI) hitting one
+# daemon at once. Latency is measured on the client, from write to reply.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+async def _client(reader, writer, rows, latencies, server_latencies, batches):
+    for k, row in enumerate(rows):
+        t0 = time.perf_counter()
+        writer.write((json.dumps({'id': k, 'inputs': row}) + '\n').encode())
+        reply = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - t0)
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        server_latencies.append(reply['latency_us'])
+        batches.append(reply['batch'])
+
+
+async def _connect(host, port, unix_path):
+    if unix_path:
+        return await asyncio.open_unix_connection(unix_path)
+    return await asyncio.open_connection(host, port)
+
+
+async def run_load(clients=64, requests=200, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, seed=0):
+    """Throughput and latency percentiles for ``clients`` concurrent
+    connections sending ``requests`` single-row requests each."""
+    rng = np.random.default_rng(seed)
+    connections = [await _connect(host, port, unix_path) for _ in range(clients)]
+    latencies, server_latencies, batches = [], [], []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_client(r, w, rng.uniform(0, 100, (requests, 5)).tolist(),
+                                   latencies, server_latencies, batches)
+                           for r, w in connections))
+    elapsed = time.perf_counter() - t0
+    for _, writer in connections:
+        writer.close()
+    ms = np.asarray(latencies) * 1e3
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'elapsed_s': elapsed,
+        'throughput_per_s': len(latencies) / elapsed,
+        'latency_p50_ms': float(np.percentile(ms, 50)),
+        'latency_p99_ms': float(np.percentile(ms, 99)),
+        'latency_max_ms': float(ms.max()),
+        'server_latency_p99_ms': float(np.percentile(server_latencies, 99)) / 1e3,
+        'mean_batch': float(np.mean(batches)),
+    }
+
+
+def report(results):
+    print(f"{'CLIENTS':>7} | {'REQ/S':>9} | {'P50 MS':>7} | {'P99 MS':>7} | {'MAX MS':>7} | "
+          f"{'SERVER P99':>10} | {'BATCH':>6}")
+    print("-" * 72)
+    for r in results:
+        print(f"{r['clients']:>7} | {r['throughput_per_s']:9.0f} | {r['latency_p50_ms']:7.2f} | "
+              f"{r['latency_p99_ms']:7.2f} | {r['latency_max_ms']:7.2f} | {r['server_latency_p99_ms']:10.2f} | "
+              f"{r['mean_batch']:6.1f}")
+
+
+# ==========================================
+# 2. CLI (Optionally spawns its own server)
+# ==========================================
+
+def _spawn_server(args):
+    cmd = [sys.executable, os.path.join(HERE, 'scoring_server.py'), '--window-ms', str(args.window_ms)]
+    cmd += ['--unix', args.unix] if args.unix else ['--host', args.host, '--port', str(args.port)]
+    proc = subprocess.Popen(cmd, cwd=HERE, stderr=subprocess.PIPE, text=True)
+    proc.stderr.readline()  # "Scoring on ..." once it is listening
+    return proc
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent load against scoring_server.py.")
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 64, 256],
+                        help="Concurrency levels to run one after the other")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per client")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', metavar='PATH')
+    parser.add_argument('--spawn', action='store_true', help="Start a server for the run and stop it after")
+    parser.add_argument('--window-ms', type=float, default=1.0, help="Batching window of the spawned server")
+    parser.add_argument('--json', metavar='OUT', help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    proc = _spawn_server(args) if args.spawn else None
+    try:
+        results = [asyncio.run(run_load(n, args.requests, args.host, args.port, args.unix))
+                   for n in args.clients]
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import argparse
+import csv
+import os
+import sys
+import time
+import numpy as np
+from multiprocessing import Pool
+from scipy.optimize import differential_evolution, minimize
+from batch_engine import CompiledSystem, INPUT_NAMES, INPUT_UNIVERSE, _segments
+from rule_loader import OUTPUT_VARIABLE, SPEC_VARIABLES, SPECS_CSV, load_system, read_targets
+
+# ==========================================
+# 1. CANONICAL CASES (One per CONFIRMED rule, target = its Target_Score)
+# ==========================================
+# Constrained inputs sit on the GUI's nominal level for the term; IGNORE
+# inputs are NONE, i.e. the textbook situation each rule was written for.
+
+NOMINAL = {'BEARISH': 20, 'SIDEWAYS': 50, 'BULLISH': 80, 'NONE': 10, 'WEAK': 50, 'STRONG': 90}
+
+
+def canonical_cases(system, targets):
+    """(inputs (N, 5), targets (N,), rule_ids) for the rules that have a target."""
+    rows, goal, ids = [], [], []
+    for rule_id, antecedent, _ in system.rule_definitions():
+        if rule_id in targets:
+            rows.append([NOMINAL[antecedent.get(name, 'NONE')] for name in INPUT_NAMES])
+            goal.append(targets[rule_id])
+            ids.append(rule_id)
+    return np.array(rows, dtype=np.float64), np.array(goal), ids
+
+
+# ==========================================
+# 2. SEARCH SPACE (Free breakpoints; each term is re-sorted so a <= b <= c <= d)
+# ==========================================
+
+class ShapeSpace:
+    """Output term breakpoints (and optionally input ones) as a flat vector.
+
+    Breakpoints on the edge of their universe (shoulders such as
+    CLEARLY_UP's 100, 100 or NONE's 0, 0) stay fixed.
+    """
+
+    def __init__(self, system, inputs=False):
+        self.system = system
+        self.inputs = inputs
+        lo, hi = system.universe[0], system.universe[-1]
+        self._out_free = (system.output_breaks > lo) & (system.output_breaks < hi)
+        self._in_free = [(b > INPUT_UNIVERSE[0]) & (b < INPUT_UNIVERSE[1]) & inputs for b in system.input_breaks]
+        self.x0 = np.concatenate([system.output_breaks[self._out_free]] +
+                                 [b[free] for b, free in zip(system.input_breaks, self._in_free)])
+        n_out = int(self._out_free.sum())
+        self.bounds = [(lo, hi)] * n_out + [INPUT_UNIVERSE] * (len(self.x0) - n_out)
+
+    def breaks(self, X):
+        """Candidate rows (C, D) -> (input breaks [(C, terms, 4)] per input, output breaks (C, T, 4))."""
+        X = np.atleast_2d(X)
+        n = len(X)
+        out = np.broadcast_to(self.system.output_breaks, (n,) + self.system.output_breaks.shape).copy()
+        k = int(self._out_free.sum())
+        out[:, self._out_free] = X[:, :k]
+        inputs = []
+        for b, free in zip(self.system.input_breaks, self._in_free):
+            cand = np.broadcast_to(b, (n,) + b.shape).copy()
+            m = int(free.sum())
+            cand[:, free] = X[:, k:k + m]
+            k += m
+            inputs.append(np.sort(cand, axis=2))
+        return inputs, np.sort(out, axis=2)
+
+    def to_system(self, x):
+        inputs, out = self.breaks(x)
+        s = self.system
+        return CompiledSystem(s.input_labels, [b[0] for b in inputs], s.output_labels, out[0],
+                              s.rule_ids, s.rule_terms, s.rule_output, s.universe)
+
+
+# ==========================================
+# 3. BATCHED EVALUATION (All candidates x all cases in one array pass)
+# ==========================================
+
+def _trapmf(x, b):
+    """batch_engine.trapmf with per-row breakpoints: x (..., K), b (..., 4).
+
+    A vertical edge gets an infinite slope: +-inf either side of it and NaN
+    exactly on it, which fmin skips, so x == a == b still scores 1.
+    """
+    a, b_, c, d = (b[..., i, None] for i in range(4))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = np.fmin((x - a) * (1.0 / (b_ - a)), (d - x) * (1.0 / (d - c)))
+        np.fmin(y, 1.0, out=y)
+    return np.maximum(y, 0.0, out=y)
+
+
+def evaluate(space, X, cases):
+    """Scores (C, N) of every candidate row of ``X`` on every case.
+
+    Same semantics as BatchFuzzyEngine(defuzz='discrete'): min AND, max
+    accumulation, centroid of the polyline through the universe grid plus
+    every clip point (exact skfuzzy behaviour), 0 where no rule fires.
+    """
+    s = space.system
+    in_breaks, out_breaks = space.breaks(X)
+    n_cand, n_case = len(out_breaks), len(cases)
+    lo, hi = INPUT_UNIVERSE
+
+    # Fuzzify + AND: strength (C, N, R)
+    strength = None
+    for i, x in enumerate(np.clip(cases, lo, hi).T):
+        mu = _trapmf(x, in_breaks[i])  # (C, terms, N)
+        mu = np.concatenate([mu, np.ones((n_cand, 1, n_case))], axis=1)  # Index -1 = unconstrained
+        picked = mu[:, s.rule_terms[:, i], :]
+        strength = picked if strength is None else np.minimum(strength, picked)
+    strength = strength.transpose(0, 2, 1)
+
+    # OR per consequent term: act (C, N, T)
+    act = np.zeros((n_cand, n_case, len(s.output_labels)))
+    for t in range(len(s.output_labels)):
+        idx = np.flatnonzero(s.rule_output == t)
+        if len(idx):
+            act[:, :, t] = strength[:, :, idx].max(axis=2)
+
+    # Aggregate on the grid: term MFs sampled once per candidate (C, T, G)
+    grid_mfs = _trapmf(s.universe, out_breaks)
+    grid_y = np.zeros((n_cand, n_case, len(s.universe)))
+    for t in range(len(s.output_labels)):
+        np.maximum(grid_y, np.minimum(act[..., t, None], grid_mfs[:, None, t, :]), out=grid_y)
+
+    # ... and at the clip points of every term (C, N, 2T)
+    ob = out_breaks[:, None, :, :]
+    clip_x = np.concatenate([ob[..., 0] + act * (ob[..., 1] - ob[..., 0]),
+                             ob[..., 3] - act * (ob[..., 3] - ob[..., 2])], axis=2)
+    clip_y = np.zeros_like(clip_x)
+    for t in range(len(s.output_labels)):
+        np.maximum(clip_y, np.minimum(act[..., t, None], _trapmf(clip_x, ob[:, :, t, :])), out=clip_y)
+
+    # Merge both into one polyline per (candidate, case) and integrate it
+    px = np.concatenate([np.broadcast_to(s.universe, grid_y.shape), clip_x], axis=2)
+    order = np.argsort(px, axis=2, kind='stable')
+    px = np.take_along_axis(px, order, axis=2)
+    py = np.take_along_axis(np.concatenate([grid_y, clip_y], axis=2), order, axis=2)
+    area, moment = _segments(px[..., :-1], py[..., :-1], px[..., 1:], py[..., 1:])
+    area, moment = area.sum(axis=2), moment.sum(axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(area > 0, moment / np.where(area > 0, area, 1.0), 0.0)
+
+
+def rmse(scores, targets):
+    return np.sqrt(np.mean((scores - targets) ** 2, axis=-1))
+
+
+# ==========================================
+# 4. OPTIMIZER (scipy differential evolution, population scored in bulk)
+# ==========================================
+
+CANDIDATE_CHUNK = 64  # Candidates per array pass (~3 MB per temporary at 24 cases)
+
+_worker = {}
+
+
+def _init_worker(space, cases, targets):
+    _worker.update(space=space, cases=cases, targets=targets)
+
+
+def _loss_chunk(X):
+    return rmse(evaluate(_worker['space'], X, _worker['cases']), _worker['targets'])
+
+
+class Objective:
+    """RMSE vs. Target_Score for a population; vectorized for scipy
+    (called with shape (D, S)) and split across a process pool."""
+
+    def __init__(self, space, cases, targets, workers=1):
+        self.space, self.cases, self.targets = space, cases, targets
+        self.evaluations = 0
+        self.seconds = 0.0
+        _init_worker(space, cases, targets)
+        self.pool = None
+        if workers > 1:
+            self.pool = Pool(workers, initializer=_init_worker, initargs=(space, cases, targets))
+
+    def __call__(self, x):
+        X = np.asarray(x, dtype=np.float64)
+        single = X.ndim == 1
+        X = X[None, :] if single else X.T
+        t0 = time.perf_counter()
+        chunks = [X[i:i + CANDIDATE_CHUNK] for i in range(0, len(X), CANDIDATE_CHUNK)]
+        mapper = self.pool.map if self.pool else map
+        losses = np.concatenate(list(mapper(_loss_chunk, chunks)))
+        self.seconds += time.perf_counter() - t0
+        self.evaluations += len(X) * len(self.cases)
+        return float(losses[0]) if single else losses
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+
+
+def optimize(system=None, targets=None, inputs=False, workers=1, maxiter=200, popsize=32, seed=0,
+             polish=True, progress=False):
+    """Tune ``system`` breakpoints towards the targets.
+
+    Returns (tuned CompiledSystem, info dict with losses, per-case scores
+    and evaluation throughput).
+    """
+    system = system if system is not None else load_system()
+    targets = targets if targets is not None else read_targets()
+    cases, goal, ids = canonical_cases(system, targets)
+    space = ShapeSpace(system, inputs)
+    objective = Objective(space, cases, goal, workers)
+    try:
+        loss0 = objective(space.x0)
+        callback = None
+        if progress:
+            def callback(intermediate_result):
+                print(f"\r  loss {intermediate_result.fun:8.3f}  ({objective.evaluations / objective.seconds / 1e3:.0f} k "
+                      f"case evals/s)", end='', file=sys.stderr)
+        result = differential_evolution(objective, space.bounds, maxiter=maxiter, popsize=popsize, seed=seed,
+                                        vectorized=True, updating='deferred', polish=False, x0=space.x0,
+                                        callback=callback, tol=1e-6)
+        x = result.x
+        if polish:
+            x = minimize(objective, x, method='Nelder-Mead', bounds=space.bounds,
+                         options={'maxfev': 4000, 'xatol': 1e-3, 'fatol': 1e-4}).x
+        if progress:
+            print(file=sys.stderr)
+    finally:
+        objective.close()
+
+    tuned = space.to_system(x)
+    before, after = evaluate(space, space.x0, cases)[0], evaluate(space, x, cases)[0]
+    return tuned, {
+        'rule_ids': ids, 'targets': goal, 'before': before, 'after': after,
+        'loss_before': loss0, 'loss_after': float(rmse(after, goal)),
+        'evaluations': objective.evaluations, 'evals_per_s': objective.evaluations / objective.seconds,
+    }
+
+
+def write_specs(system, out_path, specs_path=SPECS_CSV, decimals=1):
+    """Copy ``specs_path`` with the breakpoints of ``system`` (rounded)."""
+    names = {v: k for k, v in SPEC_VARIABLES.items()}
+    breaks = {(OUTPUT_VARIABLE, label): b for label, b in zip(system.output_labels, system.output_breaks)}
+    for name, labels, bs in zip(INPUT_NAMES, system.input_labels, system.input_breaks):
+        breaks.update({(names[name], label): b for label, b in zip(labels, bs)})
+    with open(specs_path, newline='') as f:
+        reader = csv.DictReader(f)
+        fields, rows = reader.fieldnames, list(reader)
+    for row in rows:
+        b = breaks.get((row['Variable'], row['Term_Label']))
+        if b is not None:
+            for key, value in zip(('Point_A', 'Point_B', 'Point_C', 'Point_D'), np.round(b, decimals)):
+                row[key] = np.format_float_positional(value, trim="-")
+    with open(out_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def report(system, info):
+    print(f"{'RULE':<11} | {'TARGET':>6} | {'BEFORE':>7} | {'AFTER':>7}")
+    print("-" * 40)
+    for rule_id, goal, b, a in zip(info['rule_ids'], info['targets'], info['before'], info['after']):
+        print(f"{rule_id:<11} | {goal:6.0f} | {b:7.2f} | {a:7.2f}")
+    print(f"\nRMSE: {info['loss_before']:.3f} -> {info['loss_after']:.3f} | "
+          f"{info['evaluations']} case evaluations at {info['evals_per_s'] / 1e3:.0f} k/s")
+    print("\nOutput terms:")
+    for label, b in zip(system.output_labels, system.output_breaks):
+        print(f"  {label:<14} {np.round(b, 1).tolist()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit MF breakpoints to the Target_Score column of rules.csv.")
+    parser.add_argument('--inputs', action='store_true', help="Also tune input MF shoulders")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--maxiter', type=int, default=200)
+    parser.add_argument('--popsize', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-polish', action='store_true')
+    parser.add_argument('--write-specs', metavar='CSV', help="Write a tuned copy of fuzzy_logic_specs.csv")
+    args = parser.parse_args()
+
+    tuned, info = optimize(inputs=args.inputs, workers=args.workers, maxiter=args.maxiter, popsize=args.popsize,
+                           seed=args.seed, polish=not args.no_polish, progress=True)
+    report(tuned, info)
+    if args.write_specs:
+        write_specs(tuned, args.write_specs)
+        print(f"\nSpecs -> {args.write_specs}")
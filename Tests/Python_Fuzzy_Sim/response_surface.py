@@ -0,0 +1,230 @@
+import contextlib
+import json
+import os
+import time
+import numpy as np
+from numpy.lib.format import open_memmap
+from batch_engine import BatchFuzzyEngine, INPUT_NAMES, INPUT_UNIVERSE
+from rule_loader import CACHE_DIR, load_system
+
+# ==========================================
+# 1. GRID
+# ==========================================
+
+DEFAULT_STEP = 5.0
+
+
+def grid_axes(step=DEFAULT_STEP):
+    """One axis per input over the 0-100 scale. ``step`` is a scalar or one
+    value per input; it is rounded so each axis ends exactly on 100."""
+    steps = np.broadcast_to(np.asarray(step, dtype=np.float64), (len(INPUT_NAMES),))
+    lo, hi = INPUT_UNIVERSE
+    return [np.linspace(lo, hi, int(round((hi - lo) / s)) + 1) for s in steps]
+
+
+def _grid_key(axes):
+    return 'x'.join(str(len(a)) for a in axes)
+
+
+def critical_values(system, axes, offsets=(-1e-6, 1e-6)):
+    """Per input: its MF breakpoints, the points ``offsets`` either side
+    of them and the midpoints of ``axes``' cells. A membership kink (or the
+    jump to 0 where the last rule stops firing) inside a cell is where
+    interpolation, or any approximation of the engine, errs most."""
+    values = []
+    for breaks, axis in zip(system.input_breaks, axes):
+        breaks = np.unique(np.asarray(breaks, dtype=np.float64))
+        points = [breaks] + [breaks + o for o in offsets] + [(axis[1:] + axis[:-1]) / 2]
+        values.append(np.unique(np.clip(np.concatenate(points), *INPUT_UNIVERSE)))
+    return values
+
+
+# ==========================================
+# 2. SURFACE (float32 table + multilinear interpolation)
+# ==========================================
+
+class ResponseSurface:
+    def __init__(self, table, axes, errors=None):
+        self.table = table
+        self.axes = axes
+        self.errors = errors or {}
+        self._flat = table.reshape(-1)
+        self._n = np.array([len(a) for a in axes])
+        self._strides = np.array([int(np.prod(self._n[d + 1:])) for d in range(len(axes))])
+
+    @property
+    def max_error(self):
+        return self.errors.get('max')
+
+    @classmethod
+    def build(cls, engine, step=DEFAULT_STEP, path=None):
+        """Evaluate ``engine`` on the full grid, one trend slice at a time.
+        With ``path`` the table is written straight into a .npy memmap."""
+        axes = grid_axes(step)
+        shape = tuple(len(a) for a in axes)
+        if path is None:
+            table = np.empty(shape, dtype=np.float32)
+        else:
+            table = open_memmap(path, mode='w+', dtype=np.float32, shape=shape)
+
+        rest = np.meshgrid(*axes[1:], indexing='ij')
+        rest = [r.ravel() for r in rest]
+        for i, trend in enumerate(axes[0]):
+            table[i] = engine.score_batch(trend, *rest).reshape(shape[1:])
+        if path is not None:
+            table.flush()
+        return cls(table, axes)
+
+    @classmethod
+    def open(cls, path):
+        """Memory-mapped, read-only: processes opening the same file share
+        one copy through the OS page cache."""
+        with open(path + '.json') as f:
+            meta = json.load(f)
+        table = np.load(path, mmap_mode='r')
+        axes = [np.linspace(*INPUT_UNIVERSE, n) for n in meta['shape']]
+        return cls(table, axes, meta.get('errors'))
+
+    def query(self, trend, wick_up, wick_lo, h1_bear, h1_bull, with_error=False):
+        """Multilinear interpolation of the table. With ``with_error`` also
+        returns the max |surface - engine| measured for this table (see
+        measure_error)."""
+        lo, hi = INPUT_UNIVERSE
+        inputs = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=np.float64))
+                                       for v in (trend, wick_up, wick_lo, h1_bear, h1_bull)])
+        base = np.zeros(inputs[0].shape, dtype=np.int64)
+        frac = []
+        for d, x in enumerate(inputs):
+            u = (np.clip(x, lo, hi) - lo) / (hi - lo) * (self._n[d] - 1)
+            i = np.minimum(u.astype(np.int64), self._n[d] - 2)
+            base += i * self._strides[d]
+            frac.append(u - i)
+
+        out = np.zeros(base.shape)
+        for corner in range(1 << len(inputs)):
+            offset, weight = 0, 1.0
+            for d, f in enumerate(frac):
+                if corner >> d & 1:
+                    offset += self._strides[d]
+                    weight = weight * f
+                else:
+                    weight = weight * (1.0 - f)
+            out += weight * self._flat[base + offset]
+        if with_error:
+            return out, self.max_error
+        return out
+
+    def critical_values(self, system, offsets=(-1e-6, 1e-6)):
+        """critical_values() on this table's grid."""
+        return critical_values(system, self.axes, offsets)
+
+    def measure_error(self, engine, n_samples=200000, seed=0):
+        """Compare against ``engine`` at ``n_samples`` uniform off-grid
+        points, plus a quarter as many random combinations of
+        critical_values() that only feed the max.
+
+        The controller jumps to 0 where the last rule stops firing, so cells
+        straddling that edge dominate the max error whatever the step; p99,
+        mean and the share of rows within 1 point (over the uniform points)
+        are stored alongside. The max is a sampled estimate, not a guarantee.
+        """
+        rng = np.random.default_rng(seed)
+        rows = rng.uniform(*INPUT_UNIVERSE, (len(INPUT_NAMES), n_samples))
+        err = np.abs(self.query(*rows) - engine.score_batch(*rows))
+        critical = np.stack([rng.choice(v, n_samples // 4) for v in self.critical_values(engine.system)])
+        critical_err = np.abs(self.query(*critical) - engine.score_batch(*critical))
+        self.errors = {
+            'max': float(max(err.max(), critical_err.max(initial=0.0))),
+            'p99': float(np.percentile(err, 99)),
+            'mean': float(err.mean()),
+            'within_1': float(np.mean(err <= 1.0)),
+            'samples': n_samples,
+        }
+        return self.errors
+
+
+# ==========================================
+# 3. DISK CACHE (Keyed by system fingerprint + grid + defuzz mode)
+# ==========================================
+# The fingerprint says nothing about which rule files a table came from, so
+# instead of guessing which tables are stale the cache keeps the
+# SURFACE_CACHE_ENTRIES most recently used ones (a hit refreshes the
+# mtime). Alternating systems (v0.99, rules.csv, a candidate) all stay warm.
+
+SURFACE_CACHE_ENTRIES = 4
+
+def surface_path(system, step=DEFAULT_STEP, defuzz='discrete', cache_dir=CACHE_DIR):
+    name = f"surface_{system.fingerprint()}_{defuzz}_{_grid_key(grid_axes(step))}.npy"
+    return os.path.join(cache_dir, name)
+
+
+def _evict(cache_dir):
+    """Delete all but the SURFACE_CACHE_ENTRIES most recently used tables
+    (and their sidecars)."""
+    tables = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+              if name.startswith('surface_') and name.endswith('.npy') and '.tmp' not in name]
+    tables.sort(key=os.path.getmtime, reverse=True)
+    for table in tables[SURFACE_CACHE_ENTRIES:]:
+        for path in (table + '.json', table):  # Sidecar first: a table without one is never trusted
+            try:
+                os.remove(path)
+            except OSError:  # Still mapped by another process (Windows); next build retries
+                pass
+
+
+def load_surface(system=None, step=DEFAULT_STEP, defuzz='discrete', cache_dir=CACHE_DIR, rebuild=False):
+    """Shared response surface for ``system`` (rules.csv by default). A
+    rules or MF edit changes the fingerprint, so an old table is never
+    reused; building a new one evicts the least recently used tables
+    beyond SURFACE_CACHE_ENTRIES."""
+    system = system if system is not None else load_system()
+    path = surface_path(system, step, defuzz, cache_dir)
+    if not rebuild and os.path.exists(path) and os.path.exists(path + '.json'):
+        with contextlib.suppress(OSError):
+            os.utime(path)  # Most recently used
+        return ResponseSurface.open(path)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    engine = BatchFuzzyEngine(system, defuzz=defuzz)
+    tmp = f"{path}.{os.getpid()}.tmp.npy"
+    surface = ResponseSurface.build(engine, step, tmp)
+    errors = surface.measure_error(engine)
+    del surface
+    with open(tmp + '.json', 'w') as f:
+        json.dump({'shape': [len(a) for a in grid_axes(step)], 'defuzz': defuzz,
+                   'fingerprint': system.fingerprint(), 'errors': errors}, f, indent=2)
+    # Table first, then its metadata: a reader only trusts a table once the
+    # .json exists, so it never sees a half-written pair
+    os.replace(tmp, path)
+    os.replace(tmp + '.json', path + '.json')
+
+    _evict(cache_dir)
+    return ResponseSurface.open(path)
+
+
+def report(step=DEFAULT_STEP, n_rows=1000000):
+    system = load_system()
+    t0 = time.perf_counter()
+    surface = load_surface(system, step, rebuild=True)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    surface = load_surface(system, step)
+    t_open = time.perf_counter() - t0
+
+    rows = np.random.default_rng(1).uniform(0, 100, (n_rows, len(INPUT_NAMES)))
+    t0 = time.perf_counter()
+    surface.query(*rows.T)
+    t_query = time.perf_counter() - t0
+
+    e = surface.errors
+    print(f"Grid: {surface.table.shape} ({surface.table.nbytes / 1e6:.1f} MB float32) | {surface_path(system, step)}")
+    print(f"Build: {t_build:.2f} s | Open (mmap): {t_open * 1000:.2f} ms")
+    print(f"Query: {t_query / n_rows * 1e6:.3f} us/row over {n_rows} rows")
+    print(f"Interpolation error vs engine ({e['samples']} samples): "
+          f"max {e['max']:.3f}  p99 {e['p99']:.3f}  mean {e['mean']:.4f}  "
+          f"within 1.0: {e['within_1'] * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    report()
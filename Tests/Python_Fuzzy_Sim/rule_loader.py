@@ -0,0 +1,161 @@
+import csv
+import hashlib
+import os
+import time
+from batch_engine import CompiledSystem, INPUT_NAMES, OUTPUT_UNIVERSE
+
+# ==========================================
+# 1. SOURCES (Documentation/*.csv are the Source of Truth)
+# ==========================================
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DOC_DIR = os.path.normpath(os.path.join(HERE, '..', '..', 'Documentation'))
+RULES_CSV = os.path.join(DOC_DIR, 'rules.csv')
+SPECS_CSV = os.path.join(DOC_DIR, 'fuzzy_logic_specs.csv')
+CACHE_DIR = os.path.join(HERE, '.cache')
+
+# Bump when the compiled layout changes so stale caches are not picked up
+CACHE_FORMAT = 1
+
+# MQL5 variable names (Definitions.mqh) -> simulator input names
+SPEC_VARIABLES = {
+    'Trend': 'trend',
+    'Daily_Upper_Wick': 'wick_up',
+    'Daily_Lower_Wick': 'wick_lo',
+    'H1_Bear_Break': 'h1_bear',
+    'H1_Bull_Break': 'h1_bull',
+}
+OUTPUT_VARIABLE = 'Trend_Reversal'
+
+RULE_COLUMNS = {
+    'Condition_Trend': 'trend',
+    'Condition_Daily_Upper_Wick': 'wick_up',
+    'Condition_Daily_Lower_Wick': 'wick_lo',
+    'Condition_H1_Bear_Break': 'h1_bear',
+    'Condition_H1_Bull_Break': 'h1_bull',
+}
+RESULT_COLUMN = 'Result_Trend_Reversal'
+TARGET_COLUMN = 'Target_Score'
+IGNORE = 'IGNORE'
+CONFIRMED = 'CONFIRMED'
+
+
+def read_specs(path=SPECS_CSV):
+    """Membership functions -> ({input: {term: abcd}}, {output_term: abcd})."""
+    input_terms = {name: {} for name in INPUT_NAMES}
+    output_terms = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            variable = row['Variable']
+            if not variable:
+                continue  # Blank separator row
+            if row['Shape_Type'] != 'Trapezoid':
+                raise ValueError(f"{path}: unsupported shape {row['Shape_Type']} for {variable}.{row['Term_Label']}")
+            abcd = tuple(float(row[k]) for k in ('Point_A', 'Point_B', 'Point_C', 'Point_D'))
+            if variable == OUTPUT_VARIABLE:
+                output_terms[row['Term_Label']] = abcd
+            elif variable in SPEC_VARIABLES:
+                input_terms[SPEC_VARIABLES[variable]][row['Term_Label']] = abcd
+            else:
+                raise ValueError(f"{path}: unknown variable {variable}")
+    return input_terms, output_terms
+
+
+def read_rules(path=RULES_CSV):
+    """CONFIRMED rows -> [(rule_id, {input: term}, output_term)]. IGNORE = unconstrained."""
+    rules = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            if row['Status'].strip() != CONFIRMED:
+                continue
+            antecedent = {name: row[col].strip() for col, name in RULE_COLUMNS.items()
+                          if row[col].strip() != IGNORE}
+            rules.append((row['ID'].strip(), antecedent, row[RESULT_COLUMN].strip()))
+    return rules
+
+
+def read_targets(path=RULES_CSV):
+    """{rule_id: Target_Score} for the CONFIRMED rows that have one."""
+    with open(path, newline='') as f:
+        return {row['ID'].strip(): float(row[TARGET_COLUMN]) for row in csv.DictReader(f)
+                if row['Status'].strip() == CONFIRMED and row[TARGET_COLUMN].strip()}
+
+
+def compile_system(rules_path=RULES_CSV, specs_path=SPECS_CSV):
+    input_terms, output_terms = read_specs(specs_path)
+    rules = read_rules(rules_path)
+    for rule_id, antecedent, consequent in rules:
+        for name, term in antecedent.items():
+            if term not in input_terms[name]:
+                raise ValueError(f"Rule {rule_id}: {name} has no term {term} in {specs_path}")
+        if consequent not in output_terms:
+            raise ValueError(f"Rule {rule_id}: output has no term {consequent} in {specs_path}")
+    return CompiledSystem.from_definitions(input_terms, output_terms, rules, OUTPUT_UNIVERSE)
+
+
+# ==========================================
+# 2. DISK CACHE (Keyed by the CSV paths + a hash of their contents)
+# ==========================================
+# system_<source>_<digest>.npz: <source> names the CSV pair, <digest> its
+# contents. A rebuild prunes only older digests of the same pair, so caches
+# of other rule files (optimizer candidates, test copies) are left alone.
+
+def source_digest(rules_path=RULES_CSV, specs_path=SPECS_CSV):
+    h = hashlib.sha256(f"format={CACHE_FORMAT}".encode())
+    for path in (rules_path, specs_path):
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def _source_key(rules_path, specs_path):
+    paths = '\n'.join(os.path.normcase(os.path.abspath(p)) for p in (rules_path, specs_path))
+    return hashlib.sha256(paths.encode()).hexdigest()[:8]
+
+
+def cache_path(rules_path=RULES_CSV, specs_path=SPECS_CSV, cache_dir=CACHE_DIR):
+    name = f"system_{_source_key(rules_path, specs_path)}_{source_digest(rules_path, specs_path)}.npz"
+    return os.path.join(cache_dir, name)
+
+
+def load_system(rules_path=RULES_CSV, specs_path=SPECS_CSV, cache_dir=CACHE_DIR, rebuild=False):
+    """Compiled system for the CSVs, read from the cache when it is up to date."""
+    path = cache_path(rules_path, specs_path, cache_dir)
+    if not rebuild and os.path.exists(path):
+        return CompiledSystem.load(path)
+
+    system = compile_system(rules_path, specs_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npz"  # np.savez insists on a .npz suffix
+    system.save(tmp)
+    os.replace(tmp, path)  # Atomic, so concurrent workers never read half a file
+    prefix = f"system_{_source_key(rules_path, specs_path)}_"
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and '.tmp' not in name and name != os.path.basename(path):
+            os.remove(os.path.join(cache_dir, name))  # Stale: built from older versions of these CSVs
+    return system
+
+
+def report():
+    t0 = time.perf_counter()
+    system = load_system(rebuild=True)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    load_system()
+    t_warm = time.perf_counter() - t0
+
+    from batch_engine import build_control_system
+    import skfuzzy.control  # noqa: F401 - time the graph, not the import
+    t0 = time.perf_counter()
+    build_control_system(system)
+    t_skfuzzy = time.perf_counter() - t0
+
+    print(f"Rules: {system.n_rules} | Cache: {cache_path()}")
+    print(f"Build (CSV parse + compile + save): {t_build * 1000:8.2f} ms")
+    print(f"Warm load (cache hit)             : {t_warm * 1000:8.2f} ms")
+    print(f"skfuzzy ControlSystem build       : {t_skfuzzy * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    report()
@@ -0,0 +1,119 @@
+import argparse
+import itertools
+import numpy as np
+from batch_engine import BatchFuzzyEngine, INPUT_NAMES, v99_system
+from response_surface import grid_axes
+from rule_loader import load_system
+
+# ==========================================
+# 1. ACCUMULATOR (Feed it firing-strength matrices, chunk by chunk)
+# ==========================================
+
+NO_RULE = -1  # dominant_rule() value for rows where nothing fires
+
+
+def dominant_rule(strength):
+    """Index of the strongest rule per row (first on ties), NO_RULE if none fires."""
+    idx = strength.argmax(axis=1)
+    return np.where(strength[np.arange(len(idx)), idx] > 0, idx, NO_RULE)
+
+
+class RuleStats:
+    """Per-rule activation statistics over any number of batches.
+
+    fire frequency  share of rows where the rule's strength is > 0
+    mean strength   average strength over the rows where it fires
+    dominant share  share of rows where it is the strongest rule
+    """
+
+    def __init__(self, system):
+        self.rule_ids = system.rule_ids
+        self.output = [system.output_labels[t] for t in system.rule_output]
+        self.rows = 0
+        self.no_fire = 0
+        self.fired = np.zeros(len(self.rule_ids), dtype=np.int64)
+        self.strength_sum = np.zeros(len(self.rule_ids))
+        self.dominant = np.zeros(len(self.rule_ids), dtype=np.int64)
+
+    def update(self, strength):
+        self.rows += len(strength)
+        self.fired += np.count_nonzero(strength, axis=0)
+        self.strength_sum += strength.sum(axis=0)
+        dom = dominant_rule(strength)
+        self.no_fire += int(np.count_nonzero(dom == NO_RULE))
+        self.dominant += np.bincount(dom[dom != NO_RULE], minlength=len(self.rule_ids))
+        return dom
+
+    def dead_rules(self):
+        """Rules that never fired on any row seen so far."""
+        return [r for r, n in zip(self.rule_ids, self.fired) if n == 0]
+
+    def shadowed_rules(self):
+        """Rules that fire but are never the strongest (another rule always
+        matches at least as well), e.g. overlapping pairs on one output."""
+        return [r for r, n, d in zip(self.rule_ids, self.fired, self.dominant) if n > 0 and d == 0]
+
+    def summary(self):
+        rows = max(self.rows, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(self.fired > 0, self.strength_sum / self.fired, 0.0)
+        return [{'rule': r, 'output': out, 'fire_freq': f / rows, 'mean_strength': float(m),
+                 'dominant_share': d / rows}
+                for r, out, f, m, d in zip(self.rule_ids, self.output, self.fired, mean, self.dominant)]
+
+    def report(self):
+        print(f"Rows: {self.rows} | no rule fired: {self.no_fire / max(self.rows, 1) * 100:.2f}%")
+        print(f"{'RULE':<11} | {'OUTPUT':<13} | {'FIRES':>7} | {'MEAN STR':>8} | {'DOMINANT':>8}")
+        print("-" * 60)
+        for s in self.summary():
+            print(f"{s['rule']:<11} | {s['output']:<13} | {s['fire_freq'] * 100:6.2f}% | "
+                  f"{s['mean_strength']:8.3f} | {s['dominant_share'] * 100:7.2f}%")
+        dead = self.dead_rules()
+        shadowed = self.shadowed_rules()
+        print(f"\nNever active: {', '.join(dead) if dead else 'none'}")
+        print(f"Never dominant: {', '.join(shadowed) if shadowed else 'none'}")
+
+
+# ==========================================
+# 2. SCANS
+# ==========================================
+
+GUI_LEVELS = {  # FuzzyApp.val_map: the 108 NONE/WEAK/STRONG combos the GUI used to offer
+    'trend': (20, 50, 80),
+    'wick_up': (10, 90), 'wick_lo': (10, 90),
+    'h1_bear': (10, 50, 90), 'h1_bull': (10, 50, 90),
+}
+
+
+def scan_rows(source, step=5.0, chunk=1 << 16):
+    """Yield input chunks (tuple of 5 arrays) for ``source``: 'grid' or 'gui'."""
+    if source == 'gui':
+        rows = np.array(list(itertools.product(*(GUI_LEVELS[n] for n in INPUT_NAMES))), dtype=float)
+        yield tuple(rows.T)
+        return
+    axes = grid_axes(step)
+    shape = tuple(len(a) for a in axes)
+    total = int(np.prod(shape))
+    for start in range(0, total, chunk):
+        idx = np.unravel_index(np.arange(start, min(total, start + chunk)), shape)
+        yield tuple(axis[i] for axis, i in zip(axes, idx))
+
+
+def scan_stats(engine, source='grid', step=5.0):
+    stats = RuleStats(engine.system)
+    for inputs in scan_rows(source, step):
+        stats.update(engine.score_batch(*inputs, return_strengths=True)[1])
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rule activation statistics over the input space.")
+    parser.add_argument('--source', choices=('grid', 'gui'), default='grid',
+                        help="grid: dense grid at --step; gui: the 108 combo combinations")
+    parser.add_argument('--step', type=float, default=5.0)
+    parser.add_argument('--v99', action='store_true', help="Hand-coded v0.99 rules instead of rules.csv")
+    args = parser.parse_args()
+    engine = BatchFuzzyEngine(v99_system() if args.v99 else load_system())
+    scan_stats(engine, args.source, args.step).report()
+    print()
+    engine.prune_stats.report()
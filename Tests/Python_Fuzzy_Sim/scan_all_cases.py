@@ -2,6 +2,7 @@ import numpy as np
 import skfuzzy as fuzz
 from skfuzzy import control as ctrl
 import itertools
+from stage_profiler import instrument_skfuzzy
 
 def create_fuzzy_system_v99_final_no_c3():
     trend = ctrl.Antecedent(np.arange(0, 101, 1), 'trend')
@@ -78,6 +79,7 @@ def create_fuzzy_system_v99_final_no_c3():
     rules.append(ctrl.Rule(trend['BEARISH'] & wick_lo['STRONG'] & h1_bull['WEAK'],   reversal['STARTING_UP'])) # D_C2
     # D_C3 REMOVED
 
+    instrument_skfuzzy()
     sim = ctrl.ControlSystemSimulation(ctrl.ControlSystem(rules))
     return sim
 
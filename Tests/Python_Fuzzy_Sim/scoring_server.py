@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import time
+import numpy as np
+from batch_engine import BatchFuzzyEngine, DEFUZZ_MODES, INPUT_NAMES, v99_system
+from rule_loader import load_system
+
+# ==========================================
+# 1. PROTOCOL (One request per line, one reply per line)
+# ==========================================
+# JSON:  {"id": 7, "inputs": [trend, wick_up, wick_lo, h1_bear, h1_bull]}
+#        {"id": 8, "rows": [[...5 inputs...], ...]}
+#     -> {"id": 7, "score": -42.1, "latency_us": 812.0, "batch": 37}
+#        {"id": 8, "scores": [...], "latency_us": ..., "batch": ...}
+#        {"cmd": "stats"} -> server counters
+# CSV (what an MQL5 SocketSend can produce without a JSON parser):
+#        "trend,wick_up,wick_lo,h1_bear,h1_bull" -> "score,latency_us"
+# Errors come back as {"id": ..., "error": "..."} or "ERR <message>".
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+BATCH_WINDOW_MS = 1.0  # How long the first request of a batch waits for company
+MAX_BATCH = 8192       # Rows per score_batch call
+MAX_LINE_BYTES = 256 * MAX_BATCH  # Fits a MAX_BATCH-row JSON request at full float precision
+
+
+def parse_request(line):
+    """(request dict, is_csv). CSV lines become {'inputs': [...]}."""
+    text = line.strip()
+    if text.startswith('{'):
+        return json.loads(text), False
+    return {'inputs': [float(v) for v in text.split(',')]}, True
+
+
+def request_rows(request):
+    if 'rows' in request:
+        rows = np.asarray(request['rows'], dtype=np.float64).reshape(-1, len(INPUT_NAMES))
+    else:
+        rows = np.asarray(request['inputs'], dtype=np.float64).reshape(1, len(INPUT_NAMES))
+    if not np.isfinite(rows).all():
+        raise ValueError("inputs must be finite numbers")
+    return rows
+
+
+def format_reply(request, scores, latency_us, batch, is_csv):
+    if is_csv:
+        return f"{scores[0]:.6f},{latency_us:.1f}\n"
+    reply = {'id': request.get('id'), 'latency_us': round(latency_us, 1), 'batch': batch}
+    if 'rows' in request:
+        reply['scores'] = scores.tolist()
+    else:
+        reply['score'] = float(scores[0])
+    return json.dumps(reply) + '\n'
+
+
+def format_error(request, message, is_csv):
+    if is_csv:
+        return f"ERR {message}\n"
+    return json.dumps({'id': (request or {}).get('id'), 'error': message}) + '\n'
+
+
+# ==========================================
+# 2. MICRO-BATCHER (Requests within one window -> one score_batch call)
+# ==========================================
+
+class MicroBatcher:
+    """Collects concurrent requests and scores them in one vectorized call.
+
+    The first request of a batch waits ``window`` seconds (0 = only what is
+    already queued), then everything queued is scored together, up to
+    ``max_batch`` rows. Scoring runs on the event loop: a batch of a few
+    thousand rows takes about as long as one scalar skfuzzy compute().
+    """
+
+    def __init__(self, engine, window=BATCH_WINDOW_MS / 1000, max_batch=MAX_BATCH):
+        self.engine = engine
+        self.window = window
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.busy_s = 0.0
+
+    async def score(self, rows):
+        """Scores for ``rows`` (k, 5) and the time spent queued + scoring (us)."""
+        t0 = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((rows, future))
+        scores, batch = await future
+        return scores, (time.perf_counter() - t0) * 1e6, batch
+
+    def _drain(self, items, n):
+        while n < self.max_batch and not self.queue.empty():
+            item = self.queue.get_nowait()
+            items.append(item)
+            n += len(item[0])
+        return n
+
+    async def run(self):
+        while True:
+            items = [await self.queue.get()]
+            n = self._drain(items, len(items[0][0]))
+            if self.window > 0 and n < self.max_batch:
+                await asyncio.sleep(self.window)
+                n = self._drain(items, n)
+
+            t0 = time.perf_counter()
+            rows = np.concatenate([r for r, _ in items])
+            try:
+                scores = self.engine.score_batch(*rows.T)
+            except Exception as e:  # Bad batch: every waiter gets the error, the loop keeps serving
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.busy_s += time.perf_counter() - t0
+            self.requests += len(items)
+            self.rows += n
+            self.batches += 1
+            start = 0
+            for r, future in items:
+                if not future.done():  # Client went away
+                    future.set_result((scores[start:start + len(r)], len(items)))
+                start += len(r)
+
+    def stats(self):
+        return {'requests': self.requests, 'rows': self.rows, 'batches': self.batches,
+                'mean_batch': self.requests / max(self.batches, 1), 'busy_s': round(self.busy_s, 3)}
+
+
+# ==========================================
+# 3. SERVER
+# ==========================================
+
+class ScoringServer:
+    """One warm engine behind a TCP (localhost) or Unix socket."""
+
+    def __init__(self, engine=None, window=BATCH_WINDOW_MS / 1000, max_batch=MAX_BATCH):
+        self.batcher = MicroBatcher(engine or BatchFuzzyEngine(load_system()), window, max_batch)
+        self.server = None
+        self._worker = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        self._worker = asyncio.ensure_future(self.batcher.run())
+        if unix_path:
+            self.server = await asyncio.start_unix_server(self._handle, unix_path, limit=MAX_LINE_BYTES)
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port, limit=MAX_LINE_BYTES)
+        return self.server
+
+    @property
+    def address(self):
+        return self.server.sockets[0].getsockname()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self._worker.cancel()
+
+    async def _handle(self, reader, writer):
+        sock = writer.get_extra_info('socket')
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):  # AF_UNIX is absent on Windows
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        tasks = set()
+        try:
+            # Lines are answered as their batch completes, so one connection
+            # can pipeline many requests
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as e:
+                    line = e.partial  # Last line without a newline, or EOF
+                    if not line:
+                        break
+                except asyncio.LimitOverrunError as e:
+                    is_csv = await self._skip_line(reader, e.consumed)
+                    writer.write(format_error(None, f"request line over {MAX_LINE_BYTES} bytes", is_csv).encode())
+                    continue
+                task = asyncio.ensure_future(self._answer(line.decode(), writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _skip_line(reader, consumed):
+        """Drop an over-long line up to and including its newline; returns
+        whether it was a CSV (not JSON) request, for the error reply."""
+        head = await reader.readexactly(consumed)
+        while True:
+            try:
+                await reader.readuntil(b'\n')
+                break
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+            except asyncio.IncompleteReadError:
+                break
+        return not head.lstrip().startswith(b'{')
+
+    async def _answer(self, line, writer):
+        request, is_csv = None, not line.lstrip().startswith('{')
+        try:
+            request, is_csv = parse_request(line)
+            if request.get('cmd') == 'stats':
+                reply = json.dumps(self.batcher.stats()) + '\n'
+            else:
+                scores, latency_us, batch = await self.batcher.score(request_rows(request))
+                reply = format_reply(request, scores, latency_us, batch, is_csv)
+        except (ValueError, KeyError, TypeError) as e:
+            reply = format_error(request, str(e), is_csv)
+        if not writer.is_closing():
+            writer.write(reply.encode())
+
+
+# ==========================================
+# 4. BLOCKING CLIENT (Scripts / tests that want a score without asyncio)
+# ==========================================
+
+class ScoreClient:
+    """``ScoreClient().score(80, 10, 90, 10, 90)`` -> (score, server latency us)."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, timeout=5.0):
+        if unix_path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(unix_path)
+        else:
+            self.sock = socket.create_connection((host, port), timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile('rw')
+        self._next_id = 0
+
+    def request(self, payload):
+        self._next_id += 1
+        payload = dict(payload, id=self._next_id)
+        self.file.write(json.dumps(payload) + '\n')
+        self.file.flush()
+        reply = json.loads(self.file.readline())
+        if 'error' in reply:
+            raise ValueError(reply['error'])
+        return reply
+
+    def score(self, trend, wick_up, wick_lo, h1_bear, h1_bull):
+        reply = self.request({'inputs': [trend, wick_up, wick_lo, h1_bear, h1_bull]})
+        return reply['score'], reply['latency_us']
+
+    def score_rows(self, rows):
+        reply = self.request({'rows': np.asarray(rows, dtype=float).tolist()})
+        return np.array(reply['scores']), reply['latency_us']
+
+    def stats(self):
+        self.file.write(json.dumps({'cmd': 'stats'}) + '\n')
+        self.file.flush()
+        return json.loads(self.file.readline())
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def serve(args):
+    engine = BatchFuzzyEngine(v99_system() if args.v99 else load_system(), defuzz=args.defuzz)
+    server = ScoringServer(engine, args.window_ms / 1000, args.max_batch)
+    await server.start(args.host, args.port, args.unix)
+    print(f"Scoring on {args.unix or f'{args.host}:{server.address[1]}'} "
+          f"(window {args.window_ms} ms, max batch {args.max_batch})", file=sys.stderr, flush=True)
+    async with server.server:
+        await server.server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-lived local scoring daemon with micro-batching.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', metavar='PATH', help="Listen on a Unix socket instead of TCP")
+    parser.add_argument('--window-ms', type=float, default=BATCH_WINDOW_MS,
+                        help="Batching window; 0 = batch only what is already queued")
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--defuzz', choices=DEFUZZ_MODES, default='discrete')
+    parser.add_argument('--v99', action='store_true', help="Hand-coded v0.99 rules instead of rules.csv")
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
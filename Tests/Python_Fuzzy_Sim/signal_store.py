@@ -0,0 +1,203 @@
+import argparse
+import json
+import os
+import numpy as np
+from batch_engine import INPUT_NAMES
+from fuzzy_engine import BAND_LABELS, score_band
+from rule_stats import NO_RULE, dominant_rule
+
+# ==========================================
+# 1. LAYOUT (One raw little-endian file per column, meta.json last)
+# ==========================================
+# Store directory:
+#   meta.json     committed row count, rules fingerprint + ids, stream labels
+#   <column>.bin  fixed-width column data, row i at offset i * itemsize
+# An append writes every column first and then replaces meta.json, so a
+# reader (or a crash mid-append) only ever sees whole rows: bytes past the
+# committed count are ignored, and cut off by the next append. One writer
+# per store at a time.
+
+COLUMNS = (
+    ('time', '<i8'),    # datetime64[m] as int64; NO_TIME for scored cases
+    ('stream', '<u2'),  # Index into meta 'streams' ("EURUSD,H1", "GUI", ...)
+) + tuple((name, '<f4') for name in INPUT_NAMES) + (
+    ('score', '<f4'),
+    ('band', 'u1'),     # Index into fuzzy_engine.BAND_LABELS
+    ('rule', 'u1'),     # Dominant rule, index into meta 'rule_ids'; NO_RULE_ID if none fired
+)
+DTYPES = {name: np.dtype(dtype) for name, dtype in COLUMNS}
+NO_TIME = np.iinfo(np.int64).min  # == NaT
+NO_RULE_ID = 255
+APPEND_ROWS = 1 << 18  # Rows converted + written per slice of a large append
+
+
+class SignalStore:
+    """Append-only columnar store of scored rows (backtest bars, scanner
+    streams, GUI cases). Opening an existing directory needs no system;
+    creating one, or appending, pins the rules fingerprint it was made with.
+    """
+
+    def __init__(self, path, system=None):
+        self.path = path
+        meta_path = os.path.join(path, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+            if system is not None and system.fingerprint() != self.meta['fingerprint']:
+                raise ValueError(f"{path} holds signals of other rules ({self.meta['fingerprint']}); "
+                                 "use a new directory")
+        elif system is None:
+            raise ValueError(f"No signal store at {path}; pass a system to create one")
+        else:
+            if system.n_rules >= NO_RULE_ID:
+                raise ValueError(f"At most {NO_RULE_ID} rules fit the uint8 rule column")
+            os.makedirs(path, exist_ok=True)
+            self.meta = {'rows': 0, 'fingerprint': system.fingerprint(), 'rule_ids': list(system.rule_ids),
+                         'streams': [], 'columns': [list(c) for c in COLUMNS]}
+            self._commit()
+
+    def __len__(self):
+        return self.meta['rows']
+
+    @property
+    def streams(self):
+        return self.meta['streams']
+
+    @property
+    def rule_ids(self):
+        return self.meta['rule_ids']
+
+    def _file(self, name):
+        return os.path.join(self.path, name + '.bin')
+
+    def _commit(self):
+        tmp = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp, os.path.join(self.path, 'meta.json'))
+
+    # --- Writing ---
+    def stream_id(self, label):
+        """Index of stream ``label``, added if new (committed with the next append)."""
+        if label not in self.streams:
+            self.streams.append(label)
+        return self.streams.index(label)
+
+    def append(self, cols, stream=''):
+        """Append one chunk: INPUT_NAMES + 'score' arrays, optionally 'time'
+        (datetime64) and 'rule' (dominant rule index, NO_RULE if none).
+        ``stream`` is one label for the chunk or per-row stream_id()s.
+        Returns the number of rows appended."""
+        n = len(cols['score'])
+        if not n:
+            return 0
+        data = {name: cols[name] for name in INPUT_NAMES + ('score',)}
+        data['time'] = cols['time'].astype('datetime64[m]').astype(np.int64) if 'time' in cols else NO_TIME
+        data['stream'] = self.stream_id(stream) if isinstance(stream, str) else stream
+        # From the stored float32 score, so band and score filters agree (and
+        # a single B1 at 60.000000000000014 stays the WEAK BUY it displays as)
+        data['band'] = score_band(np.asarray(cols['score'], dtype=np.float32))
+        rule = cols.get('rule')
+        data['rule'] = NO_RULE_ID if rule is None else np.where(rule == NO_RULE, NO_RULE_ID, rule)
+
+        rows = len(self)
+        for name, dtype in DTYPES.items():
+            column = np.broadcast_to(np.asarray(data[name]), (n,))
+            with open(self._file(name), 'ab') as f:
+                if f.tell() != rows * dtype.itemsize:
+                    f.truncate(rows * dtype.itemsize)  # Torn tail of an uncommitted append
+                    f.seek(0, os.SEEK_END)
+                for i in range(0, n, APPEND_ROWS):
+                    f.write(column[i:i + APPEND_ROWS].astype(dtype).tobytes())
+        self.meta['rows'] = rows + n
+        self._commit()
+        return n
+
+    def append_scored(self, engine, inputs, time=None, stream=''):
+        """Score ``inputs`` (5 scalars or arrays) with ``engine`` and append
+        them with their dominant rule; returns the scores."""
+        inputs = np.broadcast_arrays(*[np.atleast_1d(np.asarray(x, dtype=np.float64)) for x in inputs])
+        score, strength = engine.score_batch(*inputs, return_strengths=True)
+        cols = dict(zip(INPUT_NAMES, inputs), score=score, rule=dominant_rule(strength))
+        if time is not None:
+            cols['time'] = np.broadcast_to(np.asarray(time, dtype='datetime64[m]'), score.shape)
+        self.append(cols, stream)
+        return score
+
+    def recorded(self, chunks, stream=''):
+        """Pass ``chunks`` (e.g. backtest.replay) through, appending each."""
+        for cols in chunks:
+            self.append(cols, stream)
+            yield cols
+
+    # --- Reading ---
+    def columns(self, names=None):
+        """{name: read-only memmap of the committed rows}."""
+        out = {}
+        for name in DTYPES if names is None else names:
+            dtype = DTYPES[name]
+            if len(self):
+                out[name] = np.memmap(self._file(name), dtype=dtype, mode='r', shape=(len(self),))
+            else:
+                out[name] = np.empty(0, dtype)
+        if 'time' in out:
+            out['time'] = out['time'].view('datetime64[m]')
+        return out
+
+    def select(self, stream=None, band=None, rule=None, start=None, end=None):
+        """Boolean row mask; every given filter must hold. ``band`` is a
+        BAND_LABELS entry, ``rule`` a rule id, ``start`` / ``end`` bound time
+        (end exclusive)."""
+        mask = np.ones(len(self), dtype=bool)
+        needed = [c for c, v in (('stream', stream), ('band', band), ('rule', rule)) if v is not None]
+        cols = self.columns(needed + (['time'] if start is not None or end is not None else []))
+        if stream is not None:
+            mask &= cols['stream'] == self.streams.index(stream) if stream in self.streams else False
+        if band is not None:
+            mask &= cols['band'] == BAND_LABELS.index(band)
+        if rule is not None:
+            mask &= cols['rule'] == self.rule_ids.index(rule) if rule in self.rule_ids else False
+        if start is not None:
+            mask &= cols['time'] >= np.datetime64(start, 'm')
+        if end is not None:
+            mask &= cols['time'] < np.datetime64(end, 'm')
+        return mask
+
+    def summary(self, mask=None):
+        """Row count, mean score and counts per band / dominant rule / stream."""
+        cols = self.columns(('stream', 'score', 'band', 'rule'))
+        if mask is not None:
+            cols = {name: col[mask] for name, col in cols.items()}
+        rules = np.bincount(cols['rule'], minlength=NO_RULE_ID + 1)
+        streams = np.bincount(cols['stream'], minlength=len(self.streams))
+        return {
+            'rows': len(cols['score']),
+            'mean_score': float(cols['score'].mean(dtype=np.float64)) if len(cols['score']) else 0.0,
+            'bands': dict(zip(BAND_LABELS, np.bincount(cols['band'], minlength=len(BAND_LABELS)).tolist())),
+            'rules': {rid: int(rules[i]) for i, rid in list(enumerate(self.rule_ids)) + [(NO_RULE_ID, '-')]
+                      if rules[i]},
+            'streams': {label: int(streams[i]) for i, label in enumerate(self.streams) if streams[i]},
+        }
+
+
+def report(summary):
+    print(f"{summary['rows']} rows | mean score {summary['mean_score']:.2f}")
+    for label, n in summary['bands'].items():
+        print(f"  {label:<12} {n:10d} ({n / max(summary['rows'], 1) * 100:5.1f}%)")
+    print("Dominant rule: " + ', '.join(f"{rid} {n}" for rid, n in
+                                         sorted(summary['rules'].items(), key=lambda kv: -kv[1])))
+    if len(summary['streams']) > 1:
+        print("Streams: " + ', '.join(f"{s or '-'} {n}" for s, n in summary['streams'].items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filter and summarize a signal store.")
+    parser.add_argument('store')
+    parser.add_argument('--stream', help='e.g. "EURUSD,H1" or "GUI"')
+    parser.add_argument('--band', choices=BAND_LABELS)
+    parser.add_argument('--rule', help="Dominant rule id, e.g. U1")
+    parser.add_argument('--start', help="First bar time, e.g. 2024-01-01")
+    parser.add_argument('--end', help="Bar time bound (exclusive)")
+    args = parser.parse_args()
+    store = SignalStore(args.store)
+    report(store.summary(store.select(args.stream, args.band, args.rule, args.start, args.end)))
@@ -0,0 +1,258 @@
+import atexit
+import contextlib
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+
+# ==========================================
+# 1. STAGE REGISTRY (Entry points the engines declare, patched only while on)
+# ==========================================
+# Modules call register_stages(cls, 'method', ...) under their class. Nothing
+# is wrapped until a profiler is active, so with profiling off every call
+# goes straight to the original function: zero overhead, not "a cheap check".
+# Patching swaps the attribute on its owner, so a module function is only
+# timed when called through its module (backtest.replay, or a plain call
+# inside backtest.py); a name bound earlier by `from backtest import replay`
+# keeps the original.
+#
+# FUZZY_PROFILE=<prefix> switches a profiler on for the whole process (no
+# code edits) and writes <prefix>.json and <prefix>.folded at exit;
+# FUZZY_PROFILE=1 uses the prefix 'profile'.
+
+PROFILE_ENV = 'FUZZY_PROFILE'
+DEFAULT_PREFIX = 'profile'
+
+_registry = []   # (owner, attr, stage name)
+_originals = {}  # (owner, attr) -> (original attribute, defined on owner itself) while patched
+_active = None   # The Profiler receiving timings, None = off
+
+
+def register_stages(owner, *attrs, prefix=None):
+    """Declare ``owner.attr`` (methods of a class, or functions of a module)
+    as profiled stages named ``<prefix>.<attr>`` (prefix: the class name).
+    Callers of a module stage must look it up on the module to be timed."""
+    prefix = prefix or getattr(owner, '__name__', str(owner))
+    for attr in attrs:
+        entry = (owner, attr, f"{prefix}.{attr}")
+        _registry.append(entry)
+        if _active is not None:
+            _patch(*entry)
+
+
+def instrument_skfuzzy():
+    """Register skfuzzy's ControlSystemSimulation pipeline. Called where the
+    repo imports skfuzzy.control, so processes that never build a skfuzzy
+    system never import it for profiling either."""
+    from skfuzzy.control import controlsystem as cs
+    from skfuzzy.control.rule import Rule
+    if any(owner is cs.ControlSystemSimulation for owner, _, _ in _registry):
+        return
+    register_stages(cs.ControlSystemSimulation, 'compute', 'compute_rule', 'defuzz_consequents',
+                    '_clear_outputs', '_reset_simulation', prefix='skfuzzy.Simulation')
+    register_stages(cs._InputAcceptor, '_update_to_current', prefix='skfuzzy.Inputs')
+    register_stages(cs.RuleOrderGenerator, '__iter__', prefix='skfuzzy.RuleOrder')
+    register_stages(Rule, 'graph', prefix='skfuzzy.Rule')  # networkx graph per rule, rebuilt per access
+    register_stages(cs.CrispValueCalculator, 'fuzz', 'find_memberships', prefix='skfuzzy.Crisp')
+    register_stages(cs, 'defuzz', prefix='skfuzzy')
+
+
+def _run_timed(prof, name, fn, args, kwargs, calls=1):
+    frames = prof._frames()
+    parent = frames[-1] if frames else None
+    frame = [parent[0] + (name,) if parent else (name,), 0]  # Stack path, time spent in children
+    frames.append(frame)
+    t0 = time.perf_counter_ns()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        dt = time.perf_counter_ns() - t0
+        frames.pop()
+        if parent:
+            parent[1] += dt
+        prof._add(frame[0], dt, frame[1], calls)
+
+
+def _timed(fn, name):
+    if inspect.isgeneratorfunction(fn):
+        # Time every resume, each under whatever stage is consuming it, so
+        # the work lands where it happens (e.g. backtest.replay's chunks are
+        # computed inside write_signals); one call per generator
+        @functools.wraps(fn)
+        def timed_generator(*args, **kwargs):
+            gen = fn(*args, **kwargs)
+            calls = 1
+            while True:
+                prof = _active
+                try:
+                    if prof is None:
+                        item = next(gen)
+                    else:
+                        item = _run_timed(prof, name, next, (gen,), {}, calls)
+                        calls = 0
+                except StopIteration as stop:
+                    return stop.value
+                yield item
+        return timed_generator
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        prof = _active
+        if prof is None:
+            return fn(*args, **kwargs)
+        return _run_timed(prof, name, fn, args, kwargs)
+    return timed
+
+
+def _patch(owner, attr, name):
+    if (owner, attr) in _originals:
+        return
+    raw = inspect.getattr_static(owner, attr)  # The descriptor itself, possibly inherited
+    _originals[(owner, attr)] = (raw, attr in vars(owner))
+    if isinstance(raw, staticmethod):
+        setattr(owner, attr, staticmethod(_timed(raw.__func__, name)))
+    elif isinstance(raw, property):
+        setattr(owner, attr, property(_timed(raw.fget, name), raw.fset, raw.fdel, raw.__doc__))
+    else:
+        setattr(owner, attr, _timed(raw, name))
+
+
+def _unpatch_all():
+    for (owner, attr), (raw, own) in _originals.items():
+        if own:
+            setattr(owner, attr, raw)
+        else:
+            delattr(owner, attr)  # Inherited: uncover the base class attribute again
+    _originals.clear()
+
+
+# ==========================================
+# 2. PROFILER (Per stack path: calls, total and self time)
+# ==========================================
+
+class Profiler:
+    """Timings per call path, e.g. ('BatchFuzzyEngine.score_batch',
+    'BatchFuzzyEngine._score_chunk', 'BatchFuzzyEngine.fuzzify').
+    Self time = total minus the registered stages called inside."""
+
+    def __init__(self):
+        self.stages = {}  # path -> [calls, total_ns, child_ns]
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _frames(self):
+        frames = getattr(self._local, 'frames', None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def _add(self, path, total_ns, child_ns, calls=1):
+        with self._lock:
+            s = self.stages.get(path)
+            if s is None:
+                s = self.stages[path] = [0, 0, 0]
+            s[0] += calls
+            s[1] += total_ns
+            s[2] += child_ns
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+
+    def summary(self):
+        """One dict per call path, in call-tree order."""
+        roots_ns = sum(s[1] for path, s in self.stages.items() if len(path) == 1) or 1
+        return [{'stage': ';'.join(path), 'depth': len(path) - 1, 'calls': s[0],
+                 'total_s': s[1] / 1e9, 'self_s': (s[1] - s[2]) / 1e9,
+                 'mean_us': s[1] / max(s[0], 1) / 1e3, 'share': s[1] / roots_ns}
+                for path, s in sorted(self.stages.items())]
+
+    def by_stage(self):
+        """{stage name: {calls, total_s, self_s}} summed over every path it
+        appears on (a stage called by itself would count twice)."""
+        out = {}
+        for path, (calls, total, child) in self.stages.items():
+            s = out.setdefault(path[-1], {'calls': 0, 'total_s': 0.0, 'self_s': 0.0})
+            s['calls'] += calls
+            s['total_s'] += total / 1e9
+            s['self_s'] += (total - child) / 1e9
+        return out
+
+    def to_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({'paths': self.summary(), 'stages': self.by_stage()}, f, indent=2)
+        return path
+
+    def collapsed(self):
+        """Collapsed-stack lines ("a;b;c <self microseconds>") for
+        flamegraph.pl, speedscope, inferno, ..."""
+        return ''.join(f"{';'.join(path)} {(s[1] - s[2]) // 1000}\n"
+                       for path, s in sorted(self.stages.items()))
+
+    def to_collapsed(self, path):
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
+        return path
+
+    def report(self, file=None):
+        file = file or sys.stdout
+        print(f"{'STAGE':<52} | {'CALLS':>9} | {'TOTAL S':>9} | {'SELF S':>9} | {'MEAN US':>10} | SHARE", file=file)
+        print("-" * 108, file=file)
+        for s in self.summary():
+            name = '  ' * s['depth'] + s['stage'].rsplit(';', 1)[-1]
+            print(f"{name:<52} | {s['calls']:9d} | {s['total_s']:9.3f} | {s['self_s']:9.3f} | "
+                  f"{s['mean_us']:10.1f} | {s['share'] * 100:5.1f}%", file=file)
+
+
+# ==========================================
+# 3. SWITCHES (Context manager / environment variable)
+# ==========================================
+
+def enable(profiler=None):
+    """Start sending stage timings to ``profiler`` (a new one by default)."""
+    global _active
+    _active = profiler if profiler is not None else Profiler()
+    for entry in _registry:
+        _patch(*entry)
+    return _active
+
+
+def disable():
+    """Stop profiling and restore every original function."""
+    global _active
+    _active = None
+    _unpatch_all()
+
+
+def active():
+    return _active
+
+
+@contextlib.contextmanager
+def profiled(profiler=None):
+    """``with profiled() as prof: engine.score_batch(...)``; the previous
+    state (e.g. a FUZZY_PROFILE profiler) is restored on exit."""
+    previous = _active
+    prof = enable(profiler)
+    try:
+        yield prof
+    finally:
+        if previous is None:
+            disable()
+        else:
+            enable(previous)
+
+
+def _write_env_profile(prof, prefix):
+    if not prof.stages:
+        return
+    prof.report(file=sys.stderr)
+    print(f"Profile -> {prof.to_json(prefix + '.json')}, {prof.to_collapsed(prefix + '.folded')}", file=sys.stderr)
+
+
+if os.environ.get(PROFILE_ENV):
+    _prefix = os.environ[PROFILE_ENV]
+    atexit.register(_write_env_profile, enable(), DEFAULT_PREFIX if _prefix == '1' else _prefix)
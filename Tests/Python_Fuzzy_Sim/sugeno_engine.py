@@ -0,0 +1,219 @@
+import argparse
+import time
+import numpy as np
+from batch_engine import BatchFuzzyEngine, INPUT_NAMES, INPUT_UNIVERSE
+from fuzzy_engine import BAND_EDGES, BAND_LABELS, score_band
+from response_surface import critical_values, grid_axes
+from rule_loader import load_system, read_targets
+from rule_stats import scan_rows
+from stage_profiler import register_stages
+
+# ==========================================
+# 1. ZERO-ORDER SUGENO (Rule strength x Target_Score, weighted average)
+# ==========================================
+# Same fuzzification and min-AND as the Mamdani engine, but each rule's
+# consequent is its crisp Target_Score from rules.csv: no output universe,
+# no clipping, no centroid. Rows where no rule fires score 0, like Mamdani.
+
+
+class SugenoEngine:
+    """score = sum_r(w_r * target_r) / sum_r(w_r), w_r = min over the rule's terms.
+
+    Memberships are computed in float64 and stored in float32, rule-major
+    ((rules, N) rows gathered from (terms, N) membership tables) so every
+    step is a contiguous pass.
+    """
+
+    def __init__(self, system=None, targets=None, chunk_size=16384):
+        self.system = system if system is not None else load_system()
+        targets = targets if targets is not None else read_targets()
+        missing = [r for r in self.system.rule_ids if r not in targets]
+        if missing:
+            raise ValueError(f"No Target_Score for rules: {', '.join(missing)}")
+        self.targets = np.array([targets[r] for r in self.system.rule_ids], dtype=np.float32)
+        self.chunk_size = chunk_size
+        # Per input: breakpoints as (terms, 1) columns and the edge slopes
+        # (inf for a vertical edge: fmin drops the NaN it makes at x == a)
+        self._tables = []
+        for breaks in self.system.input_breaks:
+            a, b, c, d = (breaks[:, k, None] for k in range(4))
+            with np.errstate(divide='ignore'):
+                rise, fall = 1.0 / (b - a), 1.0 / (d - c)
+            self._tables.append((a, d, rise, fall))
+
+    def fuzzify(self, inputs):
+        """Per input (n_terms + 1, N) float32; the last row is the all-ones
+        IGNORE column. Inputs stay float64: rounded to float32, 70.000001
+        would become 70 and a rule firing at 1e-7 there would not fire."""
+        lo, hi = INPUT_UNIVERSE
+        memberships = []
+        for x, (a, d, rise, fall) in zip(inputs, self._tables):
+            x = np.clip(np.asarray(x, dtype=np.float64), lo, hi)
+            mu = np.ones((len(a) + 1, x.shape[0]), dtype=np.float32)
+            with np.errstate(invalid='ignore'):
+                y = (x - a) * rise
+                np.fmin(y, (d - x) * fall, out=y)
+            np.clip(y, 0.0, 1.0, out=mu[:-1])
+            memberships.append(mu)
+        return memberships
+
+    def rule_strengths(self, memberships):
+        """(rules, N) firing strengths, rule-major."""
+        terms = self.system.rule_terms
+        strength = memberships[0][terms[:, 0]]
+        for i in range(1, len(memberships)):
+            np.minimum(strength, memberships[i][terms[:, i]], out=strength)
+        return strength
+
+    def _score_chunk(self, inputs):
+        strength = self.rule_strengths(self.fuzzify(inputs))
+        weight = strength.sum(axis=0)
+        total = self.targets @ strength
+        out = np.zeros(weight.shape[0])
+        fired = weight > 0
+        out[fired] = total[fired] / weight[fired]
+        return out, fired
+
+    def score_batch(self, trend, wick_up, wick_lo, h1_bear, h1_bull, return_fired=False):
+        """Scores for N rows; with ``return_fired`` also the mask of rows
+        where any rule fired (the others are 0 in both modes, exactly)."""
+        inputs = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=np.float64))
+                                       for v in (trend, wick_up, wick_lo, h1_bear, h1_bull)])
+        n = inputs[0].shape[0]
+        out = np.empty(n)
+        fired = np.empty(n, dtype=bool)
+        for start in range(0, n, self.chunk_size):
+            sl = slice(start, start + self.chunk_size)
+            out[sl], fired[sl] = self._score_chunk([x[sl] for x in inputs])
+        if return_fired:
+            return out, fired
+        return out
+
+    def score(self, trend, wick_up, wick_lo, h1_bear, h1_bull):
+        return float(self.score_batch(trend, wick_up, wick_lo, h1_bear, h1_bull)[0])
+
+
+register_stages(SugenoEngine, 'score_batch', '_score_chunk', 'fuzzify', 'rule_strengths')
+
+
+# ==========================================
+# 2. TWO-PASS SCREENING (Sugeno first, Mamdani only near a band edge)
+# ==========================================
+
+def borderline(scores, margin):
+    """Rows whose score is within ``margin`` of a band edge."""
+    edges = np.asarray(BAND_EDGES)
+    return (np.abs(np.asarray(scores)[:, None] - edges) <= margin).any(axis=1)
+
+
+def two_pass(sugeno, engine, inputs, margin):
+    """(scores, exact mask): Sugeno scores, replaced by ``engine`` (Mamdani)
+    scores on the rows within ``margin`` of a band edge. Rows where no rule
+    fires are exact already. With ``margin`` at least the worst Sugeno error
+    the bands equal an all-Mamdani run; accuracy()'s 'safe_margin' is a
+    sampled estimate of that error plus headroom, not a proof."""
+    inputs = np.broadcast_arrays(*[np.atleast_1d(np.asarray(x, dtype=np.float64)) for x in inputs])
+    scores, fired = sugeno.score_batch(*inputs, return_fired=True)
+    exact = fired & borderline(scores, margin)
+    if exact.any():
+        scores[exact] = engine.score_batch(*(x[exact] for x in inputs))
+    return scores, exact
+
+
+# ==========================================
+# 3. ACCURACY REPORT (Dense grid vs. the Mamdani engine)
+# ==========================================
+
+MARGINS = (0, 2, 5, 10, 15, 20, 30)
+MARGIN_HEADROOM = 1.0  # Added to the largest sampled |error| for 'safe_margin'
+
+
+def sampled_max_error(sugeno, engine, step=5.0, n_samples=200000, seed=0):
+    """Largest |Sugeno - Mamdani| at ``n_samples`` uniform off-grid rows and
+    a quarter as many combinations of MF breakpoints (+-1e-6) and cell
+    midpoints, where memberships kink and rules start or stop firing."""
+    rng = np.random.default_rng(seed)
+    uniform = rng.uniform(*INPUT_UNIVERSE, (len(INPUT_NAMES), n_samples))
+    critical = np.stack([rng.choice(v, n_samples // 4)
+                         for v in critical_values(sugeno.system, grid_axes(step))])
+    return max(float(np.abs(sugeno.score_batch(*rows) - engine.score_batch(*rows)).max())
+               for rows in (uniform, critical))
+
+
+def accuracy(sugeno, engine, step=5.0, margins=MARGINS, n_samples=200000):
+    """Error and band-agreement statistics over the dense grid at ``step``.
+    'safe_margin' is the largest |error| on the grid and on
+    sampled_max_error()'s off-grid rows, plus MARGIN_HEADROOM: a sampled
+    estimate, not a guarantee."""
+    fast, fired, exact, t_fast, t_exact = [], [], [], 0.0, 0.0
+    for inputs in scan_rows('grid', step):
+        t0 = time.perf_counter()
+        scores, mask = sugeno.score_batch(*inputs, return_fired=True)
+        t1 = time.perf_counter()
+        exact.append(engine.score_batch(*inputs))
+        t_fast += t1 - t0
+        t_exact += time.perf_counter() - t1
+        fast.append(scores)
+        fired.append(mask)
+    fast, fired, exact = np.concatenate(fast), np.concatenate(fired), np.concatenate(exact)
+
+    err = np.abs(fast - exact)
+    fast_band, exact_band = score_band(fast), score_band(exact)
+    confusion = np.zeros((len(BAND_LABELS),) * 2, dtype=np.int64)
+    np.add.at(confusion, (exact_band, fast_band), 1)
+    screening = []
+    for m in margins:
+        sent = fired & borderline(fast, m)
+        band = np.where(sent, exact_band, fast_band)
+        screening.append({'margin': m, 'exact_share': float(sent.mean()),
+                          'band_agreement': float((band == exact_band).mean())})
+    stats = {
+        'rows': len(fast), 'fired': float(fired.mean()),
+        'sugeno_rows_per_s': len(fast) / t_fast, 'mamdani_rows_per_s': len(fast) / t_exact,
+        'mae': float(err.mean()), 'rmse': float(np.sqrt((err ** 2).mean())),
+        'p99': float(np.percentile(err, 99)), 'max': float(err.max()),
+        'corr': float(np.corrcoef(fast, exact)[0, 1]),
+        'sign_agreement': float((np.sign(fast) == np.sign(exact)).mean()),
+        'band_agreement': float((fast_band == exact_band).mean()),
+        'confusion': confusion, 'screening': screening,
+        'sampled_max': max(float(err.max()), sampled_max_error(sugeno, engine, step, n_samples)),
+        'off_grid_rows': n_samples + n_samples // 4,
+        'smallest_exact_margin': next((s['margin'] for s in screening if s['band_agreement'] == 1.0), None),
+    }
+    stats['safe_margin'] = stats['sampled_max'] + MARGIN_HEADROOM
+    return stats
+
+
+def report(stats):
+    print(f"Rows: {stats['rows']} ({stats['fired'] * 100:.1f}% fire a rule) | "
+          f"Sugeno {stats['sugeno_rows_per_s'] / 1e6:.2f} M rows/s vs. "
+          f"Mamdani {stats['mamdani_rows_per_s'] / 1e6:.2f} M rows/s "
+          f"(x{stats['sugeno_rows_per_s'] / stats['mamdani_rows_per_s']:.1f})")
+    print(f"|error|: mean {stats['mae']:.2f} | rmse {stats['rmse']:.2f} | p99 {stats['p99']:.2f} | "
+          f"max {stats['max']:.2f} | corr {stats['corr']:.4f}")
+    print(f"Sign agreement {stats['sign_agreement'] * 100:.2f}% | band agreement {stats['band_agreement'] * 100:.2f}%")
+
+    print("\nBands (rows = Mamdani, columns = Sugeno):")
+    short = [label.replace('STRONG ', 'S_').replace('WEAK ', 'W_') for label in BAND_LABELS]
+    print(f"{'':>11} " + ' '.join(f"{s:>9}" for s in short))
+    for label, row in zip(BAND_LABELS, stats['confusion']):
+        print(f"{label:>11} " + ' '.join(f"{v:9d}" for v in row))
+
+    print(f"\n{'MARGIN':>6} | {'SENT TO MAMDANI':>15} | BAND AGREEMENT")
+    for s in stats['screening']:
+        print(f"{s['margin']:6g} | {s['exact_share'] * 100:14.2f}% | {s['band_agreement'] * 100:.3f}%")
+    print(f"\nMargin {stats['safe_margin']:.1f} (sampled max |error| {stats['sampled_max']:.2f} over the grid + "
+          f"{stats['off_grid_rows']} off-grid rows, +{MARGIN_HEADROOM:g}) should keep every Mamdani band; "
+          f"an estimate, not a guarantee", end='')
+    if stats['smallest_exact_margin'] is not None:
+        print(f"; on this grid {stats['smallest_exact_margin']:g} already does.")
+    else:
+        print(".")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sugeno (Target_Score) approximation vs. the Mamdani engine.")
+    parser.add_argument('--step', type=float, default=5.0, help="Grid step per input")
+    args = parser.parse_args()
+    system = load_system()
+    report(accuracy(SugenoEngine(system), BatchFuzzyEngine(system), args.step))
@@ -0,0 +1,325 @@
+import argparse
+import contextlib
+import itertools
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+from multiprocessing import Pool, shared_memory
+import backtest
+from backtest import DEFAULT_CHUNK, SIGNAL_COLUMNS
+from batch_engine import BatchFuzzyEngine, CompiledSystem, INPUT_NAMES, v99_system
+from response_surface import DEFAULT_STEP, ResponseSurface, load_surface, surface_path
+from rule_loader import CACHE_DIR, load_system
+from signal_store import SignalStore
+from stage_profiler import register_stages
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+# ==========================================
+# 1. SHARED TABLES (One CompiledSystem in shared memory, attached by workers)
+# ==========================================
+# The parent compiles rules.csv once and copies its arrays into a single
+# shared-memory block. Workers map that block and build their engine on
+# zero-copy views: no CSV parsing, no compile, no skfuzzy graph per worker.
+# A response surface (--surface) is an mmapped .npy, so workers already
+# share its pages through the OS page cache.
+
+_ARRAYS = ('output_breaks', 'rule_terms', 'rule_output', 'universe')
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Pool workers share the parent's resource tracker, so the parent
+        # stays the only owner; unregistering here would drop its entry too
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedSystem:
+    """A CompiledSystem's arrays in one shared-memory block. ``handle`` is
+    small and picklable; ``attach(handle)`` rebuilds the system on views
+    into the block."""
+
+    def __init__(self, system):
+        arrays = {name: getattr(system, name) for name in _ARRAYS}
+        arrays.update({f'input_breaks_{i}': b for i, b in enumerate(system.input_breaks)})
+        layout, offset = [], 0
+        for name, arr in arrays.items():
+            offset = -(-offset // 8) * 8  # 8-byte aligned
+            layout.append((name, arr.dtype.str, arr.shape, offset))
+            offset += arr.nbytes
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (name, dtype, shape, start), arr in zip(layout, arrays.values()):
+            np.ndarray(shape, dtype, self.shm.buf, start)[...] = arr
+        self.nbytes = offset
+        self.handle = (self.shm.name, layout,
+                       {'input_labels': system.input_labels, 'output_labels': system.output_labels,
+                        'rule_ids': system.rule_ids})
+
+    @staticmethod
+    def attach(handle):
+        """(CompiledSystem on shared views, SharedMemory to keep alive)."""
+        name, layout, labels = handle
+        shm = _attach(name)
+        views = {key: np.ndarray(shape, dtype, shm.buf, start) for key, dtype, shape, start in layout}
+        for view in views.values():
+            view.flags.writeable = False
+        system = CompiledSystem(labels['input_labels'], [views[f'input_breaks_{i}'] for i in range(len(INPUT_NAMES))],
+                                labels['output_labels'], views['output_breaks'], labels['rule_ids'],
+                                views['rule_terms'], views['rule_output'], views['universe'])
+        return system, shm
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class _SurfaceScorer:
+    """score_batch() on a response surface, for replay()."""
+
+    def __init__(self, surface):
+        self.surface = surface
+
+    def score_batch(self, *inputs):
+        return self.surface.query(*inputs)
+
+
+# ==========================================
+# 2. DISCOVERY (<SYMBOL>_<TIMEFRAME>[_anything].csv in one directory)
+# ==========================================
+# Every intraday file of a symbol is one stream, paired with the symbol's
+# D1 file (wicks + trend). The breakout lookback covers one day of bars of
+# the stream's timeframe: 24 on H1, as in backtest.py.
+
+BAR_FILE = re.compile(r'^(?P<symbol>[^_]+)_(?P<tf>M\d+|H\d+|D1)(?:_.*)?\.(?:csv|txt|tsv)$', re.IGNORECASE)
+
+
+def timeframe_minutes(tf):
+    tf = tf.upper()
+    return int(tf[1:]) * {'M': 1, 'H': 60, 'D': 1440}[tf[0]]
+
+
+def discover(directory):
+    """[(symbol, timeframe, daily_path, bars_path)] sorted by symbol, then
+    timeframe; symbols without a D1 file are reported and skipped."""
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        m = BAR_FILE.match(name)
+        if m:
+            files.setdefault(m['symbol'].upper(), {})[m['tf'].upper()] = os.path.join(directory, name)
+    streams = []
+    for symbol, by_tf in sorted(files.items()):
+        if 'D1' not in by_tf:
+            print(f"  {symbol}: no D1 file, skipped", file=sys.stderr)
+            continue
+        for tf in sorted((tf for tf in by_tf if tf != 'D1'), key=timeframe_minutes):
+            streams.append((symbol, tf, by_tf['D1'], by_tf[tf]))
+    return streams
+
+
+# ==========================================
+# 3. WORKERS (One stream per task -> .npy columns in a scratch directory)
+# ==========================================
+
+PART_COLUMNS = SIGNAL_COLUMNS  # time as int64 minutes, the rest float64 (same CSV as write_signals)
+RULE_PART = 'rule'  # Dominant rule (int16), only when writing to a signal store
+
+_worker = {}
+
+
+def _init_worker(handle, surface_path, defuzz, part_dir, chunk_rows, with_rule=False):
+    t0 = time.perf_counter()
+    system, shm = SharedSystem.attach(handle)
+    _worker['shm'] = shm
+    if surface_path:
+        _worker['engine'] = _SurfaceScorer(ResponseSurface.open(surface_path))
+    else:
+        _worker['engine'] = BatchFuzzyEngine(system, defuzz=defuzz)
+    _worker['part_dir'] = part_dir
+    _worker['chunk_rows'] = chunk_rows
+    _worker['with_rule'] = with_rule
+    _worker['warmup_s'] = time.perf_counter() - t0
+
+
+def _scan_stream(task):
+    index, symbol, tf, daily_path, bars_path = task
+    t0 = time.perf_counter()
+    period = max(1, 1440 // timeframe_minutes(tf))
+    # Through the module, so an active profiler's wrapper is the one called
+    chunks = list(backtest.replay(daily_path, bars_path, engine=_worker['engine'],
+                                  chunk_rows=_worker['chunk_rows'], break_period=period,
+                                  with_rule=_worker['with_rule']))
+    cols = {c: np.concatenate([chunk[c] for chunk in chunks]) if chunks else np.empty(0, 'datetime64[m]' if c == 'time' else np.float64)
+            for c in PART_COLUMNS}
+    for c in PART_COLUMNS:
+        data = cols[c].astype('datetime64[m]').astype(np.int64) if c == 'time' else cols[c].astype(np.float64)
+        np.save(os.path.join(_worker['part_dir'], f"{index}_{c}.npy"), data)
+    if _worker['with_rule']:
+        rule = np.concatenate([chunk[RULE_PART] for chunk in chunks]) if chunks else np.empty(0)
+        np.save(os.path.join(_worker['part_dir'], f"{index}_{RULE_PART}.npy"), rule.astype(np.int16))
+    warmup, _worker['warmup_s'] = _worker['warmup_s'], 0.0  # Reported once per worker
+    return {'index': index, 'symbol': symbol, 'timeframe': tf, 'bars': len(cols['time']),
+            'seconds': time.perf_counter() - t0, 'pid': os.getpid(), 'warmup_s': warmup}
+
+
+# ==========================================
+# 4. MERGE (Per-stream time-sorted columns -> one time-sorted CSV)
+# ==========================================
+# Windows are cut at every k-th timestamp of every stream, so a window holds
+# at most k rows per stream; each window is one stable lexsort by (time,
+# stream). Memory stays bounded whatever the total row count.
+
+MERGE_ROWS = 1 << 20  # Rows per merge window (all streams together)
+
+
+def _load_part(path):
+    try:
+        return np.load(path, mmap_mode='r')
+    except ValueError:  # An empty array cannot be mapped
+        return np.load(path)
+
+
+def merge_parts(part_dir, streams, out_path=None, merge_rows=MERGE_ROWS, store=None):
+    """Write ``symbol,timeframe`` + SIGNAL_COLUMNS sorted by time (ties in
+    stream order) to ``out_path`` and/or append the same rows to ``store``
+    (a SignalStore; streams labelled "SYMBOL,TF"); returns the row count."""
+    names = PART_COLUMNS + ((RULE_PART,) if os.path.exists(os.path.join(part_dir, f"0_{RULE_PART}.npy")) else ())
+    parts = [{c: _load_part(os.path.join(part_dir, f"{i}_{c}.npy")) for c in names}
+             for i in range(len(streams))]
+    k = max(1, merge_rows // max(len(parts), 1))
+    cuts = np.unique(np.concatenate([p['time'][k::k] for p in parts] + [np.empty(0, np.int64)]))
+    edges = np.concatenate([[np.iinfo(np.int64).min], cuts, [np.iinfo(np.int64).max]])
+    bounds = [np.searchsorted(p['time'], edges) for p in parts]
+    labels = [f"{symbol},{tf}" for symbol, tf, _, _ in streams]
+    line = '%s,%s' + ',%.2f' * (len(PART_COLUMNS) - 1) + '\n'
+    store_ids = np.array([store.stream_id(label) for label in labels], dtype=np.uint16) if store is not None else None
+
+    n = 0
+    with open(out_path, 'w', newline='') if out_path else contextlib.nullcontext() as f:
+        if f:
+            f.write(','.join(('symbol', 'timeframe') + PART_COLUMNS) + '\n')
+        for w in range(len(edges) - 1):
+            pieces = [(s, p, b[w], b[w + 1]) for s, (p, b) in enumerate(zip(parts, bounds)) if b[w + 1] > b[w]]
+            if not pieces:
+                continue
+            stream = np.concatenate([np.full(hi - lo, s) for s, _, lo, hi in pieces])
+            cols = {c: np.concatenate([p[c][lo:hi] for _, p, lo, hi in pieces]) for c in names}
+            order = np.lexsort((stream, cols['time']))
+            cols = {c: col[order] for c, col in cols.items()}
+            stream = stream[order]
+            if f:
+                times = np.datetime_as_string(cols['time'].astype('datetime64[m]'), unit='m').tolist()
+                rows = zip([labels[s] for s in stream.tolist()], times,
+                           *[cols[c].tolist() for c in PART_COLUMNS[1:]])
+                f.write((line * len(times)) % tuple(itertools.chain.from_iterable(rows)))
+            if store is not None:
+                store.append(dict(cols, time=cols['time'].astype('datetime64[m]')), store_ids[stream])
+            n += len(order)
+    return n
+
+
+# ==========================================
+# 5. SCANNER
+# ==========================================
+
+def _peak_worker_rss_mb(in_process):
+    """Largest peak RSS of the pool workers (of this process when it did
+    the scan itself) in MB; None without the resource module (Windows)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if in_process else resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)  # Bytes on macOS, KB on Linux
+
+
+def scan_directory(directory, out_path=None, workers=None, surface=False, defuzz='discrete', system=None,
+                   chunk_rows=DEFAULT_CHUNK, store=None, surface_step=DEFAULT_STEP, cache_dir=CACHE_DIR):
+    """Replay every stream in ``directory`` on a process pool sharing one
+    compiled system, into the CSV ``out_path`` and/or the signal store
+    directory ``store``; returns a stats dict (streams, symbols, bars,
+    symbols_per_s, ...). With ``surface`` the workers interpolate the
+    ``surface_step`` table cached in ``cache_dir``; it has no rule
+    strengths, so its store rows carry no dominant rule."""
+    t0 = time.perf_counter()
+    streams = discover(directory)
+    if not streams:
+        raise ValueError(f"No <SYMBOL>_D1 + <SYMBOL>_<TF> bar files in {directory}")
+    system = system if system is not None else load_system()
+    table_path = None
+    if surface:
+        load_surface(system, surface_step, defuzz, cache_dir)  # Built once here if missing, then only mmapped
+        table_path = surface_path(system, surface_step, defuzz, cache_dir)
+    store = SignalStore(store, system) if store is not None else None
+    shared = SharedSystem(system)
+    part_dir = tempfile.mkdtemp(prefix='scan_', dir=os.path.dirname(os.path.abspath(out_path or store.path)))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(streams)))
+    init_args = (shared.handle, table_path, defuzz, part_dir, chunk_rows, store is not None and not surface)
+    tasks = [(i,) + s for i, s in enumerate(streams)]
+    results = []
+    try:
+        if workers == 1:
+            _init_worker(*init_args)
+            results = list(map(_scan_stream, tasks))
+        else:
+            with Pool(workers, initializer=_init_worker, initargs=init_args) as pool:
+                for r in pool.imap_unordered(_scan_stream, tasks):
+                    results.append(r)
+                    print(f"\r  {len(results)}/{len(tasks)} streams", end='', file=sys.stderr)
+                print(file=sys.stderr)
+        t_scan = time.perf_counter() - t0
+        rows = merge_parts(part_dir, streams, out_path, store=store)
+    finally:
+        _worker.clear()  # In-process run: drop the views before the block goes
+        shutil.rmtree(part_dir, ignore_errors=True)
+        shared.close()
+    elapsed = time.perf_counter() - t0
+    symbols = len({s for s, _, _, _ in streams})
+    warmups = [r['warmup_s'] for r in results if r['warmup_s'] > 0]
+    return {
+        'streams': len(streams), 'symbols': symbols, 'bars': rows, 'workers': workers,
+        'scan_s': t_scan, 'merge_s': elapsed - t_scan, 'elapsed_s': elapsed,
+        'symbols_per_s': symbols / elapsed, 'streams_per_s': len(streams) / elapsed, 'bars_per_s': rows / elapsed,
+        'shared_bytes': shared.nbytes, 'worker_warmup_ms': max(warmups) * 1e3 if warmups else 0.0,
+        'peak_worker_rss_mb': _peak_worker_rss_mb(workers == 1),
+        'per_stream': sorted(results, key=lambda r: r['index']),
+    }
+
+
+register_stages(sys.modules[__name__], 'discover', 'merge_parts', prefix='symbol_scanner')
+
+
+def report(stats, out):
+    print(f"{stats['symbols']} symbols / {stats['streams']} streams / {stats['bars']} bars on {stats['workers']} "
+          f"workers in {stats['elapsed_s']:.2f} s (scan {stats['scan_s']:.2f} s, merge {stats['merge_s']:.2f} s)")
+    print(f"{stats['symbols_per_s']:.2f} symbols/s | {stats['streams_per_s']:.2f} streams/s | "
+          f"{stats['bars_per_s'] / 1e6:.2f} M bars/s")
+    rss = stats['peak_worker_rss_mb']
+    print(f"Shared tables: {stats['shared_bytes']} bytes | worker warm-up <= {stats['worker_warmup_ms']:.1f} ms | "
+          f"peak worker RSS {'n/a' if rss is None else f'{rss:.0f} MB'}")
+    print(f"-> {out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan a directory of per-symbol bar files on a process pool.")
+    parser.add_argument('directory', help="<SYMBOL>_D1*.csv plus <SYMBOL>_H1*.csv (or any M/H timeframe) files")
+    parser.add_argument('out_csv', nargs='?', help="Merged, time-sorted signals of every stream")
+    parser.add_argument('--store', help="Also append the merged signals to this signal_store directory")
+    parser.add_argument('--workers', type=int, default=None, help="Default: one per CPU")
+    parser.add_argument('--surface', action='store_true', help="Score by response-surface interpolation (mmap)")
+    parser.add_argument('--surface-step', type=float, default=DEFAULT_STEP, help="Surface grid spacing")
+    parser.add_argument('--defuzz', choices=('discrete', 'analytic'), default='discrete')
+    parser.add_argument('--v99', action='store_true', help="Hand-coded v0.99 rules instead of rules.csv")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK)
+    args = parser.parse_args()
+    if args.out_csv is None and args.store is None:
+        parser.error("give out_csv and/or --store")
+    report(scan_directory(args.directory, args.out_csv, args.workers, args.surface, args.defuzz,
+                          v99_system() if args.v99 else None, args.chunk_rows, args.store, args.surface_step),
+           ', '.join(p for p in (args.out_csv, args.store) if p))
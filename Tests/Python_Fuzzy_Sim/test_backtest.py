@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from backtest import H1Breaks, daily_wicks, read_all_bars, replay, write_signals
+from batch_engine import BatchFuzzyEngine, v99_system
+
+
+def _write_bars(path, start, step_minutes, ohlc, with_time=True):
+    times = np.datetime64(start) + np.arange(len(ohlc)) * np.timedelta64(step_minutes, 'm')
+    with open(path, 'w') as f:
+        f.write('<DATE>\t<TIME>\t<OPEN>\t<HIGH>\t<LOW>\t<CLOSE>\t<TICKVOL>\n' if with_time else
+                '<DATE>\t<OPEN>\t<HIGH>\t<LOW>\t<CLOSE>\t<TICKVOL>\n')
+        for t, (o, h, l, c) in zip(times, ohlc):
+            day, clock = str(t).split('T')
+            stamp = day.replace('-', '.') + ('\t' + clock[:5] if with_time else '')
+            f.write(f"{stamp}\t{o}\t{h}\t{l}\t{c}\t100\n")
+
+
+def _random_ohlc(rng, n):
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    high = np.maximum(open_, close) + rng.uniform(0, 0.5, n)
+    low = np.minimum(open_, close) - rng.uniform(0, 0.5, n)
+    return np.round(np.column_stack([open_, high, low, close]), 5)
+
+
+class TestBacktest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.daily = os.path.join(self.tmp, 'd1.csv')
+        self.h1 = os.path.join(self.tmp, 'h1.csv')
+        _write_bars(self.daily, '2024-01-01T00:00', 24 * 60, _random_ohlc(rng, 20), with_time=False)
+        _write_bars(self.h1, '2024-01-01T00:00', 60, _random_ohlc(rng, 24 * 20))
+        self.engine = BatchFuzzyEngine(v99_system())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_daily_wicks(self):
+        bars = {k: np.array([v]) for k, v in zip(('open', 'high', 'low', 'close'), (2.0, 4.0, 0.0, 3.0))}
+        up, lo = daily_wicks(bars)
+        np.testing.assert_allclose([up[0], lo[0]], [25.0, 50.0])
+
+    def test_header_only_and_empty_files(self):
+        header_only, empty = os.path.join(self.tmp, 'header.csv'), os.path.join(self.tmp, 'empty.csv')
+        _write_bars(header_only, '2024-01-01T00:00', 60, np.empty((0, 4)))
+        open(empty, 'w').close()
+        bars = read_all_bars(header_only)
+        self.assertEqual(bars['time'].dtype, np.dtype('datetime64[m]'))
+        self.assertEqual({k: len(v) for k, v in bars.items()}, dict.fromkeys(('time', 'open', 'high', 'low', 'close'), 0))
+        self.assertEqual(write_signals(replay(header_only, self.h1, engine=self.engine),
+                                       os.path.join(self.tmp, 'out.csv')), 0)  # No completed day
+        with self.assertRaisesRegex(ValueError, 'empty.csv'):
+            read_all_bars(empty)
+
+    def test_breaks_chunk_invariant(self):
+        bars = read_all_bars(self.h1)
+        whole = H1Breaks().update(bars)
+        breaks = H1Breaks()
+        parts = [breaks.update({k: v[i:i + 37] for k, v in bars.items()}) for i in range(0, len(bars['open']), 37)]
+        for got, expected in zip(np.concatenate(parts, axis=1), whole):
+            np.testing.assert_allclose(got, expected, rtol=1e-12)  # Cumsum rounding only
+
+    def test_replay_uses_previous_day(self):
+        cols = {k: np.concatenate(v) for k, v in
+                zip(('time', 'wick_up', 'score'),
+                    zip(*[(c['time'], c['wick_up'], c['score']) for c in
+                          replay(self.daily, self.h1, engine=self.engine, chunk_rows=50)]))}
+        up, _ = daily_wicks(read_all_bars(self.daily))
+        self.assertEqual(cols['time'][0], np.datetime64('2024-01-02T00:00'))  # Day 1 has no completed daily bar
+        day = (cols['time'] - np.datetime64('2024-01-02T00:00')).astype('timedelta64[D]').astype(int)
+        np.testing.assert_array_equal(cols['wick_up'], up[day])
+        self.assertEqual(len(cols['score']), 24 * 19)
+
+    def test_chunk_size_does_not_change_output(self):
+        a, b = os.path.join(self.tmp, 'a.csv'), os.path.join(self.tmp, 'b.csv')
+        n = write_signals(replay(self.daily, self.h1, engine=self.engine, chunk_rows=7), a)
+        write_signals(replay(self.daily, self.h1, engine=self.engine), b)
+        self.assertEqual(n, 24 * 19)
+        with open(a) as fa, open(b) as fb:
+            self.assertEqual(fa.read(), fb.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import itertools
+import unittest
+import numpy as np
+from batch_engine import (BatchFuzzyEngine, SKFUZZY_TOLERANCE, build_control_system,
+                          skfuzzy_score, v99_system)
+from fuzzy_simulator import create_skfuzzy_system
+
+
+class TestBatchEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = BatchFuzzyEngine()
+        cls.sim, _ = create_skfuzzy_system()
+
+        # The 108 nominal cases of scan_108 plus a random sweep
+        nominal = list(itertools.product([20, 50, 80], [10, 90], [10, 90], [10, 50, 90], [10, 50, 90]))
+        rng = np.random.default_rng(7)
+        cls.cases = np.vstack([np.array(nominal, dtype=float), rng.uniform(0, 100, (120, 5))])
+
+    def test_matches_skfuzzy(self):
+        batch = self.engine.score_batch(*self.cases.T)
+        for row, score in zip(self.cases, batch):
+            expected = skfuzzy_score(self.sim, *row)
+            self.assertAlmostEqual(score, expected, delta=SKFUZZY_TOLERANCE, msg=f"Inputs {row}")
+
+    def test_compiled_system_round_trip(self):
+        # A skfuzzy system rebuilt from the compiled arrays scores the same
+        sim = build_control_system(v99_system())
+        for row in self.cases[::20]:
+            self.assertAlmostEqual(skfuzzy_score(sim, *row), skfuzzy_score(self.sim, *row),
+                                   delta=SKFUZZY_TOLERANCE)
+
+    def test_no_rule_fired_scores_zero(self):
+        # Sideways with no wicks and no breakout: nothing fires
+        self.assertEqual(self.engine.score(50, 10, 10, 10, 10), 0.0)
+
+    def test_analytic_matches_fine_grid(self):
+        # The exact integral is what the discrete centroid converges to as the
+        # universe gets finer, so a 0.01-step grid must agree closely
+        fine = v99_system()
+        fine.universe = np.linspace(-100, 100, 20001)
+        analytic = BatchFuzzyEngine(defuzz='analytic')
+        np.testing.assert_allclose(analytic.score_batch(*self.cases.T),
+                                   BatchFuzzyEngine(fine).score_batch(*self.cases.T), atol=1e-4)
+
+    def test_analytic_close_to_discrete(self):
+        analytic = BatchFuzzyEngine(defuzz='analytic').score_batch(*self.cases.T)
+        np.testing.assert_allclose(analytic, self.engine.score_batch(*self.cases.T), atol=0.1)
+
+    def test_broadcast_and_chunking(self):
+        small = BatchFuzzyEngine(chunk_size=7)
+        h1_bull = np.linspace(0, 100, 50)
+        np.testing.assert_allclose(small.score_batch(80, 10, 90, 10, h1_bull),
+                                   self.engine.score_batch(80, 10, 90, 10, h1_bull))
+
+    def test_pruning_changes_nothing(self):
+        # Small blocks: merged term groups; one big block: a group per term set
+        cases = np.vstack([self.cases] + [self.cases + d for d in (-3, 3, 7)])
+        for defuzz, chunk_size in itertools.product(('discrete', 'analytic'), (16, 16384)):
+            full = BatchFuzzyEngine(defuzz=defuzz, prune=False)
+            pruned = BatchFuzzyEngine(defuzz=defuzz, chunk_size=chunk_size)
+            expected, strength = full.score_batch(*cases.T, return_strengths=True)
+            scores, pruned_strength = pruned.score_batch(*cases.T, return_strengths=True)
+            np.testing.assert_allclose(scores, expected, rtol=0, atol=1e-12)
+            np.testing.assert_array_equal(pruned_strength, strength)
+
+    def test_prune_stats(self):
+        engine = BatchFuzzyEngine()
+        engine.score(80, 10, 90, 10, 90)  # Bullish: only BULLISH / IGNORE-trend rules can fire
+        s = engine.prune_stats.summary()
+        self.assertEqual((s['rows'], s['blocks']), (1, 1))
+        self.assertGreater(s['rules_skipped'], 0.5)
+        self.assertEqual(s['rules_skipped'], s['rules_skipped_per_row'])  # One-row block
+        engine.score(50, 10, 10, 10, 10)  # Nothing fires
+        self.assertEqual(engine.prune_stats.summary()['dead_rows'], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import contextlib
+import io
+import unittest
+from benchmark import BENCHMARKS, compare, higher_is_better, peak_rss_mb, report
+
+
+class TestBenchmark(unittest.TestCase):
+    BASELINE = {'environment': {'cpus': 1},
+                'batch': {'discrete_1000_rows_per_s': 100000.0, 'peak_rss_mb': 100.0},
+                'startup': {'engine_build_s': 0.01}}
+
+    def test_direction(self):
+        self.assertTrue(higher_is_better('discrete_1000_rows_per_s'))
+        self.assertFalse(higher_is_better('engine_score_p99_us'))
+
+    def test_regression_threshold(self):
+        results = {'environment': {'cpus': 8},
+                   'batch': {'discrete_1000_rows_per_s': 50000.0, 'peak_rss_mb': 110.0, 'new_metric_s': 1.0},
+                   'startup': {'engine_build_s': 0.005}}
+        rows = {(b, m): change for b, m, _, _, change in compare(results, self.BASELINE)}
+        self.assertAlmostEqual(rows[('batch', 'discrete_1000_rows_per_s')], 1.0)  # Half the throughput
+        self.assertAlmostEqual(rows[('batch', 'peak_rss_mb')], 0.1)
+        self.assertAlmostEqual(rows[('startup', 'engine_build_s')], -0.5)
+        self.assertNotIn(('batch', 'new_metric_s'), rows)  # Not in the baseline yet
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            regressed = report(compare(results, self.BASELINE), threshold=0.25)
+        self.assertEqual([(b, m) for b, m, *_ in regressed], [('batch', 'discrete_1000_rows_per_s')])
+
+    def test_zero_throughput(self):
+        results = {'batch': {'discrete_1000_rows_per_s': 0.0, 'peak_rss_mb': 100.0}}
+        rows = {(b, m): change for b, m, _, _, change in compare(results, self.BASELINE)}
+        self.assertEqual(rows[('batch', 'discrete_1000_rows_per_s')], float('inf'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            regressed = report(compare(results, self.BASELINE), threshold=0.25)
+        self.assertEqual([(b, m) for b, m, *_ in regressed], [('batch', 'discrete_1000_rows_per_s')])
+
+    def test_peak_rss(self):
+        rss = peak_rss_mb()
+        if rss is None:
+            self.skipTest("No resource module or psutil")
+        self.assertGreater(rss, 1)  # MB, not KB or bytes
+        self.assertLess(rss, 1 << 16)
+
+    def test_startup_runs(self):
+        metrics = BENCHMARKS['startup']()
+        self.assertTrue(all(v >= 0 for v in metrics.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from batch_engine import BatchFuzzyEngine, INPUT_NAMES
+from dense_scan import dense_scan, open_scan
+from response_surface import grid_axes
+from rule_loader import load_system
+
+
+class TestDenseScan(unittest.TestCase):
+    STEP = 25.0  # 5^5 = 3125 rows
+    SHARD = 500  # 7 shards, the last one short
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.out = os.path.join(self.tmp, 'scan')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _scan(self, step=STEP, workers=1):
+        with contextlib.redirect_stderr(io.StringIO()):
+            return dense_scan(self.out, step, workers=workers, shard_size=self.SHARD)
+
+    def test_matches_score_batch(self):
+        cols = self._scan(workers=2)
+        self.assertTrue((cols['done'] == 1).all())
+        self.assertEqual(len(cols['done']), 7)
+        grid = [g.ravel() for g in np.meshgrid(*grid_axes(self.STEP), indexing='ij')]
+        for name, x in zip(INPUT_NAMES, grid):
+            np.testing.assert_array_equal(cols[name], x.astype(np.float32))
+        expected = BatchFuzzyEngine(load_system()).score_batch(*grid)
+        np.testing.assert_allclose(cols['score'], expected, rtol=0, atol=1e-4)  # float32 column
+
+    def test_resume_recomputes_only_unfinished_shard(self):
+        expected = np.array(self._scan()['score'])
+        cols = {c: np.load(os.path.join(self.out, c + '.npy'), mmap_mode='r+') for c in ('score', 'done')}
+        cols['score'][:] = np.nan  # Anything rescored would come back finite
+        cols['done'][3] = 0        # Interrupted before shard 3 was marked done
+        for col in cols.values():
+            col.flush()
+        del cols
+
+        score = np.array(self._scan()['score'])
+        shard = slice(3 * self.SHARD, 4 * self.SHARD)
+        np.testing.assert_array_equal(score[shard], expected[shard])
+        score[shard] = 0
+        self.assertTrue(np.isnan(score[np.arange(len(score)) // self.SHARD != 3]).all())
+        self.assertTrue((open_scan(self.out)['done'] == 1).all())
+
+    def test_mismatched_scan_refused(self):
+        self._scan()
+        with self.assertRaises(ValueError):
+            self._scan(step=20.0)
+        meta_path = os.path.join(self.out, 'meta.json')
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta['fingerprint'] = '0' * 16  # Scanned with other rules
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+        with self.assertRaises(ValueError):
+            self._scan()
+
+
+if __name__ == '__main__':
+    unittest.main()
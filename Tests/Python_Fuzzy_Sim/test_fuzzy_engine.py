@@ -0,0 +1,51 @@
+import itertools
+import json
+import subprocess
+import sys
+import unittest
+from batch_engine import SKFUZZY_TOLERANCE, skfuzzy_score
+from fuzzy_engine import STARTUP_BUDGET_MS, create_fuzzy_system
+from fuzzy_simulator import create_skfuzzy_system
+
+_STARTUP_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from fuzzy_engine import create_fuzzy_system
+sim, _ = create_fuzzy_system()
+ms = (time.perf_counter() - t0) * 1000
+heavy = [m for m in ('tkinter', 'matplotlib', 'skfuzzy', 'scipy') if m in sys.modules]
+print(json.dumps({'ms': ms, 'heavy': heavy}))
+"""
+
+
+class TestFuzzyEngine(unittest.TestCase):
+    def test_startup_budget(self):
+        # Fresh interpreter, best of 3 so one slow disk read does not fail CI
+        runs = [json.loads(subprocess.run([sys.executable, '-c', _STARTUP_PROBE], capture_output=True,
+                                          text=True, check=True).stdout) for _ in range(3)]
+        self.assertEqual(runs[0]['heavy'], [])
+        self.assertLess(min(r['ms'] for r in runs), STARTUP_BUDGET_MS)
+
+    def test_gui_module_imports_lazily(self):
+        code = "import sys, fuzzy_simulator; print([m for m in ('tkinter', 'matplotlib', 'skfuzzy') if m in sys.modules])"
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(out.strip(), '[]')
+
+    def test_drop_in_matches_skfuzzy(self):
+        sim, consequent = create_fuzzy_system()
+        reference, sk_consequent = create_skfuzzy_system()
+        for row in itertools.product([20, 50, 80], [10, 90], [10, 90], [10, 50, 90], [10, 50, 90]):
+            for name, value in zip(('trend', 'wick_up', 'wick_lo', 'h1_bear', 'h1_bull'), row):
+                sim.input[name] = value
+            sim.compute()
+            self.assertAlmostEqual(sim.output['reversal'], skfuzzy_score(reference, *row), delta=SKFUZZY_TOLERANCE)
+        self.assertEqual(list(consequent.terms), list(sk_consequent.terms))
+
+    def test_unknown_input_rejected(self):
+        sim, _ = create_fuzzy_system()
+        with self.assertRaises(ValueError):
+            sim.input['wick_upper'] = 10
+
+
+if __name__ == '__main__':
+    unittest.main()
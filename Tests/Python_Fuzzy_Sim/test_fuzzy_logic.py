@@ -1,10 +1,11 @@
 import unittest
 import numpy as np
-from fuzzy_simulator import create_fuzzy_system
+from fuzzy_engine import create_fuzzy_system
+from rule_loader import load_system
 
 class TestFuzzyLogic(unittest.TestCase):
     def setUp(self):
-        self.sim, self.consequent = create_fuzzy_system()
+        self.sim, self.consequent = create_fuzzy_system(load_system())
         # Constants for input values based on MFs
         self.SIDEWAYS = 50
         
@@ -12,12 +13,12 @@ class TestFuzzyLogic(unittest.TestCase):
         self.WEAK = 50
         self.STRONG = 90
         
-        # Expected Output Ranges
-        self.CLEARLY_UP_MIN = 75
+        # Expected Output Ranges (rules.csv: S1 / B1 -> MODERATE, target +-70)
+        self.MODERATE_UP_MIN = 55
         self.WEAK_UP_MIN = 40
         self.WEAK_UP_MAX = 60
         
-        self.CLEARLY_DOWN_MAX = -75
+        self.MODERATE_DOWN_MAX = -55
         self.WEAK_DOWN_MAX = -40
         self.WEAK_DOWN_MIN = -60
 
@@ -26,17 +27,17 @@ class TestFuzzyLogic(unittest.TestCase):
 
     def compute_score(self, trend, wick_up, wick_low, break_up, break_down):
         self.sim.input['trend'] = trend
-        self.sim.input['wick_upper'] = wick_up
-        self.sim.input['wick_lower'] = wick_low
-        self.sim.input['break_up'] = break_up
-        self.sim.input['break_down'] = break_down
+        self.sim.input['wick_up'] = wick_up
+        self.sim.input['wick_lo'] = wick_low
+        self.sim.input['h1_bear'] = break_down
+        self.sim.input['h1_bull'] = break_up
         self.sim.compute()
         return self.sim.output['reversal']
 
     # =================================================================
     # RULE 1: Strong Buy
     # Trend=SIDEWAYS & Daily=YES (Lower Wick) & H1=STRONG (Break Up)
-    # -> CLEARLY_FORMING (Buy)
+    # -> MODERATE_UP (B1)
     # =================================================================
     def test_rule_1_strong_buy(self):
         score = self.compute_score(
@@ -46,12 +47,12 @@ class TestFuzzyLogic(unittest.TestCase):
             break_up=self.STRONG,
             break_down=self.NONE
         )
-        self.assertGreaterEqual(score, self.CLEARLY_UP_MIN, "Rule 1 (Buy) should return CLEARLY_UP score (>75)")
+        self.assertGreaterEqual(score, self.MODERATE_UP_MIN, "Rule 1 (Buy) should return MODERATE_UP score (>55)")
 
     # =================================================================
     # RULE 1 (Mirror): Strong Sell
     # Trend=SIDEWAYS & Daily=YES (Upper Wick) & H1=STRONG (Break Down)
-    # -> CLEARLY_FORMING (Sell)
+    # -> MODERATE_DOWN (S1)
     # =================================================================
     def test_rule_1_strong_sell(self):
         score = self.compute_score(
@@ -61,7 +62,7 @@ class TestFuzzyLogic(unittest.TestCase):
             break_up=self.NONE,
             break_down=self.STRONG
         )
-        self.assertLessEqual(score, self.CLEARLY_DOWN_MAX, "Rule 1 (Sell) should return CLEARLY_DOWN score (<-75)")
+        self.assertLessEqual(score, self.MODERATE_DOWN_MAX, "Rule 1 (Sell) should return MODERATE_DOWN score (<-55)")
 
     # =================================================================
     # RULE 2: Weak Buy
@@ -140,7 +141,7 @@ class TestFuzzyLogic(unittest.TestCase):
             break_down=self.NONE
         )
         # Since Daily Rejection is a prerequisite for reversal, this should be neutral/low
-        # The simulator has a rule: wick_upper['NONE'] & wick_lower['NONE'] -> reversal['NOT_FORMED']
+        # B3 (wick_up NONE & wick_lo NONE & h1_bull STRONG) only reaches STARTING_UP
         self.assertTrue(self.NEUTRAL_MIN <= score <= self.NEUTRAL_MAX,
                         f"Rule 4 (No Daily Wick) should be NEUTRAL regardless of breakout. Got {score}")
 
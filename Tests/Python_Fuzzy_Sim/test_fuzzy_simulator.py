@@ -0,0 +1,96 @@
+import time
+import unittest
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from batch_engine import BatchFuzzyEngine
+from fuzzy_engine import create_fuzzy_system
+from fuzzy_simulator import ResponseChart, ScoreWorker
+
+
+class _CountingCanvas(FigureCanvasAgg):
+    """Agg canvas counting full draws and blit-path calls."""
+
+    def __init__(self, fig):
+        super().__init__(fig)
+        self.calls = dict.fromkeys(('draw', 'restore_region', 'blit'), 0)
+
+    def draw(self):
+        self.calls['draw'] += 1
+        super().draw()
+
+    def restore_region(self, region, *args, **kwargs):
+        self.calls['restore_region'] += 1
+        super().restore_region(region, *args, **kwargs)
+
+    def blit(self, bbox=None):
+        self.calls['blit'] += 1
+        super().blit(bbox)
+
+
+class TestFuzzySimulator(unittest.TestCase):
+    def _wait(self, worker, timeout=5.0):
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            result = worker.poll()
+            if result is not None:
+                return result
+            time.sleep(0.001)
+        self.fail("worker produced no result")
+
+    def test_worker_matches_engine(self):
+        engine = BatchFuzzyEngine()
+        worker = ScoreWorker(engine, debounce=0)
+        try:
+            for row in np.random.default_rng(0).uniform(0, 100, (20, 5)):
+                worker.submit(row)
+                got, score, aggregate = self._wait(worker)
+                self.assertEqual(got, tuple(row))
+                self.assertEqual(score, engine.score(*row))
+                act = engine.term_activations(engine.rule_strengths(engine.fuzzify([[v] for v in row])))
+                np.testing.assert_array_equal(aggregate, engine.aggregate(act)[0])
+        finally:
+            worker.close()
+
+    def test_drag_is_coalesced_and_memoized(self):
+        worker = ScoreWorker(BatchFuzzyEngine(), debounce=0.05)
+        try:
+            drag = [(50, 10, 10, 10, h) for h in np.arange(0, 100, 0.5)]
+            for row in drag:  # Much faster than the debounce window
+                worker.submit(row)
+            row, _, _ = self._wait(worker)
+            self.assertEqual(row, tuple(map(float, drag[-1])))
+            self.assertLess(worker.computed, len(drag) / 10)
+
+            worker.submit(drag[0])
+            self._wait(worker)
+            worker.submit(drag[-1])  # Revisited position: memo, no compute
+            self._wait(worker)
+            self.assertEqual(worker.memo_hits, 1)
+        finally:
+            worker.close()
+
+    def test_chart_blits_after_first_frame(self):
+        sim, consequent = create_fuzzy_system()
+        fig = Figure(figsize=(8, 6), dpi=100)
+        canvas = _CountingCanvas(fig)
+        chart = ResponseChart(fig, canvas, consequent)
+        worker = ScoreWorker(sim.engine, debounce=0)
+        levels = np.arange(0, 100, 2.0)
+        try:
+            for h1_bull in levels:
+                score, aggregate = worker.evaluate((80.0, 10.0, 90.0, 10.0, h1_bull))
+                chart.update(score, aggregate, 'label')
+        finally:
+            worker.close()
+        self.assertEqual(chart.full_draws, 1)  # Only the first frame renders the static curves
+        self.assertEqual(canvas.calls, {'draw': 1, 'restore_region': len(levels) - 1, 'blit': len(levels) - 1})
+        self.assertEqual(chart.line.get_xdata()[0], score)
+
+        canvas.draw()  # A resize redraws everything and refreshes the background
+        chart.update(score, aggregate, 'label')
+        self.assertEqual(chart.full_draws, 2)
+        self.assertEqual(canvas.calls['blit'], len(levels))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+from batch_engine import SKFUZZY_TOLERANCE, BatchFuzzyEngine, CompiledSystem
+from golden_regression import check, evaluate_grid, grid_axis
+from rule_loader import load_system
+from rule_stats import dominant_rule
+
+
+def _with_output(system, rule_id, term):
+    out = system.rule_output.copy()
+    out[system.rule_ids.index(rule_id)] = system.output_labels.index(term)
+    return CompiledSystem(system.input_labels, system.input_breaks, system.output_labels, system.output_breaks,
+                          system.rule_ids, system.rule_terms, out, system.universe)
+
+
+class TestGoldenRegression(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.system = load_system()
+
+    def test_distinct_rows_match_full_grid(self):
+        engine = BatchFuzzyEngine(self.system)
+        axis = grid_axis(10.0)
+        scores, dominant = evaluate_grid(engine, axis)
+        grid = np.meshgrid(*[axis] * 5, indexing='ij')
+        expected, strength = engine.score_batch(*[g.ravel() for g in grid], return_strengths=True)
+        np.testing.assert_allclose(scores.ravel(), expected, rtol=0, atol=SKFUZZY_TOLERANCE)  # Chunk grouping only
+        np.testing.assert_array_equal(dominant.ravel(), dominant_rule(strength))
+
+    def test_rules_csv_matches_golden(self):
+        result = check(BatchFuzzyEngine(self.system))
+        self.assertTrue(result['ok'], result)
+        self.assertEqual(result['asymmetric'], 0)
+        self.assertLess(result['elapsed_s'], 10)
+
+    def test_rule_change_reported(self):
+        result = check(BatchFuzzyEngine(_with_output(self.system, 'B1', 'CLEARLY_UP')), top=3)
+        self.assertFalse(result['ok'])
+        self.assertEqual(result['changed_rules'], ['B1'])
+        self.assertGreater(result['changed'], 0)
+        self.assertEqual(len(result['deviations']), 3)
+        for d in result['deviations']:
+            self.assertGreater(d['score'], d['golden'])
+            self.assertIn('B1', d['firing'])
+        self.assertGreater(result['asymmetric'], 0)  # S1 still MODERATE_DOWN
+
+    def test_new_monotone_violation(self):
+        # Opposing momentum in an uptrend flipped to push the score up
+        result = check(BatchFuzzyEngine(_with_output(self.system, 'U_MOM_DRAG', 'STARTING_UP')), top=1)
+        self.assertFalse(result['ok'])
+        bear = result['monotone']['h1_bear']
+        self.assertGreater(bear['new'], 0)
+        self.assertIn('U_MOM_DRAG', bear['worst_new'][0]['firing_to'])
+        self.assertEqual(result['monotone']['h1_bull']['new'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from batch_engine import BatchFuzzyEngine
+from heatmap_explorer import SliceExplorer, export_slice
+from rule_loader import load_system
+from rule_stats import NO_RULE
+
+
+class TestHeatmapExplorer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = BatchFuzzyEngine(load_system())
+        cls.explorer = SliceExplorer(cls.engine)
+
+    def test_cells_match_engine(self):
+        sl = self.explorer.slice('h1_bear', 'h1_bull', trend=80, wick_up=10, wick_lo=90)
+        self.assertEqual(sl.scores.shape, (101, 101))
+        rng = np.random.default_rng(0)
+        for i, j in rng.integers(0, 101, (50, 2)):
+            row = sl.row(i, j)
+            self.assertEqual((row[3], row[4]), (sl.axis[i], sl.axis[j]))
+            self.assertAlmostEqual(sl.scores[j, i], self.engine.score(*row), places=4)
+            _, strength = self.engine.score_batch(*row, return_strengths=True)
+            expected = strength[0].argmax() if strength.any() else NO_RULE
+            self.assertEqual(sl.dominant[j, i], expected)
+        self.assertGreater(sum(sl.regions().values()), 0)
+
+    def test_slices_are_cached(self):
+        explorer = SliceExplorer(self.engine, cache_size=2)
+        a = explorer.slice('trend', 'wick_up', wick_lo=10, h1_bear=90, h1_bull=10)
+        self.assertEqual((explorer.hits, explorer.misses), (0, 1))
+        self.assertIs(explorer.slice('trend', 'wick_up', wick_lo=10.0, h1_bear=90, h1_bull=10), a)  # 10 == 10.0
+        self.assertEqual((explorer.hits, explorer.misses), (1, 1))
+        b = explorer.slice('trend', 'wick_up', wick_lo=10, h1_bear=90, h1_bull=50)
+        self.assertIs(explorer.slice('trend', 'wick_up', wick_lo=10, h1_bear=90, h1_bull=10), a)  # a now newest
+        explorer.slice('trend', 'wick_lo', wick_up=10, h1_bear=90, h1_bull=50)  # Evicts b, the least recent
+        self.assertEqual((explorer.hits, explorer.misses, len(explorer.cache)), (2, 3, 2))
+        self.assertIs(explorer.slice('trend', 'wick_up', wick_lo=10, h1_bear=90, h1_bull=10), a)
+        self.assertIsNot(explorer.slice('trend', 'wick_up', wick_lo=10, h1_bear=90, h1_bull=50), b)
+        self.assertEqual((explorer.hits, explorer.misses), (3, 4))
+        with self.assertRaises(ValueError):
+            explorer.slice('trend', 'trend', wick_up=10, wick_lo=10, h1_bear=10)
+        with self.assertRaises(ValueError):
+            explorer.slice('trend', 'wick_up', wick_lo=10, h1_bear=10)
+
+    def test_export(self):
+        sl = self.explorer.slice('h1_bear', 'h1_bull', trend=50, wick_up=90, wick_lo=10)
+        with tempfile.TemporaryDirectory() as tmp:
+            png = export_slice(sl, os.path.join(tmp, 'slice.png'))
+            self.assertGreater(os.path.getsize(png), 1000)
+            data = np.load(export_slice(sl, os.path.join(tmp, 'slice.npz')))
+            np.testing.assert_array_equal(data['scores'], sl.scores)
+            np.testing.assert_array_equal(data['dominant'], sl.dominant)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import numpy as np
+from batch_engine import BatchFuzzyEngine
+from fuzzy_engine import create_fuzzy_system
+from incremental_engine import IncrementalEvaluator
+from rule_loader import load_system
+
+
+class TestIncrementalEngine(unittest.TestCase):
+    def _walk(self, steps=1500, seed=0):
+        """Random walk moving one or two inputs per step, incl. GUI levels,
+        breakpoints and out-of-range values."""
+        rng = np.random.default_rng(seed)
+        levels = np.array([0, 10, 20, 30, 50, 60, 80, 90, 100, -5, 120])
+        x = rng.uniform(0, 100, 5)
+        for _ in range(steps):
+            i = rng.integers(5)
+            x[i] = rng.choice(levels) if rng.random() < 0.5 else rng.uniform(0, 100)
+            if rng.random() < 0.3:
+                x[3:] = rng.uniform(0, 100, 2)  # New H1 bar: both breaks move
+            yield x.copy()
+
+    def test_identical_to_full_recompute(self):
+        for system in (None, load_system()):
+            for defuzz in ('discrete', 'analytic'):
+                engine = BatchFuzzyEngine(system, defuzz=defuzz)
+                inc = IncrementalEvaluator(engine)
+                for row in self._walk():
+                    self.assertEqual(inc.evaluate(*row), engine.score(*row), msg=f"{defuzz} {row}")
+
+    def test_first_row_fully_true(self):
+        engine = BatchFuzzyEngine(load_system())
+        for row in ((50, 10, 90, 10, 90), (80, 10, 90, 10, 90), (50, 50, 50, 50, 50)):
+            self.assertEqual(IncrementalEvaluator(engine).evaluate(*row), engine.score(*row), msg=str(row))
+
+    def test_h1_ticks_reuse_daily_work(self):
+        inc = IncrementalEvaluator()
+        inc.evaluate(80, 10, 90, 10, 10)
+        inc.stats.reset()
+        for h1_bull in np.linspace(0, 100, 21):
+            inc.evaluate(80, 10, 90, 10, h1_bull)
+        s = inc.stats.summary()
+        self.assertEqual(s['memberships_reused'], 0.8)  # 4 of 5 inputs unchanged every tick
+        self.assertGreater(s['rules_reused'], 0.8)
+        self.assertGreater(s['terms_reused'], 0.5)
+
+        inc.evaluate(80, 10, 90, 10, 100)  # Same row again: cached score
+        self.assertEqual(inc.stats.cached_calls, 1)
+
+    def test_simulation_is_incremental(self):
+        sim, _ = create_fuzzy_system()
+        for h1_bull in (10, 50, 90):
+            for name, value in zip(('trend', 'wick_up', 'wick_lo', 'h1_bear', 'h1_bull'), (80, 10, 90, 10, h1_bull)):
+                sim.input[name] = value
+            sim.compute()
+            self.assertEqual(sim.output['reversal'], sim.engine.score(80, 10, 90, 10, h1_bull))
+        self.assertEqual(sim.evaluator.stats.calls, 3)
+        self.assertGreater(sim.evaluator.stats.summary()['memberships_reused'], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
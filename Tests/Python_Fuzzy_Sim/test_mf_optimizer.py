@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from batch_engine import BatchFuzzyEngine
+from mf_optimizer import ShapeSpace, canonical_cases, evaluate, optimize, rmse, write_specs
+from rule_loader import load_system, read_specs, read_targets
+
+
+class TestMfOptimizer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.system = load_system()
+        cls.targets = read_targets()
+        cls.cases, cls.goal, cls.ids = canonical_cases(cls.system, cls.targets)
+
+    def test_canonical_cases(self):
+        self.assertEqual(len(self.ids), self.system.n_rules)
+        row = self.cases[self.ids.index('U1')]
+        np.testing.assert_array_equal(row, [80, 10, 90, 10, 90])  # wick_up is IGNORE -> NONE
+        self.assertEqual(self.goal[self.ids.index('U1')], 95)
+
+    def test_batched_evaluation_matches_engine(self):
+        rng = np.random.default_rng(0)
+        for inputs in (False, True):
+            space = ShapeSpace(self.system, inputs)
+            lo, hi = np.array(space.bounds).T
+            X = np.vstack([space.x0, rng.uniform(lo, hi, (15, len(space.x0)))])
+            scores = evaluate(space, X, self.cases)
+            self.assertEqual(scores.shape, (16, len(self.cases)))
+            for x, row in zip(X, scores):
+                expected = BatchFuzzyEngine(space.to_system(x)).score_batch(*self.cases.T)
+                np.testing.assert_allclose(row, expected, atol=1e-9)
+
+    def test_x0_is_the_current_system(self):
+        space = ShapeSpace(self.system, inputs=True)
+        tuned = space.to_system(space.x0)
+        np.testing.assert_array_equal(tuned.output_breaks, self.system.output_breaks)
+        for a, b in zip(tuned.input_breaks, self.system.input_breaks):
+            np.testing.assert_array_equal(a, b)
+
+    def test_optimizer_reduces_loss(self):
+        tuned, info = optimize(self.system, self.targets, maxiter=30, popsize=10, polish=False)
+        self.assertLess(info['loss_after'], info['loss_before'])
+        space = ShapeSpace(tuned)
+        self.assertAlmostEqual(rmse(evaluate(space, space.x0, self.cases)[0], self.goal), info['loss_after'])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'specs.csv')
+            write_specs(tuned, path, decimals=6)
+            _, output_terms = read_specs(path)
+            for label, b in zip(tuned.output_labels, tuned.output_breaks):
+                np.testing.assert_allclose(output_terms[label], b, atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
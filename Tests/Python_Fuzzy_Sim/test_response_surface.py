@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+import numpy as np
+from batch_engine import BatchFuzzyEngine, v99_system
+import response_surface
+from response_surface import grid_axes, load_surface, surface_path
+
+
+class TestResponseSurface(unittest.TestCase):
+    STEP = 25.0  # 5 points per axis keeps the build instant
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.system = v99_system()
+        self.engine = BatchFuzzyEngine(self.system)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_exact_on_grid_nodes(self):
+        surface = load_surface(self.system, self.STEP, cache_dir=self.tmp)
+        self.assertIsInstance(surface.table, np.memmap)
+        nodes = np.stack(np.meshgrid(*grid_axes(self.STEP), indexing='ij'), -1).reshape(-1, 5)
+        np.testing.assert_allclose(surface.query(*nodes.T), self.engine.score_batch(*nodes.T), atol=1e-4)
+
+    def test_query_reports_error_bound(self):
+        surface = load_surface(self.system, self.STEP, cache_dir=self.tmp)
+        rng = np.random.default_rng(12345)  # Independent of measure_error's draw
+        uniform = rng.uniform(0, 100, (5, 2000))
+        near_kinks = np.stack([rng.choice(v, 2000) for v in surface.critical_values(self.system, (-1e-3, 0.25))])
+        for rows in (uniform, near_kinks):
+            scores, max_error = surface.query(*rows, with_error=True)
+            self.assertLessEqual(np.abs(scores - self.engine.score_batch(*rows)).max(), max_error)
+
+    def _changed(self, low):
+        changed = v99_system()
+        changed.output_breaks[0] = (-100, -100, low, -80)
+        return changed
+
+    def test_rule_change_invalidates(self):
+        original = load_surface(self.system, self.STEP, cache_dir=self.tmp).table.filename
+        changed = self._changed(-90)
+        surface = load_surface(changed, self.STEP, cache_dir=self.tmp)
+        self.assertIn(changed.fingerprint(), os.path.basename(surface.table.filename))
+        self.assertEqual(len(os.listdir(self.tmp)), 4)  # Both systems stay cached
+        self.assertEqual(load_surface(self.system, self.STEP, cache_dir=self.tmp).table.filename, original)
+
+    def test_least_recently_used_evicted(self):
+        first, second, third = self.system, self._changed(-90), self._changed(-85)
+        with mock.patch.object(response_surface, 'SURFACE_CACHE_ENTRIES', 2):
+            load_surface(first, self.STEP, cache_dir=self.tmp)
+            load_surface(second, self.STEP, cache_dir=self.tmp)
+            time.sleep(0.01)
+            load_surface(first, self.STEP, cache_dir=self.tmp)  # Hit: now more recent than second
+            load_surface(third, self.STEP, cache_dir=self.tmp)
+        cached = sorted(os.listdir(self.tmp))
+        self.assertEqual(cached, sorted(os.path.basename(surface_path(s, self.STEP, cache_dir=self.tmp)) + ext
+                                        for s in (first, third) for ext in ('', '.json')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from batch_engine import BatchFuzzyEngine, SKFUZZY_TOLERANCE, build_control_system, skfuzzy_score
+from rule_loader import RULES_CSV, SPECS_CSV, cache_path, compile_system, load_system, read_rules
+
+
+class TestRuleLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_ignore_means_unconstrained(self):
+        rules = {rule_id: antecedent for rule_id, antecedent, _ in read_rules()}
+        self.assertEqual(rules['U_DRAG'], {'trend': 'BULLISH', 'wick_up': 'STRONG'})
+        self.assertEqual(rules['S1'], {'trend': 'SIDEWAYS', 'wick_up': 'STRONG',
+                                       'h1_bear': 'STRONG', 'h1_bull': 'NONE'})
+
+    def test_cache_round_trip(self):
+        built = load_system(cache_dir=self.tmp)
+        self.assertEqual(len(os.listdir(self.tmp)), 1)
+        cached = load_system(cache_dir=self.tmp)
+        self.assertEqual(cached.rule_ids, built.rule_ids)
+        self.assertEqual(cached.input_labels, built.input_labels)
+        np.testing.assert_array_equal(cached.rule_terms, built.rule_terms)
+        np.testing.assert_array_equal(cached.output_breaks, built.output_breaks)
+
+    def test_csv_edit_invalidates_cache(self):
+        rules_copy = os.path.join(self.tmp, 'rules.csv')
+        shutil.copy(RULES_CSV, rules_copy)
+        cache_dir = os.path.join(self.tmp, 'cache')
+        load_system(rules_copy, SPECS_CSV, cache_dir)
+        with open(rules_copy, 'a') as f:
+            f.write("\nUptrend,PENDING,U_X,BULLISH,IGNORE,IGNORE,IGNORE,IGNORE,NOT_FORMED,0,Draft\n")
+        system = load_system(rules_copy, SPECS_CSV, cache_dir)
+        self.assertEqual(system.n_rules, 24)  # PENDING rows are not compiled
+        self.assertEqual(len(os.listdir(cache_dir)), 1)  # Old entry pruned
+
+    def test_other_sources_kept(self):
+        rules_copy = os.path.join(self.tmp, 'rules.csv')
+        shutil.copy(RULES_CSV, rules_copy)
+        cache_dir = os.path.join(self.tmp, 'cache')
+        load_system(cache_dir=cache_dir)
+        load_system(rules_copy, SPECS_CSV, cache_dir)  # Same contents, other file
+        with open(rules_copy, 'a') as f:
+            f.write("\nUptrend,CONFIRMED,U_X,BULLISH,IGNORE,IGNORE,IGNORE,IGNORE,NOT_FORMED,0,Draft\n")
+        load_system(rules_copy, SPECS_CSV, cache_dir)
+        self.assertEqual(sorted(os.listdir(cache_dir)),
+                         sorted(os.path.basename(cache_path(*paths, cache_dir))
+                                for paths in ((RULES_CSV, SPECS_CSV), (rules_copy, SPECS_CSV))))
+
+    def test_matches_skfuzzy_built_from_csv(self):
+        system = compile_system()
+        engine = BatchFuzzyEngine(system)
+        sim = build_control_system(system)
+        rows = np.random.default_rng(3).uniform(0, 100, (40, 5))
+        for row, score in zip(rows, engine.score_batch(*rows.T)):
+            self.assertAlmostEqual(score, skfuzzy_score(sim, *row), delta=SKFUZZY_TOLERANCE)
+
+
+if __name__ == '__main__':
+    unittest.main()
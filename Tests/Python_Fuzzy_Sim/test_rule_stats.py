@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+from batch_engine import BatchFuzzyEngine, v99_system
+from rule_stats import NO_RULE, RuleStats, dominant_rule, scan_stats
+
+
+class TestRuleStats(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = BatchFuzzyEngine(v99_system(), chunk_size=100)
+
+    def test_strengths_alongside_scores(self):
+        rows = np.random.default_rng(0).uniform(0, 100, (250, 5))
+        plain = self.engine.score_batch(*rows.T)
+        scores, strength = self.engine.score_batch(*rows.T, return_strengths=True)
+        np.testing.assert_array_equal(scores, plain)
+        self.assertEqual(strength.shape, (250, self.engine.system.n_rules))
+
+        # Bullish trend + strong lower wick + strong bull break: U1 at full strength
+        _, strength = self.engine.score_batch(80, 10, 90, 10, 90, return_strengths=True)
+        rule = self.engine.system.rule_ids.index('U1')
+        self.assertEqual(strength[0, rule], 1.0)
+        self.assertEqual(dominant_rule(strength)[0], rule)
+
+    def test_aggregates(self):
+        system = v99_system()
+        stats = RuleStats(system)
+        strength = np.zeros((4, system.n_rules))
+        strength[0, 0], strength[0, 1] = 0.5, 0.8
+        strength[1, 1] = 0.2
+        strength[2, 0] = 1.0  # Row 3 fires nothing
+        np.testing.assert_array_equal(stats.update(strength), [1, 1, 0, NO_RULE])
+
+        summary = {s['rule']: s for s in stats.summary()}
+        first, second = system.rule_ids[:2]
+        self.assertEqual(summary[first]['fire_freq'], 0.5)
+        self.assertEqual(summary[first]['mean_strength'], 0.75)
+        self.assertEqual(summary[second]['dominant_share'], 0.5)
+        self.assertEqual(stats.no_fire, 1)
+        self.assertEqual(len(stats.dead_rules()), system.n_rules - 2)
+
+    def test_gui_scan_has_no_dead_rules(self):
+        stats = scan_stats(self.engine, 'gui')
+        self.assertEqual(stats.rows, 108)
+        self.assertEqual(stats.dead_rules(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
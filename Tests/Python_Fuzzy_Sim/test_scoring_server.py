@@ -0,0 +1,74 @@
+import asyncio
+import socket
+import threading
+import unittest
+import numpy as np
+from batch_engine import SKFUZZY_TOLERANCE, BatchFuzzyEngine
+from load_generator import run_load
+from rule_loader import load_system
+from scoring_server import MAX_BATCH, MAX_LINE_BYTES, ScoreClient, ScoringServer
+
+
+class TestScoringServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = BatchFuzzyEngine(load_system())
+        cls.loop = asyncio.new_event_loop()
+        cls.server = ScoringServer(cls.engine, window=0.002)
+        cls.loop.run_until_complete(cls.server.start(port=0))
+        cls.port = cls.server.address[1]
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        asyncio.run_coroutine_threadsafe(cls.server.close(), cls.loop).result()
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join()
+
+    def test_scores_match_engine(self):
+        rows = np.random.default_rng(0).uniform(0, 100, (50, 5))
+        with ScoreClient(port=self.port) as client:
+            score, latency_us = client.score(*rows[0])
+            self.assertEqual(score, self.engine.score(*rows[0]))
+            self.assertGreater(latency_us, 0)
+            scores, _ = client.score_rows(rows)
+            np.testing.assert_array_equal(scores, self.engine.score_batch(*rows.T))
+            with self.assertRaises(ValueError):
+                client.request({'inputs': [1, 2, 3]})  # Wrong arity: error reply, connection stays up
+            self.assertEqual(client.score(*rows[1])[0], self.engine.score(*rows[1]))
+
+    def test_large_requests(self):
+        rows = np.random.default_rng(1).uniform(0, 100, (MAX_BATCH, 5))
+        with ScoreClient(port=self.port) as client:
+            scores, _ = client.score_rows(rows)  # ~0.9 MB line, far past asyncio's 64 KiB default
+            np.testing.assert_allclose(scores, self.engine.score_batch(*rows.T), rtol=0, atol=SKFUZZY_TOLERANCE)
+            with self.assertRaisesRegex(ValueError, 'bytes'):
+                client.request({'rows': [[1.0] * 5] * (MAX_LINE_BYTES // 10)})
+            self.assertEqual(client.score(*rows[0])[0], self.engine.score(*rows[0]))  # Connection still up
+
+    def test_csv_line_protocol(self):
+        with socket.create_connection(('127.0.0.1', self.port), timeout=5) as sock:
+            f = sock.makefile('rw')
+            f.write("80,10,90,10,90\n")
+            f.flush()
+            score, latency_us = f.readline().split(',')
+            self.assertAlmostEqual(float(score), self.engine.score(80, 10, 90, 10, 90), places=6)
+            f.write("80,abc\n")
+            f.flush()
+            self.assertTrue(f.readline().startswith('ERR'))
+
+    def test_concurrent_requests_are_batched(self):
+        with ScoreClient(port=self.port) as client:
+            before = client.stats()
+            result = asyncio.run_coroutine_threadsafe(run_load(clients=16, requests=20, port=self.port),
+                                                      self.loop).result()
+            after = client.stats()
+        self.assertEqual(result['requests'], 320)
+        self.assertGreater(result['mean_batch'], 1.0)
+        self.assertEqual(after['requests'] - before['requests'], 320)
+        self.assertLess(after['batches'] - before['batches'], 320)
+
+
+if __name__ == '__main__':
+    unittest.main()
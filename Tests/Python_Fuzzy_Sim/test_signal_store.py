@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from backtest import main as backtest_main, replay
+from batch_engine import SKFUZZY_TOLERANCE, BatchFuzzyEngine, INPUT_NAMES, v99_system
+from fuzzy_engine import BAND_LABELS, score_band
+from rule_loader import load_system
+from rule_stats import NO_RULE
+from signal_store import NO_RULE_ID, SignalStore
+from test_backtest import _random_ohlc, _write_bars
+
+
+class TestSignalStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'store')
+        self.engine = BatchFuzzyEngine(load_system())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_chunked_appends_round_trip(self):
+        rng = np.random.default_rng(0)
+        rows = rng.uniform(0, 100, (5000, 5))
+        store = SignalStore(self.path, self.engine.system)
+        for i in range(0, len(rows), 1200):
+            store.append_scored(self.engine, rows[i:i + 1200].T, stream='A' if i < 2400 else 'B')
+        store.append_scored(self.engine, (50, 10, 90, 10, 90), np.datetime64('2024-01-02T10:00'), 'GUI')
+
+        store = SignalStore(self.path)  # Reopened from disk
+        cols = store.columns()
+        self.assertEqual(len(store), 5001)
+        self.assertIsInstance(cols['score'], np.memmap)
+        score, strength = self.engine.score_batch(*rows.T, return_strengths=True)
+        np.testing.assert_allclose(cols['score'][:5000], score.astype(np.float32), rtol=0, atol=SKFUZZY_TOLERANCE)
+        for i, name in enumerate(INPUT_NAMES):
+            np.testing.assert_array_equal(cols[name][:5000], rows[:, i].astype(np.float32))
+        np.testing.assert_array_equal(cols['band'], score_band(cols['score']))
+        fired = strength.max(axis=1) > 0
+        np.testing.assert_array_equal(cols['rule'][:5000][fired], strength[fired].argmax(axis=1))
+        self.assertTrue((cols['rule'][:5000][~fired] == NO_RULE_ID).all())
+        self.assertTrue(np.isnat(cols['time'][:5000]).all())
+        self.assertEqual(cols['time'][-1], np.datetime64('2024-01-02T10:00'))
+        self.assertEqual(store.streams, ['A', 'B', 'GUI'])
+
+        s = store.summary(store.select(stream='GUI'))
+        self.assertEqual((s['rows'], s['rules'], s['bands']['STRONG BUY']), (1, {'B1': 1}, 0))
+        self.assertEqual(s['bands']['WEAK BUY'], 1)  # 60.0
+        s = store.summary()
+        self.assertEqual(sum(s['bands'].values()), 5001)
+        self.assertEqual(s['streams'], {'A': 2400, 'B': 2600, 'GUI': 1})
+        self.assertEqual(store.select(band='STRONG SELL').sum(), (cols['score'] < -60).sum())
+        self.assertEqual(store.select(rule='NOPE').sum(), 0)
+
+    def test_uncommitted_tail_ignored(self):
+        store = SignalStore(self.path, self.engine.system)
+        store.append_scored(self.engine, (np.arange(10.0),) * 5)
+        with open(os.path.join(self.path, 'score.bin'), 'ab') as f:
+            f.write(b'\0' * 12)  # A crash after writing some columns, before meta.json
+        self.assertEqual(len(SignalStore(self.path)), 10)
+        store.append_scored(self.engine, (np.arange(10.0, 20.0),) * 5)
+        cols = SignalStore(self.path).columns()
+        np.testing.assert_array_equal(cols['trend'], np.arange(20, dtype=np.float32))
+        np.testing.assert_allclose(cols['score'], self.engine.score_batch(*(np.arange(20.0),) * 5).astype(np.float32),
+                                   rtol=0, atol=SKFUZZY_TOLERANCE)
+
+    def test_other_rules_rejected(self):
+        SignalStore(self.path, self.engine.system)
+        with self.assertRaises(ValueError):
+            SignalStore(self.path, v99_system())
+        with self.assertRaises(ValueError):
+            SignalStore(os.path.join(self.tmp, 'missing'))
+
+    def test_backtest_writes_store(self):
+        rng = np.random.default_rng(1)
+        daily, h1 = os.path.join(self.tmp, 'd1.csv'), os.path.join(self.tmp, 'EURUSD_H1.csv')
+        _write_bars(daily, '2024-01-01T00:00', 24 * 60, _random_ohlc(rng, 20), with_time=False)
+        _write_bars(h1, '2024-01-01T00:00', 60, _random_ohlc(rng, 24 * 20))
+        backtest_main([daily, h1, '--store', self.path, '--chunk-rows', '100'])
+        expected = {k: np.concatenate(v) for k, v in zip(('time', 'score', 'rule'), zip(
+            *[(c['time'], c['score'], c['rule']) for c in replay(daily, h1, engine=self.engine, with_rule=True)]))}
+        store = SignalStore(self.path)
+        cols = store.columns()
+        self.assertEqual(store.streams, ['EURUSD_H1'])
+        np.testing.assert_array_equal(cols['time'], expected['time'])
+        np.testing.assert_array_equal(cols['score'], expected['score'].astype(np.float32))
+        np.testing.assert_array_equal(cols['rule'], np.where(expected['rule'] == NO_RULE, NO_RULE_ID, expected['rule']))
+        self.assertEqual(sum(store.summary()['bands'][b] for b in BAND_LABELS), len(store))
+
+
+if __name__ == '__main__':
+    unittest.main()
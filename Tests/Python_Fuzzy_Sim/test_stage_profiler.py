@@ -0,0 +1,104 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import numpy as np
+import backtest
+import stage_profiler
+from backtest import replay
+from batch_engine import BatchFuzzyEngine, v99_system
+from fuzzy_engine import create_fuzzy_system
+from fuzzy_simulator import create_skfuzzy_system
+from stage_profiler import PROFILE_ENV, profiled
+from symbol_scanner import scan_directory
+from test_backtest import _random_ohlc, _write_bars
+
+_ENV_PROBE = """
+import numpy as np
+from batch_engine import BatchFuzzyEngine
+BatchFuzzyEngine().score_batch(*np.random.default_rng(0).uniform(0, 100, (5, 1000)))
+"""
+
+
+class TestStageProfiler(unittest.TestCase):
+    def setUp(self):
+        self.rows = np.random.default_rng(0).uniform(0, 100, (5, 20000))
+        self.engine = BatchFuzzyEngine(chunk_size=4096)
+
+    def test_off_means_original_functions(self):
+        original = BatchFuzzyEngine.__dict__['fuzzify']
+        with profiled():
+            self.assertIsNot(BatchFuzzyEngine.__dict__['fuzzify'], original)
+        self.assertIs(BatchFuzzyEngine.__dict__['fuzzify'], original)
+        self.assertIsNone(stage_profiler.active())
+
+    def test_stage_tree(self):
+        expected = self.engine.score_batch(*self.rows)
+        with profiled() as prof:
+            scores = self.engine.score_batch(*self.rows)
+        np.testing.assert_array_equal(scores, expected)
+        root = ('BatchFuzzyEngine.score_batch',)
+        chunk = root + ('BatchFuzzyEngine._score_chunk',)
+        self.assertEqual(prof.stages[root][0], 1)
+        self.assertEqual(prof.stages[chunk][0], 5)
+        for stage in ('fuzzify', 'rule_strengths', 'term_activations', 'defuzzify'):
+            self.assertEqual(prof.stages[chunk + (f'BatchFuzzyEngine.{stage}',)][0], 5)
+        for s in prof.summary():
+            self.assertLessEqual(s['self_s'], s['total_s'])
+        stages = prof.by_stage()
+        self.assertEqual(stages['BatchFuzzyEngine.fuzzify']['calls'], 5)
+
+        # Collapsed self times add up to the root's total
+        folded = [line.rsplit(' ', 1) for line in prof.collapsed().splitlines()]
+        self.assertIn(';'.join(chunk + ('BatchFuzzyEngine.fuzzify',)), [path for path, _ in folded])
+        self.assertAlmostEqual(sum(int(us) for _, us in folded) / 1e6, prof.stages[root][1] / 1e9, delta=0.01)
+
+    def test_single_row_and_skfuzzy_paths(self):
+        sim, _ = create_fuzzy_system()
+        reference, _ = create_skfuzzy_system()
+        with profiled() as prof:
+            for s in (sim, reference):
+                for name, value in zip(('trend', 'wick_up', 'wick_lo', 'h1_bear', 'h1_bull'), (80, 10, 90, 10, 90)):
+                    s.input[name] = value
+                s.compute()
+        stages = prof.by_stage()
+        self.assertEqual(stages['FuzzySimulation.compute']['calls'], 1)
+        self.assertEqual(stages['IncrementalEvaluator.evaluate']['calls'], 1)
+        for stage in ('skfuzzy.Simulation.compute', 'skfuzzy.Crisp.fuzz', 'skfuzzy.Simulation.compute_rule',
+                      'skfuzzy.Simulation.defuzz_consequents', 'skfuzzy.defuzz', 'skfuzzy.RuleOrder.__iter__', 'skfuzzy.Rule.graph'):
+            self.assertGreater(stages[stage]['calls'], 0, stage)
+        self.assertIn(('skfuzzy.Simulation.compute', 'skfuzzy.Simulation.defuzz_consequents',
+                       'skfuzzy.Crisp.find_memberships'), prof.stages)
+
+    def test_module_stages_called_through_module(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rng = np.random.default_rng(0)
+            for symbol in ('EURUSD', 'GBPUSD'):
+                _write_bars(os.path.join(tmp, f'{symbol}_D1.csv'), '2024-01-01T00:00', 24 * 60,
+                            _random_ohlc(rng, 5), with_time=False)
+                _write_bars(os.path.join(tmp, f'{symbol}_H1.csv'), '2024-01-01T00:00', 60, _random_ohlc(rng, 24 * 5))
+            with profiled() as prof:
+                self.assertIsNot(replay, backtest.replay)  # Bound at import: never timed
+                scan_directory(tmp, os.path.join(tmp, 'signals.csv'), workers=1, system=v99_system())
+        stages = prof.by_stage()
+        self.assertEqual(stages['backtest.replay']['calls'], 2)
+        self.assertEqual(stages['backtest.read_all_bars']['calls'], 2)
+        self.assertEqual(stages['symbol_scanner.merge_parts']['calls'], 1)
+        self.assertIn(('backtest.replay', 'BatchFuzzyEngine.score_batch'), prof.stages)
+
+    def test_environment_switch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            prefix = os.path.join(tmp, 'run')
+            subprocess.run([sys.executable, '-c', _ENV_PROBE], env=dict(os.environ, **{PROFILE_ENV: prefix}),
+                           cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, check=True)
+            with open(prefix + '.json') as f:
+                data = json.load(f)
+            self.assertEqual(data['stages']['BatchFuzzyEngine.score_batch']['calls'], 1)
+            with open(prefix + '.folded') as f:
+                self.assertTrue(f.readline().startswith('BatchFuzzyEngine.score_batch '))
+
+
+if __name__ == '__main__':
+    unittest.main()
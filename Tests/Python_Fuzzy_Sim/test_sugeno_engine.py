@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+from batch_engine import SKFUZZY_TOLERANCE, BatchFuzzyEngine
+from fuzzy_engine import score_band
+from response_surface import critical_values, grid_axes
+from rule_loader import load_system, read_targets
+from sugeno_engine import SugenoEngine, accuracy, borderline, two_pass
+
+
+class TestSugenoEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.system = load_system()
+        cls.sugeno = SugenoEngine(cls.system)
+        cls.engine = BatchFuzzyEngine(cls.system)
+        cls.rows = np.random.default_rng(0).uniform(-5, 105, (5000, 5))
+
+    def test_weighted_average_of_targets(self):
+        # Reference: float64 strengths from the Mamdani engine, averaged per row
+        targets = read_targets()
+        t = np.array([targets[r] for r in self.system.rule_ids])
+        _, strength = self.engine.score_batch(*self.rows.T, return_strengths=True)
+        w = strength.sum(axis=1)
+        expected = np.where(w > 0, strength @ t / np.where(w > 0, w, 1), 0.0)
+        scores, fired = self.sugeno.score_batch(*self.rows.T, return_fired=True)
+        np.testing.assert_allclose(scores, expected, atol=1e-3)
+        np.testing.assert_array_equal(fired, w > 0)
+
+    def test_single_rule_scores_its_target(self):
+        # Bullish, strong lower wick, strong bull break: only U1 fires
+        self.assertAlmostEqual(self.sugeno.score(80, 10, 90, 10, 90), read_targets()['U1'], places=4)
+        self.assertEqual(self.sugeno.score(50, 10, 10, 10, 10), 0.0)  # Nothing fires
+
+    def test_missing_target_is_an_error(self):
+        with self.assertRaises(ValueError):
+            SugenoEngine(self.system, targets={})
+
+    def test_fires_just_past_a_breakpoint(self):
+        # 70.000001 rounds to 70.0 in float32, where U1's bull-break term is 0
+        row = (70.000001, 1e-6, 82.5, 27.5, 70.000001)
+        score, fired = self.sugeno.score_batch(*row, return_fired=True)
+        self.assertTrue(fired[0])
+        self.assertEqual(score_band(score)[0], score_band(self.engine.score(*row)))
+
+    def test_two_pass_with_safe_margin_matches_bands(self):
+        stats = accuracy(self.sugeno, self.engine, step=20.0, margins=(0,))
+        self.assertGreaterEqual(stats['safe_margin'], stats['max'])
+        rng = np.random.default_rng(12345)  # Independent of the rows the margin was sampled on
+        uniform = rng.uniform(0, 100, (5, 20000))
+        near_kinks = np.stack([rng.choice(v, 20000) for v in critical_values(self.system, grid_axes(5.0), (-1e-3, 0.25))])
+        for rows in (uniform, near_kinks):
+            mamdani = self.engine.score_batch(*rows)
+            scores, exact = two_pass(self.sugeno, self.engine, rows, stats['safe_margin'])
+            np.testing.assert_allclose(scores[exact], mamdani[exact], rtol=0, atol=SKFUZZY_TOLERANCE)
+            # Scores exactly on an edge (plateaus at +-20) flip with batch composition
+            stable = ~borderline(mamdani, SKFUZZY_TOLERANCE)
+            np.testing.assert_array_equal(score_band(scores)[stable], score_band(mamdani)[stable])
+        self.assertLess(exact.mean(), 0.8)
+        np.testing.assert_array_equal(borderline(np.array([19.0, 0.0]), 1.0), [True, False])
+
+    def test_accuracy_report(self):
+        stats = accuracy(self.sugeno, self.engine, step=20.0, margins=(0, 100))
+        self.assertEqual(stats['rows'], 6 ** 5)
+        self.assertEqual(stats['confusion'].sum(), stats['rows'])
+        self.assertEqual(stats['screening'][-1]['band_agreement'], 1.0)  # Margin 100: every firing row exact
+
+
+if __name__ == '__main__':
+    unittest.main()
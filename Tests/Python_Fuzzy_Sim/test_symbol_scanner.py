@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from backtest import replay, write_signals
+from batch_engine import BatchFuzzyEngine, v99_system
+from response_surface import load_surface
+from signal_store import NO_RULE_ID, SignalStore
+from symbol_scanner import SharedSystem, _SurfaceScorer, discover, scan_directory
+from test_backtest import _random_ohlc, _write_bars
+
+
+class TestSymbolScanner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.bars = os.path.join(self.tmp, 'bars')
+        os.mkdir(self.bars)
+        rng = np.random.default_rng(0)
+        for symbol, days in (('EURUSD', 12), ('GBPUSD', 9), ('XAUUSD', 15)):
+            _write_bars(os.path.join(self.bars, f'{symbol}_D1.csv'), '2024-01-01T00:00', 24 * 60,
+                        _random_ohlc(rng, days), with_time=False)
+            _write_bars(os.path.join(self.bars, f'{symbol}_H1_export.csv'), '2024-01-01T00:00', 60,
+                        _random_ohlc(rng, 24 * days))
+        _write_bars(os.path.join(self.bars, 'EURUSD_M30.csv'), '2024-01-03T00:00', 30, _random_ohlc(rng, 48 * 5))
+        _write_bars(os.path.join(self.bars, 'USDJPY_H1.csv'), '2024-01-01T00:00', 60, _random_ohlc(rng, 48))
+        self.system = v99_system()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_discover(self):
+        streams = discover(self.bars)
+        self.assertEqual([(s, tf) for s, tf, _, _ in streams],
+                         [('EURUSD', 'M30'), ('EURUSD', 'H1'), ('GBPUSD', 'H1'), ('XAUUSD', 'H1')])  # No USDJPY D1
+        self.assertTrue(all(d.endswith(f'{s}_D1.csv') for s, _, d, _ in streams))
+
+    def test_shared_system_round_trip(self):
+        shared = SharedSystem(self.system)
+        try:
+            system, shm = SharedSystem.attach(shared.handle)
+            self.assertEqual(system.fingerprint(), self.system.fingerprint())
+            self.assertFalse(system.rule_terms.flags.writeable)
+            engine = BatchFuzzyEngine(system)
+            self.assertEqual(engine.score(80, 10, 90, 20, 70), BatchFuzzyEngine(self.system).score(80, 10, 90, 20, 70))
+            del system, engine
+        finally:
+            shared.close()
+
+    def test_merged_output_matches_replay(self):
+        out = os.path.join(self.tmp, 'signals.csv')
+        stats = scan_directory(self.bars, out, workers=2, system=self.system, chunk_rows=50)
+        self.assertEqual((stats['symbols'], stats['streams']), (3, 4))
+        with open(out) as f:
+            header, *lines = f.read().splitlines()
+        self.assertEqual(header, 'symbol,timeframe,time,trend,wick_up,wick_lo,h1_bear,h1_bull,score')
+        self.assertEqual(stats['bars'], len(lines))
+        times = [line.split(',')[2] for line in lines]
+        self.assertEqual(times, sorted(times))
+
+        engine = BatchFuzzyEngine(self.system)
+        for symbol, tf, daily, bars in discover(self.bars):
+            expected = os.path.join(self.tmp, f'{symbol}_{tf}.csv')
+            write_signals(replay(daily, bars, engine=engine, break_period=48 if tf == 'M30' else 24), expected)
+            with open(expected) as f:
+                want = f.read().splitlines()[1:]
+            got = [line.split(',', 2)[2] for line in lines if line.startswith(f'{symbol},{tf},')]
+            self.assertEqual(got, want)
+
+    def test_surface_workers_share_table(self):
+        out, path, cache = (os.path.join(self.tmp, name) for name in ('signals.csv', 'store', 'cache'))
+        stats = scan_directory(self.bars, out, workers=2, surface=True, system=self.system, chunk_rows=50,
+                               store=path, surface_step=25.0, cache_dir=cache)
+        self.assertEqual(len(os.listdir(cache)), 2)  # One table + meta, built by the parent
+        with open(out) as f:
+            lines = f.read().splitlines()[1:]
+        self.assertEqual(stats['bars'], len(lines))
+
+        scorer = _SurfaceScorer(load_surface(self.system, 25.0, cache_dir=cache))
+        for symbol, tf, daily, bars in discover(self.bars):
+            expected = os.path.join(self.tmp, f'{symbol}_{tf}.csv')
+            write_signals(replay(daily, bars, engine=scorer, break_period=48 if tf == 'M30' else 24), expected)
+            with open(expected) as f:
+                want = f.read().splitlines()[1:]
+            self.assertEqual([line.split(',', 2)[2] for line in lines if line.startswith(f'{symbol},{tf},')], want)
+        self.assertTrue((SignalStore(path).columns(['rule'])['rule'] == NO_RULE_ID).all())
+
+    def test_store_output(self):
+        out, path = os.path.join(self.tmp, 'signals.csv'), os.path.join(self.tmp, 'store')
+        stats = scan_directory(self.bars, out, workers=2, system=self.system, chunk_rows=50, store=path)
+        with open(out) as f:
+            lines = [line.split(',') for line in f.read().splitlines()[1:]]
+        store = SignalStore(path)
+        cols = store.columns()
+        self.assertEqual(len(store), stats['bars'])
+        self.assertEqual([store.streams[i] for i in cols['stream']], [f'{l[0]},{l[1]}' for l in lines])
+        self.assertEqual(np.datetime_as_string(cols['time'], unit='m').tolist(), [l[2] for l in lines])
+        np.testing.assert_allclose(cols['score'], [float(l[-1]) for l in lines], atol=0.005)
+        self.assertTrue((cols['rule'] != NO_RULE_ID).any())
+        self.assertEqual(SignalStore(path).summary(store.select(stream='XAUUSD,H1'))['rows'],
+                         sum(l[0] == 'XAUUSD' for l in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
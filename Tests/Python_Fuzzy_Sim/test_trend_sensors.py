@@ -0,0 +1,72 @@
+import unittest
+import numpy as np
+from trend_sensors import (MAJOR_ZIGZAG, MINOR_ZIGZAG, RSI, ZigZag, infer_point, rsi_reference, rsi_score,
+                           trend_input, zigzag_reference, zigzag_score, zigzag_score_reference,
+                           zigzag_vertices_reference)
+
+
+def _random_bars(seed, n, tick=1e-5, step=2e-4):
+    # Coarse ticks so equal highs / lows (the indicator's tie paths) occur often
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, step, n))
+    open_ = np.concatenate([[1.1], close[:-1]])
+    high = np.maximum(open_, close) + rng.exponential(step / 2, n)
+    low = np.minimum(open_, close) - rng.exponential(step / 2, n)
+    snap = lambda x: np.round(x / (tick * 10)) * tick * 10
+    return snap(open_).tolist(), snap(high).tolist(), snap(low).tolist(), snap(close).tolist()
+
+
+class TestTrendSensors(unittest.TestCase):
+    N_BARS = 320
+
+    def _check_zigzag(self, params, seed):
+        opens, high, low, _ = _random_bars(seed, self.N_BARS)
+        zz = ZigZag(*params, point=1e-5)
+        for i in range(self.N_BARS):
+            # Forming bar at its first tick, then completed
+            ref = zigzag_vertices_reference(zigzag_reference(high[:i] + [opens[i]], low[:i] + [opens[i]],
+                                                             *params, point=1e-5))
+            self.assertEqual(zz.points(opens[i], opens[i]), None if ref is None else tuple(ref), (params, i))
+            zz.push(high[i], low[i])
+            ref = zigzag_vertices_reference(zigzag_reference(high[:i + 1], low[:i + 1], *params, point=1e-5))
+            self.assertEqual(zz.points(), None if ref is None else tuple(ref), (params, i))
+
+    def test_zigzag_matches_mql5_every_bar(self):
+        for seed, params in enumerate([MAJOR_ZIGZAG, MINOR_ZIGZAG, (12, 0, 3)]):
+            self._check_zigzag(params, seed)
+
+    def test_zigzag_needs_100_bars(self):
+        _, high, low, _ = _random_bars(0, 99)
+        zz = ZigZag(*MINOR_ZIGZAG)
+        for h, l in zip(high, low):
+            zz.push(h, l)
+        self.assertIsNone(zz.points())
+
+    def test_zigzag_score_matches_mql5(self):
+        rng = np.random.default_rng(1)
+        rows = np.round(rng.uniform(1.0, 1.2, (2000, 5)), 2)  # Ties and flat ranges included
+        rows[:50, 1:] = rows[:50, 1:2]
+        expected = [zigzag_score_reference(r) for r in rows.tolist()]
+        np.testing.assert_array_equal(zigzag_score(rows[:, 0], rows[:, 1:]), expected)
+
+    def test_rsi_chunks_match_mql5(self):
+        _, _, _, close = _random_bars(2, 500)
+        rsi = RSI(14)
+        got = np.concatenate([rsi.update(close[a:b]) for a, b in [(0, 5), (5, 15), (15, 16), (16, 200), (200, 500)]])
+        self.assertTrue(np.isnan(got[:14]).all())
+        np.testing.assert_allclose(got[14:], rsi_reference(close, 14)[14:], rtol=0, atol=1e-9)
+
+    def test_rsi_zero_is_not_unfilled(self):
+        close = 1.2 - 0.001 * np.arange(20)  # Every bar of the seed window closes lower
+        rsi = RSI(14).update(close)
+        np.testing.assert_array_equal(rsi[14:], 0.0)
+        np.testing.assert_array_equal(rsi_score(rsi), [0.0] * 14 + [-1.0] * 6)
+
+    def test_trend_input_mapping(self):
+        self.assertEqual(trend_input(np.array([1.0]), rsi_score([np.nan]))[0], 75.0)  # RSI not ready = 0
+        self.assertEqual(trend_input(-1.0), 0.0)
+        self.assertEqual(infer_point([1.10035, 1.1]), 1e-5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,477 @@
+import argparse
+import time
+from collections import deque
+import numpy as np
+from scipy.signal import lfilter
+from stage_profiler import register_stages
+
+# ==========================================
+# 1. SETTINGS (Match FuzzyLogicBasedOnTan.mq5 / Includes/Trend)
+# ==========================================
+
+MAJOR_ZIGZAG = (12, 5, 3)   # D1 iCustom("Examples\\ZigZag", depth, deviation, backstep)
+MINOR_ZIGZAG = (5, 2, 2)    # H1
+RSI_PERIOD = 14
+
+ZIGZAG_MIN_BARS = 100       # ZigZag.mq5 draws nothing below this many bars
+COPY_BARS = 1000            # CZigZagModule::GetZigZagVertices CopyBuffer count
+N_VERTICES = 4              # P1..P4
+EMPTY_VALUE = np.finfo(np.float64).max
+
+
+def infer_point(prices, max_digits=8):
+    """Symbol _Point guessed from the decimals present in a price export."""
+    prices = np.asarray(prices, dtype=np.float64)
+    for digits in range(max_digits + 1):
+        scaled = prices * 10.0 ** digits
+        if np.all(np.abs(scaled - np.round(scaled)) < 1e-3):
+            return 10.0 ** -digits
+    return 10.0 ** -max_digits
+
+
+# ==========================================
+# 2. MQL5 REFERENCE (Line-by-line, full recalculation - used by the checks)
+# ==========================================
+
+def zigzag_reference(high, low, depth=12, deviation=5, backstep=3, point=1e-5):
+    """ZigZagBuffer of Examples\\ZigZag.mq5 after its first (full) pass."""
+    n = len(high)
+    zz, high_map, low_map = np.zeros(n), np.zeros(n), np.zeros(n)
+    if n < ZIGZAG_MIN_BARS:
+        return zz
+    dev = deviation * point
+    last_low = last_high = 0.0
+    for shift in range(depth, n):
+        val = min(low[shift - depth + 1:shift + 1])
+        if val == last_low:
+            val = 0.0
+        else:
+            last_low = val
+            if low[shift] - val > dev:
+                val = 0.0
+            else:
+                for back in range(1, backstep + 1):
+                    res = low_map[shift - back]
+                    if res != 0 and res > val:
+                        low_map[shift - back] = 0.0
+        low_map[shift] = val if low[shift] == val else 0.0
+
+        val = max(high[shift - depth + 1:shift + 1])
+        if val == last_high:
+            val = 0.0
+        else:
+            last_high = val
+            if val - high[shift] > dev:
+                val = 0.0
+            else:
+                for back in range(1, backstep + 1):
+                    res = high_map[shift - back]
+                    if res != 0 and res < val:
+                        high_map[shift - back] = 0.0
+        high_map[shift] = val if high[shift] == val else 0.0
+
+    search, last_low, last_high, last_low_pos, last_high_pos = 0, 0.0, 0.0, 0, 0
+    for shift in range(depth, n):
+        if search == 0:  # Extremum
+            if last_low == 0.0 and last_high == 0.0:
+                if high_map[shift] != 0:
+                    last_high, last_high_pos, search = high[shift], shift, -1
+                    zz[shift] = last_high
+                if low_map[shift] != 0.0:
+                    last_low, last_low_pos, search = low[shift], shift, 1
+                    zz[shift] = last_low
+        elif search == 1:  # Peak
+            if low_map[shift] != 0.0 and low_map[shift] < last_low and high_map[shift] == 0.0:
+                zz[last_low_pos] = 0.0
+                last_low_pos, last_low = shift, low_map[shift]
+                zz[shift] = last_low
+            if high_map[shift] != 0.0 and low_map[shift] == 0.0:
+                last_high, last_high_pos = high_map[shift], shift
+                zz[shift] = last_high
+                search = -1
+        else:  # Bottom
+            if high_map[shift] != 0.0 and high_map[shift] > last_high and low_map[shift] == 0.0:
+                zz[last_high_pos] = 0.0
+                last_high_pos, last_high = shift, high_map[shift]
+                zz[shift] = last_high
+            if low_map[shift] != 0.0 and high_map[shift] == 0.0:
+                last_low, last_low_pos = low_map[shift], shift
+                zz[shift] = last_low
+                search = 1
+    return zz
+
+
+def zigzag_vertices_reference(zz):
+    """CZigZagModule::GetZigZagVertices: P1..P4, skipping the forming bar."""
+    buff = zz[::-1][:COPY_BARS]  # ArraySetAsSeries + CopyBuffer(handle, 0, 0, 1000)
+    points = []
+    for i in range(1, len(buff)):
+        if buff[i] != 0.0 and buff[i] != EMPTY_VALUE:
+            points.append(buff[i])
+            if len(points) >= N_VERTICES:
+                break
+    return points if len(points) >= N_VERTICES else None
+
+
+def zigzag_score_reference(p):
+    """CZigZagModule::Calculate on pts[0..4] (pts[0] = current price)."""
+    max_h = min_l = p[1]
+    for i in range(2, 5):
+        max_h = max(max_h, p[i])
+        min_l = min(min_l, p[i])
+    if max_h <= min_l:
+        score_pos = 0.0
+    else:
+        rng = max_h - min_l
+        mid = min_l + (rng / 2.0)
+        score_pos = min(max((p[0] - mid) / (rng / 2.0), -1.2), 1.2)
+
+    score_bias = 0.0
+    if p[1] > p[2]:
+        score_bias += 0.5 if p[1] > p[3] else -0.5
+        score_bias += 0.5 if p[2] > p[4] else -0.5
+    else:
+        score_bias += 0.5 if p[1] > p[3] else -0.5
+        score_bias += 0.5 if p[2] > p[4] else -0.5
+
+    total = (score_pos * 0.6) + (score_bias * 0.4)
+    return min(max(total, -1.0), 1.0)
+
+
+def rsi_reference(close, period=RSI_PERIOD):
+    """ExtRSIBuffer of Examples\\RSI.mq5 after its first (full) pass."""
+    n = len(close)
+    rsi, pos, neg = np.zeros(n), np.zeros(n), np.zeros(n)
+    if n <= period:
+        return rsi
+    sum_pos = sum_neg = 0.0
+    for i in range(1, period + 1):
+        diff = close[i] - close[i - 1]
+        sum_pos += diff if diff > 0 else 0
+        sum_neg += -diff if diff < 0 else 0
+    pos[period], neg[period] = sum_pos / period, sum_neg / period
+    for i in range(period, n):
+        if i > period:
+            diff = close[i] - close[i - 1]
+            pos[i] = (pos[i - 1] * (period - 1) + (diff if diff > 0.0 else 0.0)) / period
+            neg[i] = (neg[i - 1] * (period - 1) + (-diff if diff < 0.0 else 0.0)) / period
+        if neg[i] != 0.0:
+            rsi[i] = 100.0 - (100.0 / (1.0 + pos[i] / neg[i]))
+        else:
+            rsi[i] = 100.0 if pos[i] != 0.0 else 50.0
+    return rsi
+
+
+# ==========================================
+# 3. INCREMENTAL PORT (O(1) work per new bar)
+# ==========================================
+
+class _Selection:
+    """State of ZigZag.mq5's final extremum-selection loop."""
+    __slots__ = ('search', 'last_low', 'last_high', 'last_low_pos', 'last_high_pos', 'vertices')
+
+    def __init__(self):
+        self.search, self.last_low, self.last_high = 0, 0.0, 0.0
+        self.last_low_pos = self.last_high_pos = 0
+        self.vertices = deque(maxlen=2 * N_VERTICES)  # [pos, value], oldest first
+
+    def copy(self):
+        other = _Selection.__new__(_Selection)
+        other.search, other.last_low, other.last_high = self.search, self.last_low, self.last_high
+        other.last_low_pos, other.last_high_pos = self.last_low_pos, self.last_high_pos
+        other.vertices = deque(self.vertices, maxlen=self.vertices.maxlen)
+        return other
+
+    def _set(self, pos, value):
+        if self.vertices and self.vertices[-1][0] == pos:
+            self.vertices[-1] = (pos, value)
+        else:
+            self.vertices.append((pos, value))
+
+    def _clear(self, pos):
+        if self.vertices and self.vertices[-1][0] == pos:
+            self.vertices.pop()
+
+    def step(self, shift, high, low, high_map, low_map):
+        if self.search == 0:
+            if self.last_low == 0.0 and self.last_high == 0.0:
+                if high_map != 0:
+                    self.last_high, self.last_high_pos, self.search = high, shift, -1
+                    self._set(shift, high)
+                if low_map != 0.0:
+                    self.last_low, self.last_low_pos, self.search = low, shift, 1
+                    self._set(shift, low)
+        elif self.search == 1:
+            if low_map != 0.0 and low_map < self.last_low and high_map == 0.0:
+                self._clear(self.last_low_pos)
+                self.last_low_pos, self.last_low = shift, low_map
+                self._set(shift, low_map)
+            if high_map != 0.0 and low_map == 0.0:
+                self.last_high, self.last_high_pos, self.search = high_map, shift, -1
+                self._set(shift, high_map)
+        else:
+            if high_map != 0.0 and high_map > self.last_high and low_map == 0.0:
+                self._clear(self.last_high_pos)
+                self.last_high_pos, self.last_high = shift, high_map
+                self._set(shift, high_map)
+            if low_map != 0.0 and high_map == 0.0:
+                self.last_low, self.last_low_pos, self.search = low_map, shift, 1
+                self._set(shift, low_map)
+
+
+class ZigZag:
+    """Examples\\ZigZag.mq5, one bar at a time.
+
+    The indicator's map pass may still erase the last ``backstep`` map
+    entries, so only those bars are kept and re-run through the selection
+    loop on each query; everything older is committed. Window min/max use
+    monotonic deques. Per bar: O(backstep), independent of history length,
+    instead of the module's 1000-bar CopyBuffer rescan.
+    """
+
+    def __init__(self, depth=12, deviation=5, backstep=3, point=1e-5):
+        self.depth, self.backstep = depth, backstep
+        self.deviation = deviation * point
+        self.n = 0
+        self._lows, self._highs = deque(), deque()  # (pos, value) over the last depth-1 bars
+        self._last_low = self._last_high = 0.0      # Map-pass trackers
+        self._tail = deque()                        # [high, low, high_map, low_map] of the last backstep bars
+        self._committed = _Selection()
+
+    def _map(self, high, low, tail, trackers):
+        """Map-pass step for bar ``self.n`` (mutates ``tail`` map entries)."""
+        if self.n < self.depth:
+            return 0.0, 0.0
+        val_lo = min(low, self._lows[0][1]) if self._lows else low
+        val_hi = max(high, self._highs[0][1]) if self._highs else high
+        if val_lo == trackers[0]:
+            val_lo = 0.0
+        else:
+            trackers[0] = val_lo
+            if low - val_lo > self.deviation:
+                val_lo = 0.0
+            else:
+                for bar in tail:
+                    if bar[3] != 0 and bar[3] > val_lo:
+                        bar[3] = 0.0
+        if val_hi == trackers[1]:
+            val_hi = 0.0
+        else:
+            trackers[1] = val_hi
+            if val_hi - high > self.deviation:
+                val_hi = 0.0
+            else:
+                for bar in tail:
+                    if bar[2] != 0 and bar[2] < val_hi:
+                        bar[2] = 0.0
+        return (val_hi if high == val_hi else 0.0), (val_lo if low == val_lo else 0.0)
+
+    def push(self, high, low):
+        """Append a completed bar."""
+        trackers = [self._last_low, self._last_high]
+        high_map, low_map = self._map(high, low, self._tail, trackers)
+        self._last_low, self._last_high = trackers
+        self._tail.append([high, low, high_map, low_map])
+        if len(self._tail) > self.backstep:
+            bar = self._tail.popleft()
+            shift = self.n - self.backstep
+            if shift >= self.depth:
+                self._committed.step(shift, *bar)
+
+        window = self.depth - 1
+        for q, value, worse in ((self._lows, low, lambda a, b: a >= b), (self._highs, high, lambda a, b: a <= b)):
+            while q and worse(q[-1][1], value):
+                q.pop()
+            q.append((self.n, value))
+            while q[0][0] <= self.n - window:
+                q.popleft()
+        self.n += 1
+
+    def points(self, high=None, low=None):
+        """P1..P4 (most recent first) as CZigZagModule reads them, or None.
+
+        With ``high``/``low`` they describe the forming bar (not committed);
+        without, the last pushed bar is the forming one.
+        """
+        if high is None:
+            rates_total, tail = self.n, [list(b) for b in self._tail]
+        else:
+            tail = [list(b) for b in self._tail]
+            high_map, low_map = self._map(high, low, tail, [self._last_low, self._last_high])
+            tail.append([high, low, high_map, low_map])
+            rates_total = self.n + 1
+        if rates_total < ZIGZAG_MIN_BARS:
+            return None
+
+        selection = self._committed.copy()
+        first = rates_total - len(tail)
+        for i, bar in enumerate(tail):
+            if first + i >= self.depth:
+                selection.step(first + i, *bar)
+        oldest = rates_total - COPY_BARS
+        found = [v for pos, v in reversed(selection.vertices) if oldest <= pos < rates_total - 1]
+        return tuple(found[:N_VERTICES]) if len(found) >= N_VERTICES else None
+
+
+class RSI:
+    """Examples\\RSI.mq5 over a stream of closes, one chunk at a time.
+
+    Wilder smoothing is a first-order IIR filter, so each chunk is one
+    ``lfilter`` call seeded with the previous chunk's state.
+    """
+
+    def __init__(self, period=RSI_PERIOD):
+        self.period = period
+        self.n = 0
+        self._prev = None
+        self._seed = [0.0, 0.0]   # Gain / loss sums over the first period diffs
+        self._avg = None          # Last smoothed (gain, loss)
+
+    def update(self, close):
+        """RSI of each bar in ``close`` (NaN until ``period`` diffs exist;
+        RSI.mq5 writes 0.0 there, which a real all-loss RSI also reads)."""
+        close = np.asarray(close, dtype=np.float64)
+        index = np.arange(self.n, self.n + len(close))
+        prev = np.concatenate([[close[0] if self._prev is None else self._prev], close[:-1]])
+        diff = close - prev  # 0 for the very first bar, which has no diff
+        gain, loss = np.maximum(diff, 0.0), np.maximum(-diff, 0.0)
+        self._prev, self.n = close[-1], self.n + len(close)
+
+        avg_gain, avg_loss = np.zeros(len(close)), np.zeros(len(close))
+        seeding = index <= self.period
+        if seeding.any():
+            self._seed[0] += gain[seeding].sum()
+            self._seed[1] += loss[seeding].sum()
+            at = np.flatnonzero(index == self.period)
+            if len(at):
+                self._avg = (self._seed[0] / self.period, self._seed[1] / self.period)
+                avg_gain[at], avg_loss[at] = self._avg
+        smooth = ~seeding
+        if smooth.any():
+            a, b = [1.0, -(self.period - 1) / self.period], [1.0 / self.period]
+            avg_gain[smooth] = lfilter(b, a, gain[smooth], zi=[-a[1] * self._avg[0]])[0]
+            avg_loss[smooth] = lfilter(b, a, loss[smooth], zi=[-a[1] * self._avg[1]])[0]
+            self._avg = (avg_gain[-1], avg_loss[-1])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = np.where(avg_loss != 0.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss),
+                           np.where(avg_gain != 0.0, 100.0, 50.0))
+        rsi[index < self.period] = np.nan
+        return rsi
+
+
+# ==========================================
+# 4. SCORES (Vectorized CZigZagModule / CRSIModule / EvaluateTrend)
+# ==========================================
+
+def zigzag_score(price, points):
+    """CZigZagModule::Calculate for arrays: ``points`` is (..., 4) P1..P4."""
+    p = np.asarray(points, dtype=np.float64)
+    max_h, min_l = p.max(axis=-1), p.min(axis=-1)
+    rng = max_h - min_l
+    mid = min_l + (rng / 2.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score_pos = np.clip((price - mid) / (rng / 2.0), -1.2, 1.2)
+    score_pos = np.where(max_h <= min_l, 0.0, score_pos)
+    # Both leg cases of CalcStructureBias compare P1 vs P3 and P2 vs P4
+    score_bias = np.where(p[..., 0] > p[..., 2], 0.5, -0.5) + np.where(p[..., 1] > p[..., 3], 0.5, -0.5)
+    return np.clip((score_pos * 0.6) + (score_bias * 0.4), -1.0, 1.0)
+
+
+def rsi_score(rsi):
+    """CRSIModule::Calculate; bars the indicator has not filled yet (NaN) give 0."""
+    rsi = np.asarray(rsi, dtype=np.float64)
+    return np.where(np.isnan(rsi), 0.0, np.clip((rsi - 50.0) / 50.0, -1.0, 1.0))
+
+
+def trend_input(*scores):
+    """CTrendFuzzyEngine::EvaluateTrend (mean of sensors) mapped to the 0-100
+    fuzzy input the way RunFuzzyLogic does: (score + 1) * 50."""
+    return (np.mean(np.broadcast_arrays(*scores), axis=0) + 1.0) * 50.0
+
+
+class TrendSensors:
+    """Replay-side sensor collector: Major ZigZag on the daily bars plus
+    (optionally) RSI on the H1 closes, combined like EvaluateTrend.
+
+    The ZigZag vertices for a day are taken at its first tick (forming D1
+    bar = its open); the current price is each H1 close.
+    """
+
+    def __init__(self, daily, zigzag=MAJOR_ZIGZAG, rsi_period=RSI_PERIOD, point=None):
+        point = point or infer_point(daily['close'])
+        zz = ZigZag(*zigzag, point=point)
+        n_days = len(daily['open'])
+        self.points = np.zeros((n_days + 1, N_VERTICES))
+        self.valid = np.zeros(n_days + 1, dtype=bool)
+        opens, highs, lows = daily['open'].tolist(), daily['high'].tolist(), daily['low'].tolist()
+        for day in range(n_days + 1):
+            first_tick = opens[day] if day < n_days else float(daily['close'][-1])
+            p = zz.points(first_tick, first_tick)
+            if p is not None:
+                self.points[day], self.valid[day] = p, True
+            if day < n_days:
+                zz.push(highs[day], lows[day])
+        self.rsi = RSI(rsi_period) if rsi_period else None
+
+    def update(self, completed_days, close):
+        """0-100 trend input for consecutive H1 bars; ``completed_days`` is
+        the number of daily bars closed before each of them."""
+        scores = [np.where(self.valid[completed_days],
+                           zigzag_score(close, self.points[completed_days]), 0.0)]
+        if self.rsi is not None:
+            scores.append(rsi_score(self.rsi.update(close)))
+        return trend_input(*scores)
+
+
+register_stages(TrendSensors, 'update')
+
+
+# ==========================================
+# 5. CHECK (Port vs. MQL5 reference on a recorded bar export)
+# ==========================================
+
+def check(path, zigzag=MAJOR_ZIGZAG, rsi_period=RSI_PERIOD, point=None, samples=300):
+    from backtest import read_all_bars
+
+    bars = read_all_bars(path)
+    high, low, close = bars['high'].tolist(), bars['low'].tolist(), bars['close'].tolist()
+    point = point or infer_point(bars['close'])
+    n = len(high)
+    at = set(np.linspace(0, n - 1, min(samples, n)).astype(int).tolist())
+
+    zz, rsi = ZigZag(*zigzag, point=point), RSI(rsi_period)
+    port_zz, port_rsi = {}, rsi.update(bars['close'])
+    t0 = time.perf_counter()
+    for i in range(n):
+        zz.push(high[i], low[i])
+        if i in at:
+            p = zz.points()
+            port_zz[i] = float(zigzag_score(close[i], p)) if p is not None else 0.0
+    t_port = time.perf_counter() - t0
+
+    t0, zz_err = time.perf_counter(), 0.0
+    for i in sorted(at):
+        p = zigzag_vertices_reference(zigzag_reference(high[:i + 1], low[:i + 1], *zigzag, point=point))
+        expected = zigzag_score_reference([close[i]] + p) if p is not None else 0.0
+        zz_err = max(zz_err, abs(port_zz[i] - expected))
+    t_ref = time.perf_counter() - t0
+    rsi_err = np.abs(np.nan_to_num(port_rsi, nan=0.0) - rsi_reference(close, rsi_period)).max()  # 0.0 = unfilled
+
+    print(f"{path}: {n} bars | point {point:g} | ZigZag{zigzag} | RSI({rsi_period})")
+    print(f"ZigZag score max |port - MQL5| over {len(at)} bars: {zz_err:.3g}")
+    print(f"RSI max |port - MQL5| over all bars: {rsi_err:.3g}")
+    print(f"Per bar: port {t_port / n * 1e6:.1f} us | full recalculation {t_ref / len(at) * 1e3:.1f} ms")
+    return zz_err, rsi_err
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the Python ZigZag/RSI port against the MQL5 formulas.")
+    parser.add_argument('bars_csv', help="MT5 bar export (e.g. the D1 history the EA runs on)")
+    parser.add_argument('--zigzag', type=int, nargs=3, default=list(MAJOR_ZIGZAG),
+                        metavar=('DEPTH', 'DEVIATION', 'BACKSTEP'))
+    parser.add_argument('--rsi-period', type=int, default=RSI_PERIOD)
+    parser.add_argument('--point', type=float, default=None, help="Symbol _Point (inferred from prices if omitted)")
+    parser.add_argument('--samples', type=int, default=300, help="Bars checked against the full ZigZag recalculation")
+    args = parser.parse_args()
+    check(args.bars_csv, tuple(args.zigzag), args.rsi_period, args.point, args.samples)